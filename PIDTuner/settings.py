@@ -137,3 +137,34 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Rows per chunk when streaming uploaded trend files; bounds ingest memory
+TREND_INGEST_CHUNK_ROWS = 100_000
+
+# Memory budget for the process-wide parsed trend cache (LRU eviction beyond this)
+TREND_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Target points per trace when rendering trend charts (server-side downsampling)
+TREND_MAX_POINTS = 5000
+TREND_MAX_POINTS_LIMIT = 50_000  # Upper bound for the `max_points` query parameter
+
+# Background trend ingestion (DB-backed queue, no external broker)
+TREND_INGEST_WORKERS = 2  # Threads in the in-process worker pool
+TREND_INGEST_RUN_IN_PROCESS = True  # False: leave jobs to `manage.py run_ingest_worker`
+TREND_BULK_WORKERS = None  # Processes for bulk archive uploads (None: one per CPU core)
+
+# Lambda robustness maps (closed-loop simulations over lambda × model-uncertainty grids)
+TUNING_ROBUSTNESS_WORKERS = None  # Processes per map (None: one per CPU core)
+TUNING_ROBUSTNESS_CACHE_ENTRIES = 64  # Maps kept per process, keyed by a hash of their inputs
+
+# Server-side pagination of the loop and identity trend lists
+TUNER_LOOPS_PER_PAGE = 50
+TUNER_IDENTITY_LOOPS_PER_PAGE = 20
+
+# Progress and failures of the tuner app (ingestion jobs, bulk uploads, import profiles) on the console
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {"tuner": {"handlers": ["console"], "level": "INFO"}},
+}
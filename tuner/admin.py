@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import PIDLoop, TrendChart, PIDCalculation, BumpTest
+from .models import PIDLoop, TrendChart, PIDCalculation, BumpTest, IngestionJob, ImportProfile
 
 
 class BumpTestAdmin(admin.ModelAdmin):
@@ -50,8 +50,22 @@ class PIDCalculationAdmin(admin.ModelAdmin):
     get_bump_tests.short_description = "Bump Tests Used"
 
 
+class IngestionJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "original_name", "pid_loop", "status", "phase", "rows_processed", "created_at", "finished_at")
+    search_fields = ("id", "original_name", "pid_loop__name")
+    list_filter = ("status",)
+
+
+class ImportProfileAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "delimiter", "time_column", "time_format", "source_timezone", "use_count",
+                    "last_used_at", "auto_learned")
+    search_fields = ("name", "time_column")
+
+
 # ✅ Register Models with Admin
 admin.site.register(PIDLoop, PIDLoopAdmin)
 admin.site.register(TrendChart, TrendChartAdmin)
 admin.site.register(PIDCalculation, PIDCalculationAdmin)
 admin.site.register(BumpTest, BumpTestAdmin)
+admin.site.register(IngestionJob, IngestionJobAdmin)
+admin.site.register(ImportProfile, ImportProfileAdmin)
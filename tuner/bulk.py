@@ -0,0 +1,231 @@
+import os
+import posixpath
+import tarfile
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from .ingest import ingest_file_report, ingest_key, ingest_layout
+from .models import ImportProfile, PIDLoop, TrendChart
+from .trend_store import store_upload
+
+
+MANIFEST_NAME = "manifest.csv"
+TREND_EXTENSIONS = (".csv", ".tsv", ".txt")
+COPY_BYTES = 1024 * 1024
+
+
+def _member_name(name):
+    """Normalized archive path ("./a/b.csv" → "a/b.csv"); None for unsafe (absolute or "..") paths."""
+    name = posixpath.normpath(name.replace("\\", "/")) if name else "."
+    if name == "." or name.startswith("/") or ".." in name.split("/"):
+        return None
+    return name
+
+
+class TrendArchive:
+    """Read-only view of a zip or tar(.gz/.bz2/.xz) archive of trend exports."""
+
+    def __init__(self, path):
+        if zipfile.is_zipfile(path):
+            self._zip = zipfile.ZipFile(path)
+            self._tar = None
+            entries = [info for info in self._zip.infolist() if not info.is_dir()]
+            self.members = {_member_name(info.filename): info for info in entries}
+        elif tarfile.is_tarfile(path):
+            self._zip = None
+            self._tar = tarfile.open(path)
+            self.members = {_member_name(m.name): m for m in self._tar.getmembers() if m.isfile()}
+        else:
+            raise ValueError("Upload must be a .zip or .tar(.gz) archive.")
+        self.members.pop(None, None)
+
+    def open(self, name):
+        member = self.members[name]
+        return self._zip.open(member) if self._zip else self._tar.extractfile(member)
+
+    def find(self, name):
+        """Resolves a manifest file name to an archive member (exact path first, then unique basename)."""
+        name = _member_name(name)
+        if name in self.members:
+            return name
+        matches = [m for m in self.members if posixpath.basename(m) == name]
+        return matches[0] if len(matches) == 1 else None
+
+    def close(self):
+        (self._zip or self._tar).close()
+
+
+def read_manifest(archive):
+    """
+    Reads `manifest.csv` (columns: file, pid_loop, optional description and timezone).
+    `pid_loop` may be a loop id or its exact name.
+    """
+    manifest = archive.find(MANIFEST_NAME)
+    if manifest is None:
+        raise ValueError(f"Archive has no {MANIFEST_NAME}.")
+
+    with archive.open(manifest) as f:
+        df = pd.read_csv(f, dtype=str, keep_default_na=False)
+    df.columns = [col.strip().lower() for col in df.columns]
+    if "file" not in df.columns or "pid_loop" not in df.columns:
+        raise ValueError(f"{MANIFEST_NAME} needs 'file' and 'pid_loop' columns.")
+    return df.to_dict(orient="records")
+
+
+def _resolve_loops(entries):
+    """Maps each manifest `pid_loop` value to a PIDLoop with a single query."""
+    values = {str(entry["pid_loop"]).strip() for entry in entries}
+    ids = [int(v) for v in values if v.isdigit()]
+    loops = PIDLoop.objects.filter(Q(id__in=ids) | Q(name__in=values))
+    by_id = {str(loop.id): loop for loop in loops}
+    by_name = {loop.name: loop for loop in loops}
+    return {v: by_id.get(v) or by_name.get(v) for v in values}
+
+
+def bulk_ingest_archive(archive_path, user_timezone="UTC", workers=None):
+    """
+    Ingests every file listed in an archive's manifest and creates their TrendCharts.
+    Files are extracted sequentially, parsed in parallel across `workers` processes
+    (default `TREND_BULK_WORKERS` or the CPU count), and all charts are inserted in one
+    transaction with `bulk_create`. Returns one report dict per manifest entry / unlisted file.
+    """
+    upload_dir = os.path.join(settings.MEDIA_ROOT, "trend_charts")
+    os.makedirs(upload_dir, exist_ok=True)
+    chunk_rows = getattr(settings, "TREND_INGEST_CHUNK_ROWS", 100_000)
+
+    archive = TrendArchive(archive_path)
+    try:
+        entries = read_manifest(archive)
+        loops = _resolve_loops(entries)
+        reports, tasks, duplicates, listed = [], [], [], set()
+        first_by_hash = {}
+
+        for entry in entries:
+            report = {"file": entry["file"], "pid_loop": entry["pid_loop"], "rows_read": 0, "rows_written": 0,
+                      "parse_seconds": 0.0, "error": None, "trend_chart_id": None}
+            reports.append(report)
+
+            member = archive.find(entry["file"])
+            loop = loops.get(str(entry["pid_loop"]).strip())
+            if member is None:
+                report["error"] = "File not found in archive."
+                continue
+            listed.add(member)
+            if loop is None:
+                report["error"] = f"Unknown PID loop '{entry['pid_loop']}'."
+                continue
+
+            # ✅ Same naming as single uploads: raw export kept, cleaned series in a .trend file
+            unique_filename = f"{uuid.uuid4()}_{posixpath.basename(member)}"
+            source_path = os.path.join(upload_dir, unique_filename)
+            with archive.open(member) as src:
+                content_hash = store_upload(iter(lambda: src.read(COPY_BYTES), b""), source_path)
+
+            delimiter = "," if member.lower().endswith(".csv") else "\t"
+            timezone = entry.get("timezone") or user_timezone
+
+            # ✅ Known single-loop header → workers take the fixed-format path
+            profile = ImportProfile.match(source_path, delimiter)
+            layout = None
+            if profile is not None and profile.layout() is not None:
+                layout = {**profile.ingest_options(), "columns": (profile.time_column, *profile.column_map[""])}
+            else:
+                profile = None
+
+            # ✅ Byte-identical to an existing chart or an earlier file of this archive, read with the same
+            #   timezone, delimiter and layout: share its files
+            read_as = (content_hash, timezone, delimiter, profile.id if profile else None)
+            original = first_by_hash.get(read_as) or TrendChart.find_processed(
+                ingest_key(content_hash, timezone, delimiter, profile and profile.layout()))
+            if original is not None:
+                os.remove(source_path)
+                duplicates.append((report, loop, entry, original))
+                continue
+
+            data_filename = f"{os.path.splitext(unique_filename)[0]}.trend"
+
+            task = {
+                "report": report, "loop": loop, "entry": entry, "content_hash": content_hash,
+                "csv_file": os.path.join("trend_charts", unique_filename),
+                "data_file": os.path.join("trend_charts", data_filename),
+                "profile": profile, "name": posixpath.basename(member),
+                "args": (source_path, os.path.join(upload_dir, data_filename), delimiter, timezone, chunk_rows, layout),
+            }
+            tasks.append(task)
+            first_by_hash[read_as] = task
+
+        for member in archive.members:
+            if member not in listed and member.lower().endswith(TREND_EXTENSIONS) and \
+                    posixpath.basename(member) != MANIFEST_NAME:
+                reports.append({"file": member, "pid_loop": None, "rows_read": 0, "rows_written": 0,
+                                "parse_seconds": 0.0, "error": "Not listed in manifest; skipped.",
+                                "trend_chart_id": None})
+    finally:
+        archive.close()
+
+    # ✅ Parse across CPU cores; workers only touch files, never the database
+    workers = min(workers or getattr(settings, "TREND_BULK_WORKERS", None) or os.cpu_count() or 1, len(tasks) or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(ingest_file_report, *zip(*[task["args"] for task in tasks])))
+    else:
+        results = [ingest_file_report(*task["args"]) for task in tasks]
+
+    charts, chart_reports = [], []
+
+    def add_chart(report, loop, entry, csv_file, data_file, content_hash, key):
+        charts.append(TrendChart(
+            pid_loop=loop,
+            description=entry.get("description") or None,
+            csv_file=csv_file,
+            data_file=data_file,
+            content_hash=content_hash,
+            ingest_key=key,
+        ))
+        chart_reports.append(report)
+
+    for task, result in zip(tasks, results):
+        layout = result.pop("layout")
+        task["report"].update(result)
+        source_path, _, delimiter, timezone = task["args"][:4]
+        if result["profiled"]:
+            task["profile"].mark_used()
+        elif layout is not None:
+            ImportProfile.learn(source_path, f"Auto: {task['name']}", delimiter, layout, timezone)
+        if result["error"]:
+            for path in task["args"][:2]:
+                if os.path.exists(path):
+                    os.remove(path)
+            continue
+        used = task["profile"] if result["profiled"] else None
+        task["ingest_key"] = ingest_key(task["content_hash"], timezone, delimiter, ingest_layout(
+            (layout["columns"]["time"], *layout["columns"]["pairs"][""]), layout["time_format"],
+            used.header_row if used else 0, used.decimal if used else "."))
+        add_chart(task["report"], task["loop"], task["entry"], task["csv_file"], task["data_file"],
+                  task["content_hash"], task["ingest_key"])
+
+    for report, loop, entry, original in duplicates:
+        if isinstance(original, TrendChart):
+            rows = len(original.load_series())
+            csv_file, data_file, content_hash = original.csv_file.name, original.data_file.name, original.content_hash
+            key = original.ingest_key
+        else:
+            if original["report"]["error"]:
+                report["error"] = f"Identical to {original['report']['file']}, which failed: {original['report']['error']}"
+                continue
+            rows = original["report"]["rows_written"]
+            csv_file, data_file, content_hash = original["csv_file"], original["data_file"], original["content_hash"]
+            key = original["ingest_key"]
+        report.update({"rows_read": rows, "rows_written": rows, "deduplicated": True})
+        add_chart(report, loop, entry, csv_file, data_file, content_hash, key)
+
+    with transaction.atomic():
+        created = TrendChart.objects.bulk_create(charts)
+    for report, chart in zip(chart_reports, created):
+        report["trend_chart_id"] = chart.id
+
+    return reports
@@ -0,0 +1,117 @@
+import numpy as np
+from .trend_store import TrendSeries, to_ns
+
+
+# ✅ Samples kept on each side of a bump edge / T-marker so they survive reduction
+KEEP_NEIGHBORHOOD = 5
+
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: returns `n_out` indices that best preserve the visual shape of y(x)."""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.nan_to_num(np.asarray(y, dtype=np.float64))
+
+    # n_out - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    starts, ends = edges[:-1], edges[1:]
+
+    # ✅ Bucket averages computed once; the "next bucket" of the last bucket is the last point
+    sizes = (ends - starts).astype(np.float64)
+    avg_x = np.append(np.add.reduceat(x[:n - 1], starts) / sizes, x[-1])
+    avg_y = np.append(np.add.reduceat(y[:n - 1], starts) / sizes, y[-1])
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i, (start, end) in enumerate(zip(starts, ends)):
+        bx, by = x[start:end], y[start:end]
+        area = np.abs((x[a] - avg_x[i + 1]) * (by - y[a]) - (x[a] - bx) * (avg_y[i + 1] - y[a]))
+        a = start + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def minmax_indices(y, n_out):
+    """Returns the min and max sample of each of `n_out // 2` equal buckets (fully vectorized)."""
+    n = len(y)
+    buckets = max(n_out // 2, 1)
+    if n_out >= n:
+        return np.arange(n)
+
+    size = -(-n // buckets)
+    y = np.asarray(y, dtype=np.float64)
+    lo = np.full(buckets * size, np.inf)
+    hi = np.full(buckets * size, -np.inf)
+    valid = ~np.isnan(y)
+    lo[:n] = np.where(valid, y, np.inf)
+    hi[:n] = np.where(valid, y, -np.inf)
+
+    base = np.arange(buckets) * size
+    idx = np.concatenate([base + lo.reshape(buckets, size).argmin(axis=1),
+                          base + hi.reshape(buckets, size).argmax(axis=1)])
+    return np.unique(np.clip(idx, 0, n - 1))
+
+
+def keep_indices(time_ns, keep_times, neighborhood=KEEP_NEIGHBORHOOD):
+    """Indices of the samples around each of `keep_times` (bump edges, T-markers)."""
+    if not len(time_ns) or not keep_times:
+        return np.empty(0, dtype=np.int64)
+
+    centers = np.searchsorted(time_ns, np.array([to_ns(t) for t in keep_times], dtype=np.int64))
+    offsets = np.arange(-neighborhood, neighborhood + 1)
+    return np.unique(np.clip(centers[:, None] + offsets[None, :], 0, len(time_ns) - 1).ravel())
+
+
+def downsample_series(series, max_points, keep_times=(), method="lttb"):
+    """
+    Reduces PV and CV to about `max_points` samples each and returns the union as a new TrendSeries.
+    The first/last samples and the neighborhoods of `keep_times` are always kept.
+    """
+    n = len(series)
+    if n <= max_points:
+        return series
+
+    if method == "minmax":
+        picks = [minmax_indices(series.pv, max_points), minmax_indices(series.cv, max_points)]
+    else:
+        x = np.asarray(series.time - series.time[0], dtype=np.float64)
+        picks = [lttb_indices(x, series.pv, max_points), lttb_indices(x, series.cv, max_points)]
+
+    picks.append(np.array([0, n - 1]))
+    picks.append(keep_indices(series.time, [t for t in keep_times if t]))
+    idx = np.unique(np.concatenate(picks))
+    return TrendSeries(series.time[idx], series.pv[idx], series.cv[idx])
+
+
+def bump_keep_times(bump_tests):
+    """Bump edges and T-markers of the given bump tests, for `downsample_series(keep_times=...)`."""
+    times = []
+    for bump in bump_tests:
+        times.extend([bump.start_time, bump.end_time, bump.T1, bump.T2, bump.T3, bump.T4, bump.TCV])
+    return [t for t in times if t]
+
+
+def pyramid_window(pyramid, series, max_points, keep_times=(), agg="minmax"):
+    """
+    Answers a (windowed) series from its aggregation pyramid in time proportional to `max_points`,
+    merged with the raw samples around `keep_times`. Falls back to `downsample_series` without levels.
+    """
+    if not len(series):
+        return series
+
+    reduced = pyramid.query(int(series.time[0]), int(series.time[-1]), max_points, agg=agg)
+    if reduced is None:
+        return downsample_series(series, max_points, keep_times=keep_times)
+
+    keep = keep_indices(series.time, [t for t in keep_times if t])
+    time = np.concatenate([reduced.time, series.time[keep]])
+    order = np.argsort(time, kind="stable")
+    return TrendSeries(
+        time[order],
+        np.concatenate([reduced.pv, np.asarray(series.pv[keep], dtype=np.float64)])[order],
+        np.concatenate([reduced.cv, np.asarray(series.cv[keep], dtype=np.float64)])[order],
+    )
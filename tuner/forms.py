@@ -7,6 +7,7 @@ class TrendChartUploadForm(forms.ModelForm):
 
     pid_loop = forms.ModelChoiceField(
         queryset=PIDLoop.objects.all(),
+        required=False,
         empty_label="Select a PID Loop",
         widget=forms.Select(attrs={"class": "form-control"})  # ✅ Bootstrap styling
     )
@@ -15,6 +16,12 @@ class TrendChartUploadForm(forms.ModelForm):
         widget=forms.FileInput(attrs={"class": "form-control"})
     )
 
+    wide_file = forms.BooleanField(
+        required=False,
+        label="Wide file: PV/CV pairs for many loops, matched to PID Loops by tag name",
+        widget=forms.CheckboxInput(attrs={"class": "form-check-input"})
+    )
+
     description = forms.CharField(
         required=False,
         widget=forms.TextInput(attrs={"class": "form-control", "placeholder": "Enter description..."})
@@ -24,6 +31,20 @@ class TrendChartUploadForm(forms.ModelForm):
         model = TrendChart
         fields = ["pid_loop", "csv_file", "description"]
 
+    def clean(self):
+        cleaned_data = super().clean()
+        if not cleaned_data.get("wide_file") and not cleaned_data.get("pid_loop"):
+            self.add_error("pid_loop", "Select a PID Loop (or mark the upload as a wide file).")
+        return cleaned_data
+
+
+class BulkTrendUploadForm(forms.Form):
+    """Form to upload a zip/tar of trend exports with a manifest.csv mapping files to PID Loops."""
+
+    archive = forms.FileField(
+        widget=forms.FileInput(attrs={"class": "form-control", "accept": ".zip,.tar,.tgz,.gz,.bz2,.xz"})
+    )
+
 
 class PIDLoopForm(forms.ModelForm):
     """Form to create or edit a PID Loop."""
@@ -0,0 +1,164 @@
+import numpy as np
+
+
+# ✅ Model identification from a whole bump window (pure NumPy):
+#   the window is resampled to a uniform grid, the CV deviation is filtered for every lag candidate
+#   with one batched FFT convolution, and every deadtime shift of every candidate is fitted in closed
+#   form from FFT cross-correlations — the grid search costs a few FFTs, not a fit per candidate.
+FIT_POINTS = 2048           # Uniform samples per window (longer windows are resampled down)
+LAG_CANDIDATES = 48         # Log-spaced lag time constants, from one sample to LAG_SPAN_FACTOR × window
+LAG_SPAN_FACTOR = 4.0
+REFINE_CANDIDATES = 16      # Second, finer lag pass around the best coarse candidate
+MAX_DEADTIME_FRACTION = 0.5  # Deadtime candidates: every sample shift up to half the window
+EDGE_PENALTY = 0.5          # Confidence factor when the optimum sits on the edge of the search grid
+
+MODEL_FOR_PID_TYPE = {
+    "1st Order": "FOPDT",
+    "Integrating": "IPDT",
+    "Integrating with Lag": "IPDT with Lag",
+}
+
+
+def _uniform(series):
+    """Resamples a window to FIT_POINTS uniform samples: PV interpolated, CV held (steps stay steps)."""
+    time = np.asarray(series.time, dtype=np.int64)
+    pv = np.asarray(series.pv, dtype=np.float64)
+    cv = np.asarray(series.cv, dtype=np.float64)
+    ok = np.isfinite(pv) & np.isfinite(cv)
+    time, pv, cv = time[ok], pv[ok], cv[ok]
+    if len(time) < 8 or time[-1] <= time[0]:
+        return None
+
+    seconds = (time - time[0]) / 1e9
+    m = min(len(time), FIT_POINTS)
+    grid = np.linspace(0.0, seconds[-1], m)
+    held = np.clip(np.searchsorted(seconds, grid, side="right") - 1, 0, len(seconds) - 1)
+    return grid, np.interp(grid, seconds, pv), cv[held]
+
+
+def _lag_responses(du, dt, taus, nfft):
+    """
+    Unit-gain first-order lag of the held input `du` for every tau (rows), sampled exactly
+    (s[k] = a·s[k-1] + (1 - a)·du[k-1]), by one batched FFT convolution.
+    """
+    m = len(du)
+    a = np.exp(-dt / taus)[:, None]
+    # ✅ Spectrum of the truncated kernel (1 - a)·a^(k-1), 1 <= k <= m, in closed form (no kernel FFTs)
+    z = np.exp(-2j * np.pi * np.arange(nfft // 2 + 1) / nfft)[None, :]
+    kernel = z * (1 - a) * (1 - a ** m * z ** m) / (1 - a * z)
+    return np.fft.irfft(kernel * np.fft.rfft(du, nfft)[None, :], nfft)[:, :m]
+
+
+def _grid_fit(y, seconds, responses, max_shift, drift):
+    """
+    Closed-form least squares of y ≈ y0 [+ drift·t] + K·response(t - d·dt) for every candidate
+    response (rows) and every shift d in 0..max_shift. The offset (and drift) regressors are
+    projected out analytically, leaving a one-parameter fit per candidate computed elementwise.
+    Returns (sse, gain, offset, drift) arrays of shape (candidates, max_shift + 1).
+    """
+    m = len(y)
+    nfft = int(2 ** np.ceil(np.log2(2 * m)))
+    tail = m - 1 - np.arange(max_shift + 1)
+
+    # ✅ Sums over the shifted response: prefix sums for Σs and Σs², cross-correlations for Σs·y and Σs·t
+    fr = np.conj(np.fft.rfft(responses, nfft))
+    s1 = np.cumsum(responses, axis=1)[:, tail]
+    s2 = np.cumsum(responses ** 2, axis=1)[:, tail]
+    sy = np.fft.irfft(fr * np.fft.rfft(y, nfft)[None, :], nfft)[:, :max_shift + 1]
+    n, ysum, yy = m, y.sum(), (y ** 2).sum()
+
+    if drift:
+        # ✅ Inverse of the 2×2 normal matrix of the [1, t] baseline
+        st, stt, ty = seconds.sum(), (seconds ** 2).sum(), (seconds * y).sum()
+        st_c = np.fft.irfft(fr * np.fft.rfft(seconds, nfft)[None, :], nfft)[:, :max_shift + 1]
+        det = n * stt - st ** 2
+        q00, q01, q11 = stt / det, -st / det, n / det
+
+        def project(a0, a1, b0, b1):
+            return a0 * (q00 * b0 + q01 * b1) + a1 * (q01 * b0 + q11 * b1)
+
+        ss = s2 - project(s1, st_c, s1, st_c)
+        sy_r = sy - project(s1, st_c, ysum, ty)
+        yy_r = yy - project(ysum, ty, ysum, ty)
+    else:
+        ss = s2 - s1 ** 2 / n
+        sy_r = sy - s1 * ysum / n
+        yy_r = yy - ysum ** 2 / n
+
+    # ✅ Candidates whose shifted response is flat cannot explain anything: zero gain, SSE of the baseline
+    valid = ss > 1e-12 * max(float(ss.max()), 1e-300)
+    gain = np.where(valid, sy_r / np.where(valid, ss, 1.0), 0.0)
+    sse = np.maximum(yy_r - gain * sy_r, 0.0)
+
+    if drift:
+        rb0, rb1 = ysum - gain * s1, ty - gain * st_c
+        offset, slope = q00 * rb0 + q01 * rb1, q01 * rb0 + q11 * rb1
+    else:
+        offset, slope = (ysum - gain * s1) / n, np.zeros_like(gain)
+    return sse, gain, offset, slope
+
+
+def fit_process_model(series, model="FOPDT"):
+    """
+    Fits "FOPDT", "IPDT" or "IPDT with Lag" to a bump window's TrendSeries by least squares over
+    the whole window. Deadtime is searched on every sample shift and the lag on a log grid (refined once).
+    Returns a dict with the raw gain (PV units per CV unit, per second for integrating models),
+    deadtime and lag in seconds (lag None for IPDT), RMS residual (PV units), R² and a 0–1 confidence;
+    None when the window has no CV step to identify from.
+    """
+    uniform = _uniform(series)
+    if uniform is None:
+        return None
+    seconds, y, u = uniform
+    du = u - u[0]
+    if not np.any(np.abs(du) > 0):
+        return None
+
+    m = len(y)
+    dt = seconds[1] - seconds[0]
+    nfft = int(2 ** np.ceil(np.log2(2 * m)))
+    max_shift = max(1, int((m - 1) * MAX_DEADTIME_FRACTION))
+    integrating = model != "FOPDT"
+
+    def candidates(taus):
+        if taus is None:
+            return (np.cumsum(du) - du)[None, :] * dt  # ✅ Integral of the held input up to each sample
+        responses = _lag_responses(du, dt, taus, nfft)
+        return (np.cumsum(responses, axis=1) - 0.5 * responses) * dt if integrating else responses
+
+    def best(taus):
+        sse, gain, offset, drift = _grid_fit(y, seconds, candidates(taus), max_shift, drift=integrating)
+        i, d = np.unravel_index(np.argmin(sse), sse.shape)
+        return sse, (gain[i, d], offset[i, d], drift[i, d]), i, d
+
+    taus, on_edge = None, False
+    if model != "IPDT":
+        taus = np.geomspace(dt, LAG_SPAN_FACTOR * seconds[-1], LAG_CANDIDATES)
+        _sse, _fit, i, _d = best(taus)
+        on_edge = i in (0, len(taus) - 1)
+        taus = np.geomspace(taus[max(i - 1, 0)], taus[min(i + 1, len(taus) - 1)], REFINE_CANDIDATES)
+    grid_sse, (gain, offset, drift), i, d = best(taus)
+    sse = grid_sse[i, d]
+
+    # ✅ Sub-sample deadtime: vertex of the parabola through the SSE at d - 1, d, d + 1
+    deadtime = d * dt
+    if 0 < d < max_shift:
+        left, right = grid_sse[i, d - 1], grid_sse[i, d + 1]
+        curvature = left - 2 * sse + right
+        if curvature > 0:
+            deadtime += float(np.clip(0.5 * (left - right) / curvature, -0.5, 0.5)) * dt
+
+    sst = float(((y - y.mean()) ** 2).sum())
+    r2 = float(1 - sse / sst) if sst > 0 else 0.0
+    confidence = max(0.0, min(1.0, r2)) * (EDGE_PENALTY if on_edge or d == max_shift else 1.0)
+    return {
+        "model": model,
+        "gain": float(gain),
+        "deadtime": float(deadtime),
+        "tau": float(taus[i]) if taus is not None else None,
+        "drift": float(drift),
+        "offset": float(offset),
+        "residual": float(np.sqrt(sse / m)),
+        "r2": r2,
+        "confidence": round(confidence, 4),
+    }
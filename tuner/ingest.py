@@ -0,0 +1,356 @@
+import hashlib
+import json
+import time
+import numpy as np
+import pandas as pd
+import pytz
+from dateutil import parser
+from django.conf import settings
+from .trend_store import TrendSeriesWriter, read_trend_series
+from .pyramid import build_pyramid, pyramid_path_for
+
+
+# ✅ Historian timestamp formats, tried in order against a sample of the column
+TIME_FORMATS = [
+    "%m/%d/%Y %I:%M:%S.%f %p",  # 3/3/2025 2:23:13.004 PM
+    "%m/%d/%Y %I:%M:%S %p",  # 3/3/2025 2:23:33 PM
+    "%m/%d/%Y %H:%M:%S.%f",  # 2/27/2025 17:08:57.000
+    "%m/%d/%Y %H:%M:%S",  # 2/27/2025 17:08:57
+    "%m/%d/%Y %I:%M %p",  # 2/27/2025 5:08 PM
+    "%m/%d/%Y %H:%M",  # 2/27/2025 17:08
+]
+
+TIME_SAMPLE_SIZE = 500
+
+
+def infer_time_format(series, sample_size=TIME_SAMPLE_SIZE):
+    """Returns the known format that parses the most sampled timestamps, or None if none match."""
+    sample = series.dropna().astype(str).head(sample_size)
+    if sample.empty:
+        return None
+
+    # ✅ ISO 8601 exports (e.g. re-uploaded cleaned files) also parse in one pass
+    best_fmt, best_matches = None, 0
+    for fmt in TIME_FORMATS + ["ISO8601"]:
+        matches = int(pd.to_datetime(sample, format=fmt, errors="coerce").notna().sum())
+        if matches > best_matches:
+            best_fmt, best_matches = fmt, matches
+        if matches == len(sample):
+            break
+
+    return best_fmt
+
+
+def _parse_one(value):
+    """Parses a single timestamp with `dateutil`: (naive UTC timestamp or NaT, whether it carried an offset)."""
+    try:
+        parsed = pd.Timestamp(parser.parse(str(value)))
+    except (ValueError, OverflowError, TypeError):
+        return pd.NaT, False
+    if parsed.tzinfo is not None:
+        return parsed.tz_convert("UTC").tz_localize(None), True
+    return parsed, False
+
+
+def parse_time_column(series, fmt=None, sample_size=TIME_SAMPLE_SIZE):
+    """
+    Parses a time column in one vectorized pass.
+    Infers the format from a sample of rows (unless `fmt` is given) and only falls back
+    to per-row `dateutil` parsing for rows the inferred format could not handle.
+    Timestamps carrying an offset (ISO "Z"/"+hh:mm", %z) come back as naive UTC.
+    Returns the parsed series and a report with the matched format, fallback count and
+    `tz_aware` (the times carried their own offset, so they are already UTC).
+    """
+    if fmt is None:
+        fmt = infer_time_format(series, sample_size=sample_size)
+
+    tz_aware = False
+    if fmt is not None:
+        parsed = pd.to_datetime(series, format=fmt, errors="coerce")
+        if parsed.dt.tz is not None:
+            tz_aware = True
+            parsed = parsed.dt.tz_convert("UTC").dt.tz_localize(None)
+    else:
+        parsed = pd.Series(pd.NaT, index=series.index, dtype="datetime64[ns]")
+
+    # ✅ Only rows with a value that the vectorized pass rejected go through dateutil
+    failed = parsed.isna() & series.notna()
+    fallback_rows = int(failed.sum())
+    if fallback_rows:
+        fallback = series[failed].map(_parse_one)
+        if fmt is None:
+            tz_aware = any(aware for _value, aware in fallback)
+        parsed.loc[failed] = fallback.map(lambda result: result[0]).astype("datetime64[ns]")
+
+    report = {
+        "format": fmt,
+        "fallback_rows": fallback_rows,
+        "invalid_rows": int((parsed.isna() & series.notna()).sum()),
+        "tz_aware": tz_aware,
+    }
+    return parsed, report
+
+
+# ✅ Column-name keywords for PV/CV, also used to pair columns by tag prefix in wide exports
+PV_KEYWORDS = ["MEAS", "Process Variable", "Input", ".PNT", ".IN", "PV"]
+CV_KEYWORDS = ["Output", ".OUT", "CV"]
+TAG_SEPARATORS = " ._-:/"
+
+
+def detect_trend_columns(columns):
+    """Finds the Time, PV and CV columns of an upload header by keyword."""
+    time_col = next((col for col in columns if "time" in col.lower()), None)
+    if not time_col:
+        raise ValueError("Missing 'Time' column in CSV.")
+
+    pv_col = next((col for col in columns if "pv" in col.lower()), None)
+    cv_col = next((col for col in columns if "cv" in col.lower()), None)
+    if not pv_col or not cv_col:
+        raise ValueError("Missing PV/CV columns in CSV.")
+
+    return time_col, pv_col, cv_col
+
+
+def read_header(source_path, delimiter=",", header_row=0):
+    """Column names of a delimited export, without reading any rows."""
+    return pd.read_csv(source_path, delimiter=delimiter, skiprows=header_row, nrows=0).columns.tolist()
+
+
+def read_header_lines(source_path, count):
+    """The first `count` raw lines of an export (for header signatures)."""
+    lines = []
+    with open(source_path, "rb") as f:
+        for line in f:
+            lines.append(line)
+            if len(lines) >= count:
+                break
+    return lines
+
+
+def header_signature(line):
+    """Stable fingerprint of a raw header line: identical historian layouts share a signature."""
+    if isinstance(line, bytes):
+        line = line.decode("utf-8", errors="replace")
+    return hashlib.sha1(line.lstrip("\ufeff").strip().encode("utf-8")).hexdigest()
+
+
+def split_tag(column):
+    """
+    Splits a column like "FIC101.PV" or "TIC-7 Output" into (tag prefix, "PV"/"CV").
+    The rightmost PV/CV keyword wins; returns (None, None) for columns without one.
+    """
+    upper = column.upper()
+    best = None
+    for role, keywords in (("PV", PV_KEYWORDS), ("CV", CV_KEYWORDS)):
+        for keyword in keywords:
+            pos = upper.rfind(keyword.upper())
+            if pos >= 0 and (best is None or (pos, len(keyword)) > (best[0], best[1])):
+                best = (pos, len(keyword), role)
+    if best is None:
+        return None, None
+    return column[:best[0]].strip(TAG_SEPARATORS), best[2]
+
+
+def detect_tag_pairs(columns):
+    """
+    Groups the PV/CV columns of a wide export by tag prefix.
+    Returns (time column, {tag: (pv_col, cv_col)}, [columns without a partner]).
+    """
+    time_col = next((col for col in columns if "time" in col.lower()), None)
+    if not time_col:
+        raise ValueError("Missing 'Time' column in CSV.")
+
+    roles = {}
+    for col in columns:
+        if col == time_col:
+            continue
+        tag, role = split_tag(col)
+        if role:
+            roles.setdefault(tag, {}).setdefault(role, col)
+
+    pairs = {tag: (found["PV"], found["CV"]) for tag, found in roles.items() if "PV" in found and "CV" in found}
+    unpaired = [col for tag, found in roles.items() if tag not in pairs for col in found.values()]
+    if not pairs:
+        raise ValueError("No PV/CV column pairs found in CSV.")
+    return time_col, pairs, unpaired
+
+
+def ingest_trend_file(source_path, dest_path, delimiter=",", user_timezone="UTC", chunk_rows=None,
+                      preview_rows=20, progress=None, columns=None, time_format=None, header_row=0, decimal="."):
+    """
+    Streams a raw historian export into a columnar trend data file, `chunk_rows` rows at a time.
+    Peak memory is bounded by the chunk size; forward-fill state is carried across chunks.
+    The source file is left untouched so the original export stays available for download.
+    The aggregation pyramid is rebuilt next to `dest_path` once the data file is complete.
+    `progress(phase, stats)`, if given, is called after every chunk and before the pyramid is built.
+    Known layouts (an import profile) pass `columns` (Time, PV, CV) and `time_format` to skip detection.
+    Returns ingestion stats plus the first `preview_rows` cleaned rows.
+    """
+    if columns:
+        time_col, pv_col, cv_col = columns
+    else:
+        time_col, pv_col, cv_col = detect_trend_columns(read_header(source_path, delimiter, header_row))
+
+    stats = ingest_trend_columns(source_path, time_col, {"": (pv_col, cv_col)}, {"": dest_path},
+                                 delimiter=delimiter, user_timezone=user_timezone, chunk_rows=chunk_rows,
+                                 preview_rows=preview_rows, progress=progress, time_format=time_format,
+                                 header_row=header_row, decimal=decimal)
+    stats["pyramid_levels"] = stats["pyramid_levels"][""]
+    return stats
+
+
+def ingest_trend_columns(source_path, time_col, pairs, dest_paths, delimiter=",", user_timezone="UTC",
+                         chunk_rows=None, preview_rows=20, progress=None, time_format=None, header_row=0,
+                         decimal="."):
+    """
+    Streams one export into a data file per PV/CV pair: `pairs` maps a key to its (PV, CV) columns
+    and `dest_paths` maps the same key to its output. The Time column is parsed and converted once
+    per chunk and shared by every pair, so a wide multi-loop file is read a single time.
+    A given `time_format` is used as-is (no sampling/inference); `header_row` lines are skipped
+    before the header and `decimal` is the decimal separator of the numeric columns.
+    The preview holds the first pair's rows; `pyramid_levels` is reported per key.
+    """
+    chunk_rows = chunk_rows or getattr(settings, "TREND_INGEST_CHUNK_ROWS", 100_000)
+
+    try:
+        user_tz = pytz.timezone(user_timezone)
+    except pytz.UnknownTimeZoneError as e:
+        raise ValueError(f"Invalid timezone conversion: {e}")
+
+    # ✅ Only the needed columns are read; PV/CV come back as float64 when clean
+    columns = [time_col] + list(dict.fromkeys(col for pair in pairs.values() for col in pair))
+    reader = pd.read_csv(
+        source_path,
+        delimiter=delimiter,
+        usecols=columns,
+        dtype={time_col: str},
+        skiprows=header_row,
+        decimal=decimal,
+        chunksize=chunk_rows,
+    )
+
+    stats = {"rows_read": 0, "rows_written": 0, "fallback_rows": 0, "time_format": None, "chunks": 0}
+    preview = []
+    preview_key = next(iter(pairs))
+    last = {key: (np.nan, np.nan) for key in pairs}
+    writers = {key: TrendSeriesWriter(dest_paths[key]) for key in pairs}
+
+    try:
+        for chunk in reader:
+            stats["chunks"] += 1
+            stats["rows_read"] += len(chunk)
+
+            # ✅ Infer the time format on the first chunk, reuse it for the rest
+            times, report = parse_time_column(chunk[time_col], fmt=time_format)
+            time_format = time_format or report["format"]
+            stats["fallback_rows"] += report["fallback_rows"]
+
+            valid = times.notna()
+            if not valid.any():
+                continue
+            chunk, times = chunk[valid], times[valid]
+
+            try:
+                if report["tz_aware"]:
+                    times = times.dt.tz_localize(pytz.utc)  # ✅ Offsets in the data win over the upload timezone
+                else:
+                    times = times.dt.tz_localize(user_tz).dt.tz_convert(pytz.utc)
+            except Exception as e:
+                raise ValueError(f"Invalid timezone conversion: {e}")
+            time_ns = times.astype("int64").to_numpy()
+
+            for key, (pv_col, cv_col) in pairs.items():
+                # ✅ Forward-fill within the chunk, then seed leading gaps from the previous chunk
+                pv = pd.to_numeric(chunk[pv_col], errors="coerce").ffill().fillna(last[key][0])
+                cv = pd.to_numeric(chunk[cv_col], errors="coerce").ffill().fillna(last[key][1])
+                last[key] = (pv.iloc[-1], cv.iloc[-1])
+                writers[key].append(time_ns, pv.to_numpy(), cv.to_numpy())
+
+                if key == preview_key and len(preview) < preview_rows:
+                    head = pd.DataFrame({"Time": times, "PV": pv, "CV": cv}).head(preview_rows - len(preview))
+                    preview.extend(head.to_dict(orient="records"))
+
+            stats["rows_written"] += len(time_ns)
+
+            if progress:
+                progress("ingesting", stats)
+
+        if stats["rows_written"] == 0:
+            raise ValueError("Processed CSV has no valid timestamps.")
+    except Exception:
+        for writer in writers.values():
+            writer.abort()
+        raise
+
+    for writer in writers.values():
+        writer.close()
+
+    if progress:
+        progress("pyramid", stats)
+
+    # ✅ Min/max/mean pyramid next to each data file so any zoom level is answered from aggregates
+    stats["pyramid_levels"] = {
+        key: build_pyramid(read_trend_series(path), pyramid_path_for(path)) for key, path in dest_paths.items()
+    }
+
+    stats["time_format"] = time_format
+    stats["columns"] = {"time": time_col, "pairs": {key: list(pair) for key, pair in pairs.items()}}
+    stats["preview"] = preview
+    return stats
+
+
+def ingest_layout(columns, time_format, header_row=0, decimal="."):
+    """The reading layout of a single-loop file: (Time, PV, CV) columns, time format, header row, decimal."""
+    return {"columns": list(columns), "time_format": time_format or None, "header_row": header_row,
+            "decimal": decimal}
+
+
+def stats_layout(stats, header_row=0, decimal="."):
+    """The `ingest_layout` a single-loop ingest actually used, from its stats."""
+    return ingest_layout((stats["columns"]["time"], *stats["columns"]["pairs"][""]), stats["time_format"],
+                         header_row, decimal)
+
+
+def ingest_key(content_hash, user_timezone, delimiter, layout):
+    """
+    Deduplication key of an ingested upload. Identical bytes only give identical data when read with
+    the same timezone, delimiter and `ingest_layout`, so all of them are hashed; None without a layout.
+    """
+    if not content_hash or layout is None:
+        return None
+    payload = json.dumps([content_hash, user_timezone, delimiter, layout], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def ingest_file_report(source_path, dest_path, delimiter=",", user_timezone="UTC", chunk_rows=None, layout=None):
+    """
+    Process-pool entry point for bulk uploads: ingests one file and returns a picklable report.
+    `layout` (ImportProfile.ingest_options() plus "columns") takes the fixed-format path, falling
+    back to detection if the file does not fit it; `user_timezone` applies either way.
+    Never raises; errors are reported in the "error" key.
+    Uses no ORM, so spawned workers need no app setup.
+    """
+    started = time.perf_counter()
+    stats, error, profiled = {"rows_read": 0, "rows_written": 0}, None, False
+    try:
+        if layout is not None:
+            try:
+                stats = ingest_trend_file(source_path, dest_path, user_timezone=user_timezone, chunk_rows=chunk_rows,
+                                          preview_rows=0, **layout)
+                profiled = True
+            except Exception:
+                layout = None
+        if layout is None:
+            stats = ingest_trend_file(source_path, dest_path, delimiter=delimiter, user_timezone=user_timezone,
+                                      chunk_rows=chunk_rows, preview_rows=0)
+    except Exception as e:
+        error = str(e)
+
+    return {
+        "rows_read": stats["rows_read"],
+        "rows_written": stats["rows_written"],
+        "parse_seconds": round(time.perf_counter() - started, 3),
+        "error": error,
+        "profiled": profiled,
+        "layout": None if error else {"time_format": stats["time_format"], "columns": stats["columns"]},
+    }
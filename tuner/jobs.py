@@ -0,0 +1,357 @@
+import logging
+import os
+import re
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.timezone import now
+from .ingest import ingest_trend_file, ingest_trend_columns, detect_tag_pairs, read_header, ingest_key, stats_layout
+from .models import ImportProfile, IngestionJob, PIDLoop, TrendChart
+from .pyramid import pyramid_path_for
+
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+
+
+def enqueue_ingestion(pid_loop, description, source_name, original_name, delimiter=",", user_timezone="UTC",
+                      content_hash=None, mode="single"):
+    """
+    Records a queued ingestion job for an upload already saved under MEDIA_ROOT and returns it.
+    A byte-identical upload that was already processed with the same timezone, delimiter and layout
+    completes at once, sharing that chart's files.
+    With `TREND_INGEST_RUN_IN_PROCESS`, the local worker pool picks it up once the row is committed.
+    `mode="wide"` splits a multi-loop export into one chart per PV/CV pair (`pid_loop` is not used).
+    """
+    if mode == "wide":
+        content_hash = None  # ✅ Wide files produce several charts; never share them as a single upload
+
+    job = IngestionJob.objects.create(
+        mode=mode,
+        pid_loop=pid_loop,
+        description=description,
+        source_file=source_name,
+        original_name=original_name,
+        delimiter=delimiter,
+        user_timezone=user_timezone,
+        content_hash=content_hash,
+    )
+
+    existing = TrendChart.find_processed(_expected_key(job, _single_profile(job)))
+    if existing is not None:
+        complete_duplicate(job, existing)
+        job.refresh_from_db()
+        return job
+
+    if getattr(settings, "TREND_INGEST_RUN_IN_PROCESS", True):
+        transaction.on_commit(lambda: local_pool().submit(_drain_in_thread))
+    return job
+
+
+def local_pool():
+    """Process-wide thread pool that drains the queue for `runserver`-style single-process deployments."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=getattr(settings, "TREND_INGEST_WORKERS", 2),
+                                       thread_name_prefix="ingest")
+        return _pool
+
+
+def _drain_in_thread():
+    try:
+        process_pending_jobs()
+    finally:
+        connection.close()  # ✅ Pool threads hold their own DB connection
+
+
+def claim_next_job(worker=None):
+    """Atomically moves the oldest queued job to "running" and returns it (None if the queue is empty)."""
+    while True:
+        job_id = (IngestionJob.objects.filter(status="queued")
+                  .order_by("created_at", "id").values_list("id", flat=True).first())
+        if job_id is None:
+            return None
+        # ✅ Conditional UPDATE: only one worker wins the row, the others retry with the next one
+        claimed = IngestionJob.objects.filter(id=job_id, status="queued").update(
+            status="running", phase="starting", started_at=now(), worker=worker or _worker_name())
+        if claimed:
+            return IngestionJob.objects.get(id=job_id)
+
+
+def complete_duplicate(job, existing):
+    """Finishes `job` with a new TrendChart that shares `existing`'s files; the job's own upload is dropped."""
+    if job.source_file.name != existing.csv_file.name and os.path.exists(job.source_file.path):
+        os.remove(job.source_file.path)
+
+    series = existing.load_series()
+    with transaction.atomic():
+        trend_chart = TrendChart.objects.create(
+            pid_loop_id=job.pid_loop_id,
+            description=job.description,
+            csv_file=existing.csv_file.name,
+            data_file=existing.data_file.name,
+            content_hash=existing.content_hash,
+            ingest_key=existing.ingest_key,
+        )
+        IngestionJob.objects.filter(id=job.id).update(
+            status="done",
+            phase="deduplicated",
+            rows_processed=len(series),
+            rows_written=len(series),
+            preview=[{key: str(value) for key, value in row.items()}
+                     for row in series.to_frame().head(20).to_dict(orient="records")],
+            source_file=existing.csv_file.name,
+            trend_chart=trend_chart,
+            started_at=job.started_at or now(),
+            finished_at=now(),
+        )
+
+    logger.info("Ingestion job %s: identical to chart %s, reused its data -> chart %s", job.id, existing.id, trend_chart.id)
+    return trend_chart
+
+
+def run_ingestion_job(job):
+    """Ingests a claimed job's file and creates its TrendChart(s); any failure is recorded on the job."""
+    data_paths = []
+    try:
+        return _run_job(job, data_paths)
+    except Exception as e:
+        return _fail_job(job, e, data_paths)
+
+
+def _single_profile(job):
+    """The single-loop import profile matching the job's upload and delimiter, or None."""
+    if job.mode == "wide":
+        return None
+    profile = ImportProfile.match(job.source_file.path, job.delimiter)
+    return profile if profile is not None and profile.layout() is not None else None
+
+
+def _expected_key(job, profile):
+    """
+    The `ingest_key` the job's upload will be ingested with: known up front only for a profile's fixed
+    layout (a first upload is detected, and learns the profile that later identical uploads match).
+    """
+    return ingest_key(job.content_hash, job.user_timezone, job.delimiter, profile and profile.layout())
+
+
+def _run_job(job, data_paths):
+    """Runs the job; every data file it starts writing is added to `data_paths` so a failure can remove it."""
+    if job.mode == "wide":
+        return _run_wide_job(job, data_paths)
+
+    # ✅ Known header → fixed-format fast path (no column detection, no time format inference)
+    profile = _single_profile(job)
+
+    # ✅ An identical upload, read the same way, may have finished while this job was queued
+    existing = TrendChart.find_processed(_expected_key(job, profile))
+    if existing is not None:
+        return complete_duplicate(job, existing)
+
+    source_path = job.source_file.path
+    data_name = f"{os.path.splitext(os.path.basename(job.source_file.name))[0]}.trend"
+    data_path = os.path.join(settings.MEDIA_ROOT, "trend_charts", data_name)
+    data_paths.append(data_path)
+
+    def ingest(profile):
+        if profile is None:
+            return ingest_trend_file(source_path, data_path, delimiter=job.delimiter,
+                                     user_timezone=job.user_timezone, progress=_job_progress(job))
+        pv_col, cv_col = profile.column_map[""]
+        return ingest_trend_file(source_path, data_path, user_timezone=job.user_timezone, progress=_job_progress(job),
+                                 columns=(profile.time_column, pv_col, cv_col), **profile.ingest_options())
+
+    profile, stats = _ingest_with_profile(job, profile, ingest)
+    layout = stats_layout(stats, profile.header_row, profile.decimal) if profile else stats_layout(stats)
+    profile = _learn_or_use_profile(job, profile, stats)
+
+    # ✅ The chart only appears once its data file is complete
+    with transaction.atomic():
+        trend_chart = TrendChart.objects.create(
+            pid_loop_id=job.pid_loop_id,
+            description=job.description,
+            csv_file=job.source_file.name,
+            data_file=os.path.join("trend_charts", data_name),
+            content_hash=job.content_hash,
+            ingest_key=ingest_key(job.content_hash, job.user_timezone, job.delimiter, layout),
+        )
+        IngestionJob.objects.filter(id=job.id).update(
+            status="done",
+            phase="done",
+            rows_processed=stats["rows_read"],
+            rows_written=stats["rows_written"],
+            preview=[{key: str(value) for key, value in row.items()} for row in stats["preview"]],
+            trend_chart=trend_chart,
+            import_profile=profile,
+            finished_at=now(),
+        )
+
+    logger.info("Ingestion job %s: %s/%s rows -> chart %s", job.id, stats["rows_written"], stats["rows_read"],
+                trend_chart.id)
+    return trend_chart
+
+
+def _job_progress(job):
+    def progress(phase, stats):
+        IngestionJob.objects.filter(id=job.id).update(
+            phase=phase, rows_processed=stats["rows_read"], rows_written=stats["rows_written"])
+    return progress
+
+
+def _fail_job(job, error, data_paths=()):
+    logger.error("Ingestion job %s failed: %s", job.id, error)
+    IngestionJob.objects.filter(id=job.id).update(
+        status="failed", phase="failed", error=str(error), finished_at=now())
+    # ✅ No chart references the upload or its data files, so none of them is kept
+    for path in [job.source_file.path, *data_paths, *map(pyramid_path_for, data_paths)]:
+        if os.path.exists(path):
+            os.remove(path)
+    return None
+
+
+def normalize_tag(name):
+    """Tag/loop name key that ignores case and separators ("FIC-101" == "fic101")."""
+    return re.sub(r"[^A-Z0-9]", "", str(name).upper())
+
+
+def _run_wide_job(job, data_paths):
+    """
+    Splits a wide export into one TrendChart per PV/CV pair whose tag prefix matches a PIDLoop name.
+    The file is read once; the charts are created together in one transaction and share the raw file.
+    """
+    source_path = job.source_file.path
+    loops = {}
+    for loop in PIDLoop.objects.order_by("id"):
+        loops.setdefault(normalize_tag(loop.name), loop)
+
+    profile = ImportProfile.match(source_path, job.delimiter)
+    if profile is not None and not profile.is_wide:
+        profile = None
+
+    report = []
+    try:
+        profile, (matched, data_names, stats) = _ingest_with_profile(
+            job, profile, lambda candidate: _split_wide_file(job, candidate, loops, report, data_paths))
+    except Exception:
+        IngestionJob.objects.filter(id=job.id).update(report=report)  # ✅ Keep the per-tag outcome
+        raise
+
+    profile = _learn_or_use_profile(job, profile, stats)
+
+    # ✅ All charts of the file appear together once every data file is complete
+    with transaction.atomic():
+        charts = TrendChart.objects.bulk_create([
+            TrendChart(
+                pid_loop=loops[normalize_tag(tag)],
+                description=f"{job.description or job.original_name} [{tag}]",
+                csv_file=job.source_file.name,
+                data_file=os.path.join("trend_charts", data_names[tag]),
+            )
+            for tag in matched
+        ])
+        chart_ids = dict(zip(matched, [chart.id for chart in charts]))
+        for entry in report:
+            entry["trend_chart_id"] = chart_ids.get(entry["tag"])
+        IngestionJob.objects.filter(id=job.id).update(
+            status="done",
+            phase="done",
+            rows_processed=stats["rows_read"],
+            rows_written=stats["rows_written"],
+            preview=[{key: str(value) for key, value in row.items()} for row in stats["preview"]],
+            report=report,
+            trend_chart=charts[0],
+            import_profile=profile,
+            finished_at=now(),
+        )
+
+    logger.info("Ingestion job %s: %s rows split into %s chart(s)", job.id, stats["rows_read"], len(charts))
+    return charts[0]
+
+
+def _split_wide_file(job, profile, loops, report, data_paths):
+    """Pairs (from `profile`, or detected), matches tags to loops, fills `report` and ingests the file."""
+    source_path = job.source_file.path
+    base = os.path.splitext(os.path.basename(job.source_file.name))[0]
+
+    if profile is not None:
+        time_col, pairs, unpaired = profile.time_column, dict(profile.column_map), []
+        options = {**profile.ingest_options(), "user_timezone": job.user_timezone}
+    else:
+        time_col, pairs, unpaired = detect_tag_pairs(read_header(source_path, job.delimiter))
+        options = {"delimiter": job.delimiter, "user_timezone": job.user_timezone}
+
+    report.clear()
+    matched, data_names = {}, {}
+    for tag, (pv_col, cv_col) in pairs.items():
+        loop = loops.get(normalize_tag(tag))
+        report.append({"tag": tag, "pv": pv_col, "cv": cv_col, "pid_loop": loop.name if loop else None,
+                       "trend_chart_id": None, "error": None if loop else "No PID loop with this tag name."})
+        if loop:
+            matched[tag] = (pv_col, cv_col)
+            slug = re.sub(r"[^A-Za-z0-9]+", "_", tag).strip("_") or "loop"
+            data_names[tag] = f"{base}_{len(data_names)}_{slug}.trend"
+    report += [{"tag": col, "pv": None, "cv": None, "pid_loop": None, "trend_chart_id": None,
+                "error": "No matching PV/CV partner column."} for col in unpaired]
+
+    if not matched:
+        raise ValueError("No PV/CV pair matches a PID loop name.")
+
+    # ✅ Every pair of the file is ingested (and learned), only the matched ones become charts
+    dest_paths = {tag: os.path.join(settings.MEDIA_ROOT, "trend_charts", name) for tag, name in data_names.items()}
+    data_paths.extend(dest_paths.values())
+    stats = ingest_trend_columns(source_path, time_col, matched, dest_paths, progress=_job_progress(job), **options)
+    stats["columns"]["pairs"] = {tag: list(pair) for tag, pair in pairs.items()}
+    return matched, data_names, stats
+
+
+def _ingest_with_profile(job, profile, ingest):
+    """
+    Runs `ingest(profile)` with the profile's fixed layout; if the file no longer fits it
+    (e.g. a renamed column), retries once with full detection. Returns (profile used or None, result).
+    """
+    if profile is not None:
+        try:
+            return profile, ingest(profile)
+        except Exception as e:
+            logger.warning("Import profile %r did not fit job %s (%s); detecting instead", profile.name, job.id, e)
+    return None, ingest(None)
+
+
+def _learn_or_use_profile(job, profile, stats):
+    """Counts a profile hit, or learns a new profile from a detected upload."""
+    if profile is not None:
+        profile.mark_used()
+        return profile
+    return ImportProfile.learn(job.source_file.path, f"Auto: {job.original_name}", job.delimiter, stats,
+                               job.user_timezone)
+
+
+def process_pending_jobs(worker=None, max_jobs=None):
+    """Claims and runs queued jobs until the queue is empty (or `max_jobs` ran). Returns the count."""
+    processed = 0
+    while max_jobs is None or processed < max_jobs:
+        job = claim_next_job(worker)
+        if job is None:
+            break
+        run_ingestion_job(job)
+        processed += 1
+    return processed
+
+
+def requeue_interrupted_jobs(older_than):
+    """
+    Puts jobs that have been "running" for longer than `older_than` (a timedelta) back in the queue
+    and returns the count. Jobs are assumed to be left by a crashed worker: a live worker that is still
+    ingesting one of them would race the next claimer, so only call this when no other worker is running.
+    """
+    return IngestionJob.objects.filter(status="running", started_at__lt=now() - older_than).update(
+        status="queued", phase="queued", started_at=None, worker=None, rows_processed=0, rows_written=0)
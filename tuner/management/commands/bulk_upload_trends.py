@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from tuner.bulk import bulk_ingest_archive
+
+
+class Command(BaseCommand):
+    help = "Bulk-ingests a zip/tar of trend exports described by its manifest.csv."
+
+    def add_arguments(self, parser):
+        parser.add_argument("archive", help="Path to the .zip or .tar(.gz) archive.")
+        parser.add_argument("--timezone", default="UTC", help="Timezone for files without a manifest timezone.")
+        parser.add_argument("--workers", type=int, default=None, help="Parser processes (default: CPU count).")
+
+    def handle(self, *args, **options):
+        try:
+            reports = bulk_ingest_archive(options["archive"], user_timezone=options["timezone"],
+                                          workers=options["workers"])
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        for report in reports:
+            if report["trend_chart_id"]:
+                self.stdout.write(f"✅ {report['file']}: {report['rows_written']} rows in "
+                                  f"{report['parse_seconds']}s → chart {report['trend_chart_id']}"
+                                  f"{' (identical upload, data reused)' if report.get('deduplicated') else ''}")
+            else:
+                self.stderr.write(f"❌ {report['file']}: {report['error']}")
+
+        created = sum(1 for report in reports if report["trend_chart_id"])
+        self.stdout.write(self.style.SUCCESS(f"Created {created} chart(s), {len(reports) - created} failed."))
@@ -0,0 +1,43 @@
+import os
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from tuner.ingest import ingest_trend_file
+from tuner.models import TrendChart
+
+
+class Command(BaseCommand):
+    help = "One-time conversion of CSV-backed TrendCharts to the columnar binary data format."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Re-convert charts that already have a data file.")
+
+    def handle(self, *args, **options):
+        charts = TrendChart.objects.exclude(csv_file="").exclude(csv_file__isnull=True)
+        if not options["force"]:
+            charts = charts.filter(Q(data_file__isnull=True) | Q(data_file=""))
+
+        converted, failed = 0, 0
+        for chart in charts:
+            csv_path = chart.csv_file.path
+            if not os.path.exists(csv_path):
+                self.stderr.write(f"❌ Chart {chart.id}: missing file {csv_path}")
+                failed += 1
+                continue
+
+            # ✅ Stored CSVs are already cleaned and in UTC; the original file is kept for download
+            data_name = f"{os.path.splitext(os.path.basename(chart.csv_file.name))[0]}.trend"
+            data_path = os.path.join(settings.MEDIA_ROOT, "trend_charts", data_name)
+            try:
+                stats = ingest_trend_file(csv_path, data_path, delimiter=",", user_timezone="UTC")
+            except Exception as e:
+                self.stderr.write(f"❌ Chart {chart.id}: {e}")
+                failed += 1
+                continue
+
+            chart.data_file = os.path.join("trend_charts", data_name)
+            chart.save(update_fields=["data_file"])
+            converted += 1
+            self.stdout.write(f"✅ Chart {chart.id}: {stats['rows_written']} rows → {data_name}")
+
+        self.stdout.write(self.style.SUCCESS(f"Converted {converted} chart(s), {failed} failed."))
@@ -0,0 +1,25 @@
+import time
+from django.core.management.base import BaseCommand
+from tuner.models import TrendChart
+
+
+class Command(BaseCommand):
+    help = "Fits FOPDT / integrating process models to bump tests, one batch per trend chart."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chart", type=int, action="append", help="Trend chart id (repeatable; default: all).")
+
+    def handle(self, *args, **options):
+        charts = TrendChart.objects.filter(bumptest__isnull=False).select_related("pid_loop").distinct()
+        if options["chart"]:
+            charts = charts.filter(id__in=options["chart"])
+
+        total = 0
+        for chart in charts.order_by("id"):
+            started = time.perf_counter()
+            fitted = chart.fit_bump_tests()
+            total += fitted
+            self.stdout.write(f"✅ Chart {chart.id} ({chart.pid_loop.name}, {chart.pid_loop.pid_type}): "
+                              f"{fitted} bump test(s) fitted in {time.perf_counter() - started:.2f}s")
+
+        self.stdout.write(self.style.SUCCESS(f"Fitted {total} bump test(s)."))
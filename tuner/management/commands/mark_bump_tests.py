@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from tuner.models import TrendChart
+
+
+class Command(BaseCommand):
+    help = "Pre-marks T1–T4/TCV of bump tests from their trend data, one batch per trend chart."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chart", type=int, action="append", help="Trend chart id (repeatable; default: all).")
+        parser.add_argument("--overwrite", action="store_true", help="Replace markers that are already set.")
+
+    def handle(self, *args, **options):
+        charts = TrendChart.objects.filter(bumptest__isnull=False).select_related("pid_loop").distinct()
+        if options["chart"]:
+            charts = charts.filter(id__in=options["chart"])
+
+        total = 0
+        for chart in charts.order_by("id"):
+            updated = chart.mark_bump_tests(overwrite=options["overwrite"])
+            total += updated
+            self.stdout.write(f"✅ Chart {chart.id} ({chart.pid_loop.name}, {chart.pid_loop.pid_type}): "
+                              f"{updated} bump test(s) marked")
+
+        self.stdout.write(self.style.SUCCESS(f"Marked {total} bump test(s)."))
@@ -0,0 +1,117 @@
+import fnmatch
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Prefetch
+from tuner.models import PIDLoop, PIDCalculation, BumpTest, TUNING_FIELDS, CALCULATION_FIELDS, update_rows
+from tuner.tuning import tune_chunk
+
+TUNING_LABELS = (("proportional_gain", "Kp"), ("integral_time", "Ti"), ("derivative_time", "Td"))
+
+
+class Command(BaseCommand):
+    help = ("Recalculates the tuning of every PIDCalculation (or a subset), in chunks: the main process reads "
+            "and writes each chunk in bulk, worker processes compute the tunings of the bumps whose inputs "
+            "changed.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--type", action="append", choices=[c for c, _ in PIDLoop.PID_TYPE_CHOICES],
+                            help="Only loops of this PID type (repeatable).")
+        parser.add_argument("--name", help="Only loops whose name matches this shell pattern, e.g. 'FIC-1*'.")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Tuning processes.")
+        parser.add_argument("--chunk-size", type=int, default=200, help="Loops read, tuned and written per batch.")
+        parser.add_argument("--threshold", type=float, default=0.1,
+                            help="Report loops whose Kp/Ti/Td moved by more than this fraction (default 0.1).")
+        parser.add_argument("--show", type=int, default=50, help="Moved loops listed in the summary.")
+        parser.add_argument("--dry-run", action="store_true", help="Compute and report without saving.")
+        parser.add_argument("--full", action="store_true",
+                            help="Retune every bump, not only those whose inputs changed since their last tuning.")
+
+    def handle(self, *args, **options):
+        calculations = PIDCalculation.objects.all()
+        if options["type"]:
+            calculations = calculations.filter(pid_loop__pid_type__in=options["type"])
+        if options["name"]:
+            calculations = calculations.filter(pid_loop__name__iregex=fnmatch.translate(options["name"]))
+        ids = list(calculations.order_by("id").values_list("id", flat=True))
+        chunk_size = max(1, options["chunk_size"])
+        workers = max(1, min(options["workers"], -(-len(ids) // chunk_size) or 1))
+
+        self.total, self.done, self.started = len(ids), 0, time.perf_counter()
+        self.moved, self.bumps = [], 0
+        self.stdout.write(f"🔧 Retuning {self.total} loop(s) in chunks of {chunk_size} with {workers} worker(s)"
+                          f"{' (dry run)' if options['dry_run'] else ''}")
+
+        # ✅ Keep at most `workers` chunks in flight: reading chunk k + 1 overlaps tuning chunk k
+        pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        pending = deque()
+        try:
+            for offset in range(0, len(ids), chunk_size):
+                chunk = [(calculation, bumps, *calculation.dirty_bumps(bumps, options["full"]))
+                         for calculation, bumps in self.load_chunk(ids[offset:offset + chunk_size])]
+                inputs = [calculation.tuning_inputs(dirty) for calculation, _bumps, dirty, _prints in chunk]
+                pending.append((chunk, pool.submit(tune_chunk, inputs) if pool else tune_chunk(inputs)))
+                while len(pending) >= workers:
+                    self.write_chunk(*pending.popleft(), options)
+            while pending:
+                self.write_chunk(*pending.popleft(), options)
+        finally:
+            if pool:
+                pool.shutdown()
+
+        self.report(options)
+
+    def load_chunk(self, ids):
+        """Calculations with their loop and assigned bumps of that loop: three queries per chunk."""
+        bumps = BumpTest.objects.annotate(chart_loop_id=F("trend_chart__pid_loop_id")).order_by("id")
+        calculations = (PIDCalculation.objects.filter(id__in=ids).select_related("pid_loop").order_by("id")
+                        .prefetch_related(Prefetch("bump_tests", queryset=bumps)))
+        return [(c, [b for b in c.bump_tests.all() if b.chart_loop_id == c.pid_loop_id]) for c in calculations]
+
+    def write_chunk(self, chunk, results, options):
+        results = results.result() if isinstance(results, Future) else results
+        updated, refreshed = [], []
+        for (calculation, bumps, dirty, prints), tuning in zip(chunk, results):
+            before = {field: getattr(calculation, field) for field, _label in TUNING_LABELS}
+            updated += calculation.apply_tuning(dirty, prints, tuning)
+            if calculation.refresh_aggregate(bumps):
+                refreshed.append(calculation)
+            changes = {
+                label: (before[field], getattr(calculation, field))
+                for field, label in TUNING_LABELS
+                if abs(getattr(calculation, field) - before[field]) > options["threshold"] * max(abs(before[field]), 1e-9)
+            }
+            if changes:
+                self.moved.append((calculation.pid_loop.name, changes))
+
+        if not options["dry_run"]:
+            with transaction.atomic():
+                update_rows(BumpTest, updated, TUNING_FIELDS)
+                update_rows(PIDCalculation, refreshed, CALCULATION_FIELDS)
+
+        self.bumps += len(updated)
+        self.done += len(chunk)
+        elapsed = time.perf_counter() - self.started
+        rate = self.done / elapsed if elapsed else 0.0
+        eta = (self.total - self.done) / rate if rate else 0.0
+        self.stdout.write(f"⏳ {self.done}/{self.total} loop(s), {rate:.0f} loops/s, ETA {eta:.0f}s")
+
+    def report(self, options):
+        elapsed = time.perf_counter() - self.started
+        self.stdout.write(f"📊 {len(self.moved)} loop(s) moved more than {options['threshold']:.0%}:")
+
+        def largest_move(entry):
+            return max(abs(new - old) / max(abs(old), 1e-9) for old, new in entry[1].values())
+
+        for name, changes in sorted(self.moved, key=largest_move, reverse=True)[:options["show"]]:
+            moves = ", ".join(f"{label} {old:g} → {new:g}" for label, (old, new) in changes.items())
+            self.stdout.write(f"  {name}: {moves}")
+        if len(self.moved) > options["show"]:
+            self.stdout.write(f"  ... and {len(self.moved) - options['show']} more")
+
+        verb = "Computed" if options["dry_run"] else "Retuned"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {self.done} loop(s) and {self.bumps} bump test(s) "
+                                             f"in {elapsed:.1f}s."))
@@ -0,0 +1,41 @@
+import time
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from django.db import connection
+from tuner.jobs import process_pending_jobs, requeue_interrupted_jobs
+
+
+class Command(BaseCommand):
+    help = "Runs trend ingestion jobs from the database-backed queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=2, help="Jobs processed in parallel.")
+        parser.add_argument("--poll", type=float, default=2.0, help="Seconds between polls of an empty queue.")
+        parser.add_argument("--once", action="store_true", help="Drain the queue once and exit.")
+        parser.add_argument("--requeue", action="store_true",
+                            help="Re-queue jobs left running by a crashed worker before starting. Only safe when no "
+                                 "other worker is running: a job it is still ingesting would be processed twice.")
+        parser.add_argument("--stale-after", type=float, default=60.0,
+                            help="With --requeue, minutes a job must have been running to count as interrupted.")
+
+    def handle(self, *args, **options):
+        if options["requeue"]:
+            count = requeue_interrupted_jobs(timedelta(minutes=options["stale_after"]))
+            self.stdout.write(f"🔁 Re-queued {count} interrupted job(s).")
+
+        def drain():
+            try:
+                return process_pending_jobs()
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=options["workers"], thread_name_prefix="ingest") as pool:
+            while True:
+                processed = sum(f.result() for f in [pool.submit(drain) for _ in range(options["workers"])])
+                if processed:
+                    self.stdout.write(f"✅ Processed {processed} job(s).")
+                if options["once"]:
+                    break
+                if not processed:
+                    time.sleep(options["poll"])
@@ -0,0 +1,131 @@
+import numpy as np
+from .trend_store import TrendSeries
+
+
+# ✅ Marker thresholds, as fractions of the bump's own ΔCV / ΔPV
+ONSET_FRACTION = 0.05       # CV step has begun once the CV moved 5% of ΔCV
+DEPARTURE_FRACTION = 0.02   # PV has left its baseline once it moved 2% of ΔPV
+RAMP_DEPARTURE_FRACTION = 0.001  # ...or slope 1 once it moved 0.1% of the final deviation (ramps keep growing)
+SETTLE_FRACTION = 0.05      # PV has settled once it stays within 5% of ΔPV of its final value
+NOISE_SIGMAS = 3.0          # ...and never inside the baseline noise band
+FINAL_FRACTION = 0.1        # Last 10% of the window gives the final PV
+SLOPE_FRACTION = 1 / 3      # Last third of the response gives slope 2
+
+MARKER_FIELDS = ("T1", "T2", "T3", "T4", "TCV")
+
+
+def _first(mask):
+    """Index of the first True in `mask`, or None."""
+    if not len(mask):
+        return None
+    i = int(np.argmax(mask))
+    return i if mask[i] else None
+
+
+def _stays_after(outside):
+    """First index after which `outside` is False for good, or None if the last sample is still outside."""
+    idx = np.flatnonzero(outside)
+    if not len(idx):
+        return 0
+    return int(idx[-1]) + 1 if idx[-1] + 1 < len(outside) else None
+
+
+def _line(x, y):
+    """Least-squares slope and intercept of y over x (NaNs ignored); a flat line for too few points."""
+    ok = np.isfinite(y)
+    x, y = x[ok], y[ok]
+    if len(x) < 2 or np.ptp(x) == 0:
+        return 0.0, float(y.mean()) if len(y) else 0.0
+    xm, ym = x.mean(), y.mean()
+    slope = float(((x - xm) * (y - ym)).sum() / ((x - xm) ** 2).sum())
+    return slope, float(ym - slope * xm)
+
+
+def _noise(values):
+    values = values[np.isfinite(values)]
+    return float(values.std()) if len(values) > 1 else 0.0
+
+
+def compute_markers(window, pid_type="1st Order"):
+    """
+    Computes T1–T4 and TCV (UTC epoch ns, None where undefined) from a bump window's TrendSeries.
+    1st Order: T1 step start, T2 dead-time end (PV leaves its baseline), T3 63.2% crossing,
+    T4 settled within 5% of ΔPV. Integrating (with or without lag): T1 slope 1 start, T2 slope 1
+    changed (PV leaves the pre-step trend line), T3 slope 2 start (PV joins the final trend line),
+    T4 slope 2 end. TCV is when the CV reaches its final value, as `update_t1_t2` computes it.
+    """
+    markers = dict.fromkeys(MARKER_FIELDS)
+    n = len(window)
+    if n < 3:
+        return markers
+
+    time = np.asarray(window.time, dtype=np.int64)
+    pv = np.asarray(window.pv, dtype=np.float64)
+    cv = np.asarray(window.cv, dtype=np.float64)
+
+    # ✅ CV step onset: first sample that moved part of the way to the final CV
+    delta_cv = cv[-1] - cv[0]
+    onset = _first(np.abs(cv - cv[0]) > ONSET_FRACTION * abs(delta_cv)) if delta_cv else None
+    onset = onset or 1
+    if delta_cv:
+        markers["TCV"] = window.final_value_time("cv")
+
+    if pid_type == "1st Order":
+        markers.update(_first_order_markers(time, pv, cv, onset))
+    else:
+        markers.update(_integrating_markers(time, pv, cv, onset))
+    return markers
+
+
+def _first_order_markers(time, pv, cv, onset):
+    n = len(time)
+    baseline = pv[:onset]
+    base = float(np.nanmean(baseline)) if np.isfinite(baseline).any() else float(pv[onset])
+    final = float(np.nanmean(pv[-max(1, int(n * FINAL_FRACTION)):]))
+    delta_pv = final - base
+    markers = {"T1": int(time[onset - 1])}
+    if not np.isfinite(delta_pv) or delta_pv == 0:
+        return markers
+
+    noise = _noise(baseline)
+    departed = _first((pv[onset:] - base) * np.sign(delta_pv) > max(NOISE_SIGMAS * noise,
+                                                                      DEPARTURE_FRACTION * abs(delta_pv)))
+    if departed is None:
+        return markers
+    i2 = onset + departed
+    markers["T2"] = int(time[i2])
+
+    response = TrendSeries(time[i2:], pv[i2:], cv[i2:])
+    markers["T3"] = response.crossing_time("pv", base + 0.632 * delta_pv)
+
+    settled = _stays_after(np.abs(pv[i2:] - final) > max(SETTLE_FRACTION * abs(delta_pv), NOISE_SIGMAS * noise))
+    markers["T4"] = int(time[i2 + settled]) if settled is not None else None
+    return markers
+
+
+def _integrating_markers(time, pv, cv, onset):
+    seconds = (time - time[0]) / 1e9
+    slope1, intercept1 = _line(seconds[:onset], pv[:onset])
+    deviation = pv - (slope1 * seconds + intercept1)
+    total = float(deviation[-1]) if np.isfinite(deviation[-1]) else 0.0
+    markers = {"T1": int(time[0])}
+    if total == 0:
+        return markers
+
+    noise = _noise(deviation[:onset])
+    departed = _first(deviation[onset:] * np.sign(total) > max(NOISE_SIGMAS * noise,
+                                                               RAMP_DEPARTURE_FRACTION * abs(total)))
+    if departed is None:
+        return markers
+    i2 = onset + departed
+    markers["T2"] = int(time[i2])
+    markers["T4"] = int(time[-1])
+
+    # ✅ Slope 2 from the tail of the response; T3 is where the PV joins that line for good
+    tail = max(3, int((len(time) - i2) * SLOPE_FRACTION))
+    slope2, intercept2 = _line(seconds[-tail:], pv[-tail:])
+    residual = pv[i2:] - (slope2 * seconds[i2:] + intercept2)
+    band = max(NOISE_SIGMAS * max(noise, _noise(residual[-tail:])), RAMP_DEPARTURE_FRACTION * abs(total))
+    joined = _stays_after(np.abs(residual) > band)
+    markers["T3"] = int(time[i2 + joined]) if joined is not None else None
+    return markers
@@ -0,0 +1,123 @@
+# Generated by Django 5.1.6 on 2026-10-18 00:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tuner', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bumptest',
+            name='dominance',
+            field=models.CharField(choices=[('General', 'General'), ('Lag Time Dominant', 'Lag Time Dominant'), ('Dead Time Dominant', 'Dead Time Dominant')], default='General', help_text='Defines whether the bump test is General, Lag Time Dominant, or Dead Time Dominant.', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='bumptest',
+            name='max_lambda',
+            field=models.FloatField(default=100.0, help_text='Maximum Lambda value for tuning.'),
+        ),
+        migrations.AddField(
+            model_name='bumptest',
+            name='min_lambda',
+            field=models.FloatField(default=1.0, help_text='Minimum Lambda value for tuning.'),
+        ),
+        migrations.AddField(
+            model_name='trendchart',
+            name='data_file',
+            field=models.FileField(blank=True, help_text='Cleaned Time/PV/CV series in columnar binary format', null=True, upload_to='trend_charts/'),
+        ),
+        migrations.AlterField(
+            model_name='bumptest',
+            name='Td',
+            field=models.FloatField(blank=True, default=0.0, help_text='Deadtime in seconds', null=True),
+        ),
+        migrations.AlterField(
+            model_name='bumptest',
+            name='d',
+            field=models.FloatField(blank=True, default=0.0, null=True),
+        ),
+        migrations.AlterField(
+            model_name='bumptest',
+            name='d_cohen',
+            field=models.FloatField(blank=True, default=0.0, null=True),
+        ),
+        migrations.AlterField(
+            model_name='bumptest',
+            name='delta_cv',
+            field=models.FloatField(blank=True, default=0.0, help_text='Change in Process Variable (ΔPV)', null=True),
+        ),
+        migrations.AlterField(
+            model_name='bumptest',
+            name='delta_pv',
+            field=models.FloatField(blank=True, default=0.0, help_text='Change in Process Variable (ΔPV)', null=True),
+        ),
+        migrations.AlterField(
+            model_name='bumptest',
+            name='i',
+            field=models.FloatField(blank=True, default=10.0, null=True),
+        ),
+        migrations.AlterField(
+            model_name='bumptest',
+            name='i_cohen',
+            field=models.FloatField(blank=True, default=10.0, null=True),
+        ),
+        migrations.AlterField(
+            model_name='bumptest',
+            name='kc',
+            field=models.FloatField(blank=True, default=0.0, null=True),
+        ),
+        migrations.AlterField(
+            model_name='bumptest',
+            name='kc_cohen',
+            field=models.FloatField(blank=True, default=0.0, null=True),
+        ),
+        migrations.AlterField(
+            model_name='bumptest',
+            name='p',
+            field=models.FloatField(blank=True, default=0.5, null=True),
+        ),
+        migrations.AlterField(
+            model_name='bumptest',
+            name='p_cohen',
+            field=models.FloatField(blank=True, default=0.0, null=True),
+        ),
+        migrations.AlterField(
+            model_name='bumptest',
+            name='tau',
+            field=models.FloatField(blank=True, default=10.0, help_text='Time Constant in seconds', null=True),
+        ),
+        migrations.AlterField(
+            model_name='pidcalculation',
+            name='derivative_time',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AlterField(
+            model_name='pidcalculation',
+            name='integral_time',
+            field=models.FloatField(default=1.0),
+        ),
+        migrations.AlterField(
+            model_name='pidcalculation',
+            name='proportional_gain',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AlterField(
+            model_name='pidloop',
+            name='derivative_time',
+            field=models.FloatField(blank=True, default=0.0, null=True),
+        ),
+        migrations.AlterField(
+            model_name='pidloop',
+            name='integral_time',
+            field=models.FloatField(blank=True, default=10.0, null=True),
+        ),
+        migrations.AlterField(
+            model_name='pidloop',
+            name='proportional_gain',
+            field=models.FloatField(blank=True, default=0.5, null=True),
+        ),
+    ]
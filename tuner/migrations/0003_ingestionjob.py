@@ -0,0 +1,38 @@
+# Generated by Django 5.1.6 on 2026-10-18 00:41
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tuner', '0002_trendchart_data_file'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('description', models.TextField(blank=True, null=True)),
+                ('source_file', models.FileField(upload_to='trend_charts/')),
+                ('original_name', models.CharField(max_length=255)),
+                ('delimiter', models.CharField(default=',', max_length=4)),
+                ('user_timezone', models.CharField(default='UTC', max_length=64)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='queued', max_length=10)),
+                ('phase', models.CharField(default='queued', max_length=20)),
+                ('rows_processed', models.BigIntegerField(default=0)),
+                ('rows_written', models.BigIntegerField(default=0)),
+                ('preview', models.JSONField(blank=True, default=list)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('worker', models.CharField(blank=True, max_length=100, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('pid_loop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tuner.pidloop')),
+                ('trend_chart', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='tuner.trendchart')),
+            ],
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.6 on 2026-10-18 00:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tuner', '0004_trend_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingestionjob',
+            name='mode',
+            field=models.CharField(choices=[('single', 'Single loop'), ('wide', 'Wide multi-loop file')], default='single', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='ingestionjob',
+            name='report',
+            field=models.JSONField(blank=True, default=list, help_text='Per-tag outcome of wide uploads'),
+        ),
+        migrations.AlterField(
+            model_name='ingestionjob',
+            name='pid_loop',
+            field=models.ForeignKey(blank=True, help_text='Target loop for single-loop uploads', null=True, on_delete=django.db.models.deletion.CASCADE, to='tuner.pidloop'),
+        ),
+    ]
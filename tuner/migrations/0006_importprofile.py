@@ -0,0 +1,39 @@
+# Generated by Django 5.1.6 on 2026-10-18 00:48
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tuner', '0005_ingestionjob_wide_mode'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('header_signature', models.CharField(max_length=40, unique=True)),
+                ('delimiter', models.CharField(default=',', max_length=4)),
+                ('header_row', models.PositiveIntegerField(default=0, help_text='Lines before the header line')),
+                ('time_format', models.CharField(blank=True, help_text='strptime format or ISO8601; blank infers it per upload', max_length=64, null=True)),
+                ('time_column', models.CharField(max_length=255)),
+                ('column_map', models.JSONField(default=dict, help_text='{"tag": ["PV column", "CV column"]}; tag "" for single-loop files')),
+                ('source_timezone', models.CharField(default='UTC', max_length=64)),
+                ('decimal', models.CharField(choices=[('.', 'Point (1.5)'), (',', 'Comma (1,5)')], default='.', max_length=1)),
+                ('auto_learned', models.BooleanField(default=True)),
+                ('use_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_used_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='ingestionjob',
+            name='import_profile',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='tuner.importprofile'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.6 on 2026-10-18 00:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tuner', '0006_importprofile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bumptest',
+            name='fit_confidence',
+            field=models.FloatField(blank=True, help_text='0–1: R² of the fit, halved at grid edges', null=True),
+        ),
+        migrations.AddField(
+            model_name='bumptest',
+            name='fit_deadtime',
+            field=models.FloatField(blank=True, help_text='Fitted deadtime in seconds', null=True),
+        ),
+        migrations.AddField(
+            model_name='bumptest',
+            name='fit_gain',
+            field=models.FloatField(blank=True, help_text='Normalized gain: %PV per %CV (per second for integrating models)', null=True),
+        ),
+        migrations.AddField(
+            model_name='bumptest',
+            name='fit_model',
+            field=models.CharField(blank=True, choices=[('FOPDT', 'First order plus deadtime'), ('IPDT', 'Integrator plus deadtime'), ('IPDT with Lag', 'Integrator plus deadtime with lag')], max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name='bumptest',
+            name='fit_residual',
+            field=models.FloatField(blank=True, help_text='RMS fit residual in PV units', null=True),
+        ),
+        migrations.AddField(
+            model_name='bumptest',
+            name='fit_tau',
+            field=models.FloatField(blank=True, help_text='Fitted lag time constant in seconds', null=True),
+        ),
+        migrations.AddField(
+            model_name='bumptest',
+            name='fitted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 01:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tuner', '0007_bumptest_model_fit'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bumptest',
+            name='tuning_fingerprint',
+            field=models.CharField(blank=True, editable=False, help_text='Hash of the inputs of the stored tuning; None when not tuned', max_length=40, null=True),
+        ),
+    ]
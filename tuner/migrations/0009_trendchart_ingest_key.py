@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-18 01:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tuner', '0008_bumptest_tuning_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trendchart',
+            name='ingest_key',
+            field=models.CharField(blank=True, db_index=True, help_text='Hash of the file, timezone, delimiter and layout it was ingested with; uploads with the same key share files', max_length=64, null=True),
+        ),
+        migrations.AlterField(
+            model_name='trendchart',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, help_text='SHA-256 of the uploaded file', max_length=64, null=True),
+        ),
+    ]
@@ -1,9 +1,26 @@
+import logging
+import os
+import numpy as np
 import pandas as pd
 from datetime import datetime
-from django.db import models
+from django.db import models, transaction, connections, router
 from django.utils.timezone import now, localtime, get_current_timezone, is_naive, make_aware
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from .ingest import parse_time_column, detect_tag_pairs, read_header_lines, header_signature
+from .ingest import PV_KEYWORDS, CV_KEYWORDS, ingest_layout
+from .trend_store import read_trend_series, read_legacy_csv, trend_cache, from_ns
+from .pyramid import build_pyramid, pyramid_path_for, read_pyramid
+from .steps import detect_cv_steps, window_deltas
+from .markers import compute_markers, MARKER_FIELDS
+from .identify import fit_process_model, MODEL_FOR_PID_TYPE
+from .tuning import bump_arrays, process_parameters, lambda_tuning, aggregate_tuning, INTEGRATING_TYPES
+from .tuning import tune_bumps, loop_tuning, bump_fingerprints
+from .simulate import simulate, process_lag, SETPOINT_STEP, LOAD_STEP, OUTPUT_BIAS, METRICS
+from .robustness import robustness_map, LAMBDA_STEPS
+
+
+logger = logging.getLogger(__name__)
 
 
 class PIDLoop(models.Model):
@@ -34,6 +51,17 @@ class PIDLoop(models.Model):
         'PIDCalculation', on_delete=models.SET_NULL, null=True, blank=True, related_name="official_pid_loop"
     )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remembers the loaded `pid_type` so saves can tell whether it actually changed."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_pid_type = instance.__dict__.get("pid_type")
+        return instance
+
+    def pid_type_changed(self):
+        """True unless this instance was loaded (or last saved) with the same `pid_type`."""
+        return getattr(self, "_loaded_pid_type", None) != self.pid_type
+
     def set_official_tuning(self, pid_calculation):
         """Sets the official PID tuning based on a selected PIDCalculation."""
         self.selected_pid_calculation = pid_calculation
@@ -53,6 +81,14 @@ def create_pid_calculation(sender, instance, created, **kwargs):
         print(f"✅ Created default PIDCalculation for PIDLoop {instance.id}")
 
 
+# ✅ T1–T4 notes per PID type
+T_NOTES = {
+    "1st Order": ("Initial Start", "PV Changed", "PV 63%", "PV Settled"),
+    "Integrating": ("Slope 1 Start", "Slope 1 Changed", "Slope 2 Start", "Slope 2 End"),
+    "Integrating with Lag": ("Slope 1 Start", "Slope 1 Changed", "Slope 2 Start", "Slope 2 End"),
+}
+
+
 class BumpTest(models.Model):
     """Model for storing bump test data associated with a trend chart."""
     DOMINANCE_CHOICES = [
@@ -105,33 +141,63 @@ class BumpTest(models.Model):
         help_text="Defines whether the bump test is General, Lag Time Dominant, or Dead Time Dominant."
     )
 
+    # ✅ Least-squares process model fitted to the whole bump window (see `identify.fit_process_model`)
+    FIT_MODEL_CHOICES = [
+        ("FOPDT", "First order plus deadtime"),
+        ("IPDT", "Integrator plus deadtime"),
+        ("IPDT with Lag", "Integrator plus deadtime with lag"),
+    ]
+    FIT_FIELDS = ("fit_model", "fit_gain", "fit_deadtime", "fit_tau", "fit_residual", "fit_confidence", "fitted_at")
+
+    fit_model = models.CharField(max_length=20, choices=FIT_MODEL_CHOICES, blank=True, null=True)
+    fit_gain = models.FloatField(null=True, blank=True,
+                                 help_text="Normalized gain: %PV per %CV (per second for integrating models)")
+    fit_deadtime = models.FloatField(null=True, blank=True, help_text="Fitted deadtime in seconds")
+    fit_tau = models.FloatField(null=True, blank=True, help_text="Fitted lag time constant in seconds")
+    fit_residual = models.FloatField(null=True, blank=True, help_text="RMS fit residual in PV units")
+    fit_confidence = models.FloatField(null=True, blank=True, help_text="0–1: R² of the fit, halved at grid edges")
+    fitted_at = models.DateTimeField(null=True, blank=True)
+    tuning_fingerprint = models.CharField(max_length=40, null=True, blank=True, editable=False,
+                                          help_text="Hash of the inputs of the stored tuning; None when not tuned")
+
     created_at = models.DateTimeField(default=now)  # ✅ Store timestamps in UTC
     updated_at = models.DateTimeField(auto_now=True)  # ✅ Auto-updates on save
 
-    def update_t_notes(self):
-        """Updates the T-note fields based on PID Loop Type."""
-        pid_loop = self.trend_chart.pid_loop  # Get associated PIDLoop
-
-        if pid_loop.pid_type == "1st Order":
-            self.T1_note = "Initial Start"
-            self.T2_note = "PV Changed"
-            self.T3_note = "PV 63%"
-            self.T4_note = "PV Settled"
-        elif pid_loop.pid_type == "Integrating":
-            self.T1_note = "Slope 1 Start"
-            self.T2_note = "Slope 1 Changed"
-            self.T3_note = "Slope 2 Start"
-            self.T4_note = "Slope 2 End"
-        elif pid_loop.pid_type == "Integrating with Lag":
-            self.T1_note = "Slope 1 Start"
-            self.T2_note = "Slope 1 Changed"
-            self.T3_note = "Slope 2 Start"
-            self.T4_note = "Slope 2 End"
-        else:
-            self.T1_note = None
-            self.T2_note = None
-            self.T3_note = None
-            self.T4_note = None
+    def fit(self, series, pid_loop):
+        """
+        Fits the loop type's process model to this bump's window of `series` and stores it in the
+        fit_* fields and in kc/Td/tau (which the lambda tuning then uses instead of marker estimates).
+        Returns False when the window has no CV step to identify from.
+        """
+        if not self.start_time or not self.end_time or series is None:
+            return False
+        result = fit_process_model(series.window(self.start_time, self.end_time),
+                                   MODEL_FOR_PID_TYPE.get(pid_loop.pid_type, "FOPDT"))
+        if result is None:
+            return False
+
+        # ✅ Same normalization as the marker-based kc: PV and CV in % of their ranges
+        scale = (pid_loop.out_max - pid_loop.out_min) / ((pid_loop.pv_max - pid_loop.pv_min) or 1.0)
+        self.fit_model = result["model"]
+        self.fit_gain = result["gain"] * scale
+        self.fit_deadtime = result["deadtime"]
+        self.fit_tau = result["tau"]
+        self.fit_residual = result["residual"]
+        self.fit_confidence = result["confidence"]
+        self.fitted_at = now()
+
+        self.kc = self.fit_gain
+        self.Td = self.fit_deadtime
+        if self.fit_tau is not None:
+            self.tau = self.fit_tau
+        self.update_dominance_and_lambda()
+        return True
+
+    def update_t_notes(self, pid_type=None):
+        """Updates the T-note fields based on PID Loop Type (looked up through the chart unless given)."""
+        if pid_type is None:
+            pid_type = self.trend_chart.pid_loop.pid_type  # Get associated PIDLoop
+        self.T1_note, self.T2_note, self.T3_note, self.T4_note = T_NOTES.get(pid_type, (None,) * 4)
 
     def update_dominance_and_lambda(self):
         """Automatically calculates dominance, min_lambda, and max_lambda."""
@@ -168,6 +234,21 @@ class BumpTest(models.Model):
 
         print(f"📌 Updated Dominance: {self.dominance}, Min Lambda: {self.min_lambda}, Max Lambda: {self.max_lambda}")
 
+    def apply_markers(self, series, pid_type, overwrite=False):
+        """
+        Sets T1–T4/TCV computed from this bump's window of `series` (see `markers.compute_markers`).
+        Markers already set are kept unless `overwrite`. Returns the names of the fields changed.
+        """
+        if not self.start_time or not self.end_time or series is None:
+            return []
+
+        changed = []
+        for key, value in compute_markers(series.window(self.start_time, self.end_time), pid_type).items():
+            if value is not None and (overwrite or getattr(self, key) is None):
+                setattr(self, key, from_ns(value).to_pydatetime(warn=False))
+                changed.append(key)
+        return changed
+
     def save(self, *args, **kwargs):
         """Ensure T-notes, dominance, and lambda values are updated before saving."""
         self.update_t_notes()  # ✅ Update T-notes based on PID Type
@@ -184,6 +265,13 @@ class TrendChart(models.Model):
     pid_loop = models.ForeignKey("PIDLoop", on_delete=models.CASCADE)
     uploaded_at = models.DateTimeField(default=now)  # Stored in UTC
     csv_file = models.FileField(upload_to="trend_charts/", blank=True, null=True)
+    data_file = models.FileField(upload_to="trend_charts/", blank=True, null=True,
+                                 help_text="Cleaned Time/PV/CV series in columnar binary format")
+    content_hash = models.CharField(max_length=64, blank=True, null=True, db_index=True,
+                                    help_text="SHA-256 of the uploaded file")
+    ingest_key = models.CharField(max_length=64, blank=True, null=True, db_index=True,
+                                  help_text="Hash of the file, timezone, delimiter and layout it was ingested with; "
+                                            "uploads with the same key share files")
     description = models.TextField(blank=True, null=True)
 
     def save(self, *args, **kwargs):
@@ -195,17 +283,136 @@ class TrendChart(models.Model):
     def __str__(self):
         return f"Trend Chart for {self.pid_loop}"
 
+    def load_series(self):
+        """Returns the chart's TrendSeries through the process-wide trend cache, or None if no file exists."""
+        if self.data_file and os.path.exists(self.data_file.path):
+            return trend_cache.get(self.id, self.data_file.path, read_trend_series)
+        # ✅ Legacy charts (not yet converted) fall back to their cleaned CSV
+        if self.csv_file and os.path.exists(self.csv_file.path):
+            return trend_cache.get(self.id, self.csv_file.path, read_legacy_csv)
+        return None
+
+    @classmethod
+    def find_processed(cls, ingest_key):
+        """An existing chart whose data was ingested from a byte-identical upload read the same way, or None."""
+        if not ingest_key:
+            return None
+        for chart in cls.objects.filter(ingest_key=ingest_key).exclude(data_file="").exclude(data_file=None):
+            if os.path.exists(chart.data_file.path):
+                return chart
+        return None
+
+    def release_files(self):
+        """
+        Deletes this chart's files unless another chart still references them
+        (charts created from identical uploads share one copy).
+        """
+        for field in ("csv_file", "data_file"):
+            name = getattr(self, field).name
+            if not name or TrendChart.objects.filter(**{field: name}).exclude(id=self.id).exists():
+                continue
+            path = getattr(self, field).path
+            paths = [path, pyramid_path_for(path)] if field == "data_file" else [path]
+            for path in paths:
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def load_pyramid(self):
+        """
+        Returns the chart's aggregation pyramid, or None for charts without a columnar data file.
+        The pyramid is rebuilt when it is missing or older than the data file (e.g. after a re-upload).
+        """
+        if not self.data_file or not os.path.exists(self.data_file.path):
+            return None
+
+        path = pyramid_path_for(self.data_file.path)
+        if not os.path.exists(path) or os.stat(path).st_mtime_ns < os.stat(self.data_file.path).st_mtime_ns:
+            build_pyramid(self.load_series(), path)
+        return trend_cache.get(("pyramid", self.id), path, read_pyramid)
+
+    def propose_bump_tests(self, **options):
+        """
+        Bump windows detected from the chart's CV steps (see `steps.detect_cv_steps`), with thresholds
+        relative to the loop's output range. Windows overlapping a saved bump test are flagged.
+        """
+        series = self.load_series()
+        if series is None:
+            return []
+
+        windows = detect_cv_steps(series, self.pid_loop.out_min, self.pid_loop.out_max, **options)
+        saved = list(BumpTest.objects.filter(trend_chart=self, start_time__isnull=False, end_time__isnull=False)
+                     .values_list("start_time", "end_time"))
+        for window in windows:
+            window["overlaps_existing"] = any(start < window["end_time"] and window["start_time"] < end
+                                              for start, end in saved)
+        return windows
+
+    def create_bump_tests(self, windows):
+        """Creates one BumpTest per (start, end) window with a single `bulk_create`; returns the new tests."""
+        if not windows:
+            return []
+
+        series = self.load_series()
+        delta_cv, delta_pv = window_deltas(series, windows) if series is not None else ([None] * len(windows),) * 2
+        first_order = self.pid_loop.pid_type == "1st Order"
+
+        bump_tests = []
+        for (start, end), dcv, dpv in zip(windows, delta_cv, delta_pv):
+            bump_test = BumpTest(trend_chart=self, start_time=start, end_time=end,
+                                 delta_cv=None if dcv is None else float(dcv),
+                                 delta_pv=float(dpv) if first_order and dpv is not None else None)
+            # ✅ bulk_create skips save(): fill what save() would derive, and pre-mark T1–T4/TCV
+            bump_test.update_t_notes()
+            bump_test.update_dominance_and_lambda()
+            bump_test.apply_markers(series, self.pid_loop.pid_type)
+            bump_tests.append(bump_test)
+        return BumpTest.objects.bulk_create(bump_tests)
+
+    def fit_bump_tests(self, bump_tests=None):
+        """
+        Fits process models to all of this chart's bump tests (or the given ones) from one load of
+        the series and writes them with a single `bulk_update`. Returns the number of tests fitted.
+        """
+        series = self.load_series()
+        if series is None:
+            return 0
+        if bump_tests is None:
+            bump_tests = BumpTest.objects.filter(trend_chart=self, start_time__isnull=False, end_time__isnull=False)
+
+        fitted = [bump_test for bump_test in bump_tests if bump_test.fit(series, self.pid_loop)]
+        for bump_test in fitted:
+            bump_test.updated_at = now()
+        BumpTest.objects.bulk_update(fitted, [*BumpTest.FIT_FIELDS, "kc", "Td", "tau", "dominance", "min_lambda",
+                                              "max_lambda", "updated_at"])
+        return len(fitted)
+
+    def mark_bump_tests(self, bump_tests=None, overwrite=False):
+        """
+        Pre-marks T1–T4/TCV of all of this chart's bump tests (or the given ones) from one load of
+        the series, and writes them with a single `bulk_update`. Returns the number of tests updated.
+        """
+        series = self.load_series()
+        if series is None:
+            return 0
+        if bump_tests is None:
+            bump_tests = BumpTest.objects.filter(trend_chart=self, start_time__isnull=False, end_time__isnull=False)
+
+        updated = []
+        for bump_test in bump_tests:
+            if bump_test.apply_markers(series, self.pid_loop.pid_type, overwrite=overwrite):
+                bump_test.updated_at = now()
+                updated.append(bump_test)
+        BumpTest.objects.bulk_update(updated, [*MARKER_FIELDS, "updated_at"])
+        return len(updated)
+
     @staticmethod
     def detect_pv_cv_columns(df):
         """
         Detects PV and CV columns dynamically.
         Prioritizes known keywords but falls back to assuming 2nd & last columns.
         """
-        pv_keywords = ["MEAS", "Process Variable", "Input", ".PNT", ".IN", "PV"]
-        cv_keywords = ["Output", ".OUT", "CV"]
-
-        pv_col = next((col for col in df.columns if any(k in col.upper() for k in pv_keywords)), None)
-        cv_col = next((col for col in df.columns if any(k in col.upper() for k in cv_keywords)), None)
+        pv_col = next((col for col in df.columns if any(k.upper() in col.upper() for k in PV_KEYWORDS)), None)
+        cv_col = next((col for col in df.columns if any(k.upper() in col.upper() for k in CV_KEYWORDS)), None)
 
         # Fallback to 2nd and last column if needed
         if not pv_col and len(df.columns) > 1:
@@ -218,25 +425,168 @@ class TrendChart(models.Model):
 
         return pv_col, cv_col
 
+    @staticmethod
+    def detect_pv_cv_pairs(df):
+        """
+        Wide multi-loop exports: matches PV/CV columns by tag prefix ("FIC101.PV" + "FIC101.OUT").
+        Returns {tag: (pv_col, cv_col)}.
+        """
+        _time_col, pairs, _unpaired = detect_tag_pairs(df.columns.tolist())
+        return pairs
+
     @staticmethod
     def parse_time_column(series):
-        """Parses a time column using multiple date formats, defaults to `dateutil` if needed."""
-        formats = [
-            "%m/%d/%Y %I:%M:%S.%f %p",  # 3/3/2025 2:23:13.004 PM
-            "%m/%d/%Y %I:%M:%S %p",  # 3/3/2025 2:23:33 PM
-            "%m/%d/%Y %H:%M:%S.%f",  # 2/27/2025 17:08:57.000
-            "%m/%d/%Y %H:%M:%S",  # 2/27/2025 17:08:57
-            "%m/%d/%Y %I:%M %p",  # 2/27/2025 5:08 PM
-            "%m/%d/%Y %H:%M",  # 2/27/2025 17:08
-        ]
-
-        for fmt in formats:
-            try:
-                return pd.to_datetime(series, format=fmt, errors="coerce")
-            except ValueError:
-                continue
+        """Parses a time column by inferring one of the known formats, defaults to `dateutil` per failed row."""
+        parsed, _report = parse_time_column(series)
+        return parsed
+
+
+class ImportProfile(models.Model):
+    """
+    Known historian export layout, keyed by the signature of its header line.
+    Auto-learned from the first successful upload of a header; later uploads reuse it
+    and skip column detection and timestamp format inference.
+    """
+    DECIMAL_CHOICES = [
+        (".", "Point (1.5)"),
+        (",", "Comma (1,5)"),
+    ]
 
-        return pd.to_datetime(series, errors="coerce")  # Fallback to flexible parsing
+    name = models.CharField(max_length=100)
+    header_signature = models.CharField(max_length=40, unique=True)
+    delimiter = models.CharField(max_length=4, default=",")
+    header_row = models.PositiveIntegerField(default=0, help_text="Lines before the header line")
+    time_format = models.CharField(max_length=64, blank=True, null=True,
+                                   help_text="strptime format or ISO8601; blank infers it per upload")
+    time_column = models.CharField(max_length=255)
+    column_map = models.JSONField(default=dict,
+                                  help_text='{"tag": ["PV column", "CV column"]}; tag "" for single-loop files')
+    source_timezone = models.CharField(max_length=64, default="UTC")
+    decimal = models.CharField(max_length=1, choices=DECIMAL_CHOICES, default=".")
+    auto_learned = models.BooleanField(default=True)
+    use_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(default=now)
+    last_used_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Import Profile {self.name}"
+
+    @property
+    def is_wide(self):
+        return any(tag for tag in self.column_map)
+
+    @classmethod
+    def match(cls, source_path, delimiter=None):
+        """
+        The profile whose header line (after its `header_row` preamble lines) matches the file, or None.
+        With `delimiter`, only a profile learned with the same delimiter matches.
+        """
+        profiles = cls.objects.all() if delimiter is None else cls.objects.filter(delimiter=delimiter)
+        header_rows = sorted(set(profiles.values_list("header_row", flat=True)))
+        if not header_rows:
+            return None
+
+        lines = read_header_lines(source_path, header_rows[-1] + 1)
+        signatures = [header_signature(lines[row]) for row in header_rows if row < len(lines)]
+        return profiles.filter(header_signature__in=signatures).order_by("header_row").first()
+
+    @classmethod
+    def learn(cls, source_path, name, delimiter, stats, source_timezone, decimal=".", header_row=0):
+        """Records the layout of a successfully ingested file unless its header is already known."""
+        lines = read_header_lines(source_path, header_row + 1)
+        if len(lines) <= header_row:
+            return None
+        profile, created = cls.objects.get_or_create(
+            header_signature=header_signature(lines[header_row]),
+            defaults={
+                "name": name[:100],
+                "delimiter": delimiter,
+                "header_row": header_row,
+                "time_format": stats["time_format"],
+                "time_column": stats["columns"]["time"],
+                "column_map": stats["columns"]["pairs"],
+                "source_timezone": source_timezone,
+                "decimal": decimal,
+            },
+        )
+        if created:
+            logger.info("Learned import profile %r (%s PV/CV pair(s))", profile.name, len(profile.column_map))
+        return profile
+
+    def layout(self):
+        """The `ingest.ingest_layout` of a single-loop profile (None for wide profiles)."""
+        if self.is_wide or "" not in self.column_map:
+            return None
+        return ingest_layout((self.time_column, *self.column_map[""]), self.time_format, self.header_row,
+                             self.decimal)
+
+    def ingest_options(self):
+        """
+        Keyword arguments for the ingest functions: fixed layout, no detection or inference.
+        The timezone is not part of the layout: callers pass the upload's own `user_timezone`
+        (`source_timezone` only records what the first upload used).
+        """
+        return {
+            "delimiter": self.delimiter,
+            "time_format": self.time_format or None,
+            "header_row": self.header_row,
+            "decimal": self.decimal,
+        }
+
+    def mark_used(self):
+        ImportProfile.objects.filter(id=self.id).update(use_count=models.F("use_count") + 1, last_used_at=now())
+
+
+class IngestionJob(models.Model):
+    """Queued trend upload; a worker ingests the file and creates the TrendChart(s) when it completes."""
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+
+    MODE_CHOICES = [
+        ("single", "Single loop"),
+        ("wide", "Wide multi-loop file"),
+    ]
+
+    mode = models.CharField(max_length=10, choices=MODE_CHOICES, default="single")
+    pid_loop = models.ForeignKey("PIDLoop", on_delete=models.CASCADE, null=True, blank=True,
+                                 help_text="Target loop for single-loop uploads")
+    description = models.TextField(blank=True, null=True)
+    source_file = models.FileField(upload_to="trend_charts/")
+    original_name = models.CharField(max_length=255)
+    delimiter = models.CharField(max_length=4, default=",")
+    user_timezone = models.CharField(max_length=64, default="UTC")
+    content_hash = models.CharField(max_length=64, blank=True, null=True)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="queued", db_index=True)
+    phase = models.CharField(max_length=20, default="queued")
+    rows_processed = models.BigIntegerField(default=0)
+    rows_written = models.BigIntegerField(default=0)
+    preview = models.JSONField(default=list, blank=True)
+    report = models.JSONField(default=list, blank=True, help_text="Per-tag outcome of wide uploads")
+    error = models.TextField(blank=True, null=True)
+    worker = models.CharField(max_length=100, blank=True, null=True)
+    trend_chart = models.ForeignKey("TrendChart", on_delete=models.SET_NULL, null=True, blank=True)
+    import_profile = models.ForeignKey("ImportProfile", on_delete=models.SET_NULL, null=True, blank=True)
+
+    created_at = models.DateTimeField(default=now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Ingestion Job {self.id} ({self.status}) - {self.original_name}"
+
+    def elapsed_seconds(self):
+        if not self.started_at:
+            return 0.0
+        return ((self.finished_at or now()) - self.started_at).total_seconds()
+
+    def rows_per_second(self):
+        elapsed = self.elapsed_seconds()
+        return round(self.rows_processed / elapsed, 1) if elapsed > 0 else 0.0
 
 
 class LambdaVariable(models.Model):
@@ -249,6 +599,33 @@ class LambdaVariable(models.Model):
         return f"Lambda for {self.pid_loop.name}: {self.lambda_value}"
 
 
+# ✅ BumpTest fields written by a tuning recalculation
+TUNING_FIELDS = ["kc", "Td", "tau", "p", "i", "d", "kc_cohen", "p_cohen", "i_cohen", "d_cohen",
+                 "dominance", "min_lambda", "max_lambda", "tuning_fingerprint", "updated_at"]
+# ✅ PIDCalculation fields written by a tuning recalculation
+CALCULATION_FIELDS = ["proportional_gain", "integral_time", "derivative_time", "min_lambda", "max_lambda"]
+
+
+def update_rows(model, objects, fields):
+    """
+    Writes `fields` of saved `objects` with one parameterized `UPDATE ... WHERE pk = %s` run through
+    `executemany`. For thousands of rows this is far cheaper than `bulk_update`, whose CASE WHEN
+    expressions cost ORM time per row and field. Like `bulk_update`, no signals are sent.
+    """
+    if not objects:
+        return 0
+    connection = connections[router.db_for_write(model)]
+    meta = model._meta
+    columns = [meta.get_field(field) for field in fields]
+    quote = connection.ops.quote_name
+    sql = (f"UPDATE {quote(meta.db_table)} SET {', '.join(f'{quote(c.column)} = %s' for c in columns)} "
+           f"WHERE {quote(meta.pk.column)} = %s")
+    rows = [[c.get_db_prep_save(getattr(obj, c.attname), connection) for c in columns] + [obj.pk] for obj in objects]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+    return len(rows)
+
+
 class PIDCalculation(models.Model):
     pid_loop = models.ForeignKey(PIDLoop, on_delete=models.CASCADE, related_name="pid_calculations")
     bump_tests = models.ManyToManyField(BumpTest, blank=True)  # ✅ Keeps a manual link but filters now
@@ -265,66 +642,164 @@ class PIDCalculation(models.Model):
         default="lambda"
     )
 
-    def recalculate_lambda_tuning(self):
-        """Perform lambda tuning calculations based on loop type."""
-        # ✅ Only include bumps from this specific PIDLoop
-        bumps = self.bump_tests.filter(trend_chart__pid_loop=self.pid_loop)
-
-        if self.pid_loop.pid_type == "1st Order":
-            for bump in bumps:
-                if bump.T2 and bump.T3 and bump.TCV and bump.delta_cv:
-                    bump.Td = (bump.T2 - bump.TCV).total_seconds()
-                    bump.tau = (bump.T3 - bump.T2).total_seconds()
-                    bump.kc = (
-                            (bump.delta_pv / (self.pid_loop.pv_max - self.pid_loop.pv_min)) /
-                            (bump.delta_cv / (self.pid_loop.out_max - self.pid_loop.out_min))
-                    )
-
-                    bump.p = round(bump.tau / (bump.kc * (self.lambda_value + bump.Td)), 3)
-                    bump.i = round(bump.tau, 1)
-                    bump.d = round((bump.Td * bump.tau) / (bump.Td + self.lambda_value), 2)
-
-                    bump.save()
-
-        elif self.pid_loop.pid_type in ["Integrating", "Integrating with Lag"]:
-            for bump in bumps:
-                if bump.T1 and bump.T2 and bump.T3 and bump.T4 and bump.TCV and bump.delta_cv:
-                    bump.kc = (bump.T4 - bump.T3).total_seconds() / (
-                            (bump.T2 - bump.T1).total_seconds() * bump.delta_cv
-                    )
-                    bump.Td = (bump.T2 - bump.TCV).total_seconds()
-                    bump.i = round(2 * self.lambda_value + bump.Td, 1)
-                    bump.p = round(bump.i / (abs(bump.kc) * (self.lambda_value + bump.Td) ** 2), 3)
-                    bump.d = 0  # No need to round, it's always 0
-
-                    bump.save()
-
-        # ✅ Aggregate tuning values across only **filtered** bumps
-        selected_bumps = [b for b in bumps if b.p is not None]
-
-        if selected_bumps:
-            self.proportional_gain = round(sum(b.p for b in selected_bumps) / len(selected_bumps), 3)
-            self.integral_time = round(sum(b.i for b in selected_bumps) / len(selected_bumps), 1)
-            self.derivative_time = round(sum(b.d for b in selected_bumps) / len(selected_bumps), 2)
-
-            # ✅ Calculate min_lambda and max_lambda with rounding
-            self.min_lambda = round(max(b.min_lambda for b in selected_bumps), 1)
-            self.max_lambda = round(min(b.max_lambda for b in selected_bumps), 1)
+    def bump_parameters(self):
+        """Assigned bumps of this loop (one query), their arrays and their (kc, Td, tau) process parameters."""
+        pid_loop = self.pid_loop
+        bumps = list(self.bump_tests.filter(trend_chart__pid_loop=pid_loop))
+        arrays = bump_arrays(bumps)
+        return bumps, arrays, process_parameters(pid_loop.pid_type, arrays, pid_loop.pv_max - pid_loop.pv_min,
+                                                 pid_loop.out_max - pid_loop.out_min)
 
-        else:
-            self.proportional_gain = 0.0
-            self.integral_time = 1.0
-            self.derivative_time = 0.0
-            self.min_lambda = 1.0  # Default value
-            self.max_lambda = 100.0  # Default value
+    def lambda_sweep(self, lambdas):
+        """
+        Lambda tunings for every value of `lambdas` without saving anything: per-bump P/I/D with shape
+        (lambdas, bumps) and the loop aggregates per lambda, averaged like `recalculate_lambda_tuning`.
+        """
+        bumps, _arrays, (kc, td, tau) = self.bump_parameters()
+        lambdas = np.asarray(lambdas, dtype=float)
+        p, i, d = lambda_tuning(self.pid_loop.pid_type, kc[None, :], td[None, :], tau[None, :], lambdas[:, None])
+        return {"bumps": bumps, "lambdas": lambdas, "p": p, "i": i, "d": d, **aggregate_tuning(p, i, d)}
+
+    def simulation_processes(self):
+        """Assigned bumps with a usable identified process, and their (kc, Td, lag) arrays (see `simulate`)."""
+        bumps, _arrays, (kc, td, tau) = self.bump_parameters()
+        lag = process_lag(self.pid_loop.pid_type, tau)
+        usable = np.isfinite(kc) & (kc != 0) & np.isfinite(td)
+        if self.pid_loop.pid_type not in INTEGRATING_TYPES:
+            usable &= np.isfinite(lag) & (lag > 0)
+        return [b for b, ok in zip(bumps, usable) if ok], kc[usable], td[usable], lag[usable]
+
+    def robustness_map(self, min_lambda=None, max_lambda=None, lambda_steps=LAMBDA_STEPS, **options):
+        """
+        Stability/overshoot map of Lambda tunings from `min_lambda` to `max_lambda` (defaults: this
+        calculation's range) against gain/deadtime perturbations of every usable bump's process
+        (see `robustness.robustness_map` for the options). Nothing is saved.
+        """
+        bumps, kc, td, lag = self.simulation_processes()
+        lambdas = np.linspace(self.min_lambda if min_lambda is None else min_lambda,
+                              self.max_lambda if max_lambda is None else max_lambda, lambda_steps)
+        result = robustness_map(self.pid_loop.pid_type, kc, td, lag, lambdas,
+                                filter_time=self.acceptable_filter_time, **options)
+        return {"bumps": bumps, **result}
+
+    def simulate_tuning(self, kp=None, ti=None, td=None, filter_time=None, setpoint_step=None, load_step=None,
+                        output_bias=OUTPUT_BIAS, trajectories=False):
+        """
+        Simulates a tuning (default: this calculation's) on the process identified by every usable assigned
+        bump, for a setpoint step (PV units) and a load step at the process input (output units); the output
+        is clamped to out_min/out_max and `acceptable_filter_time` filters the PV. Returns the usable bumps
+        and per-scenario metrics in engineering units (see `simulate.step_metrics`), nothing is saved.
+        """
+        pid_loop = self.pid_loop
+        pv_span = (pid_loop.pv_max - pid_loop.pv_min) or 100.0
+        out_span = (pid_loop.out_max - pid_loop.out_min) or 100.0
+        bumps, kc, td_p, tau = self.simulation_processes()
+        integrating = pid_loop.pid_type in INTEGRATING_TYPES
+
+        setpoint = SETPOINT_STEP if setpoint_step is None else setpoint_step / pv_span * 100
+        load = LOAD_STEP if load_step is None else load_step / out_span * 100
+        result = simulate(
+            kc, td_p, tau, integrating,
+            self.proportional_gain if kp is None else kp,
+            self.integral_time if ti is None else ti,
+            self.derivative_time if td is None else td,
+            self.acceptable_filter_time if filter_time is None else filter_time,
+            setpoint_step=np.array([[setpoint], [0.0]]), load_step=np.array([[0.0], [load]]),
+            output_bias=output_bias, trajectories=trajectories,
+        )
+
+        # ✅ Back to engineering units; row 0 is the setpoint response, row 1 the load response
+        scale = {"iae": pv_span / 100, "valve_travel": out_span / 100, "peak_deviation": pv_span / 100}
+        scenarios = {
+            name: {key: result[key][row] * scale.get(key, 1.0) for key in METRICS}
+            for row, name in enumerate(("setpoint", "load"))
+        }
+        simulation = {"bumps": bumps, **scenarios}
+        if trajectories:
+            simulation.update(time=result["time"], pv=result["pv"] * pv_span / 100,
+                              out=pid_loop.out_min + (output_bias + result["out"]) * out_span / 100)
+        return simulation
+
+    def dirty_bumps(self, bumps, full=False):
+        """
+        Bumps whose inputs changed since their last tuning (all of them when `full`), with their current
+        fingerprints (see `tuning.bump_fingerprints`).
+        """
+        prints = bump_fingerprints(bumps, self.pid_loop, self.lambda_value)
+        dirty = [(b, fp) for b, fp in zip(bumps, prints) if full or b.tuning_fingerprint != fp]
+        return [b for b, _fp in dirty], [fp for _b, fp in dirty]
 
-        self.save()
+    def tuning_inputs(self, bumps):
+        """Arguments of `tuning.tune_bumps` for this calculation and the given (already loaded) bumps."""
+        pid_loop = self.pid_loop
+        return (pid_loop.pid_type, bump_arrays(bumps), pid_loop.pv_max - pid_loop.pv_min,
+                pid_loop.out_max - pid_loop.out_min, self.lambda_value)
 
-    def recalculate_tuning(self):
-        """Recalculates the PID tuning based on the selected method."""
-        if self.tuning_method == "lambda":
-            self.recalculate_lambda_tuning()
-        self.save()
+    def apply_tuning(self, bumps, prints, tuning):
+        """
+        Copies a `tune_bumps` result onto the bumps (unsaved) and stamps the tuned ones with their
+        fingerprint; bumps that could not be tuned lose theirs. Returns the bumps that changed.
+        """
+        changed = []
+        for k, bump in enumerate(bumps):
+            if not tuning["tuned"][k]:
+                if bump.tuning_fingerprint is not None:
+                    bump.tuning_fingerprint = None  # ✅ Stays dirty and out of the aggregate
+                    changed.append(bump)
+                continue
+            bump.kc, bump.Td = float(tuning["kc"][k]), float(tuning["td"][k])
+            bump.tau = None if np.isnan(tuning["tau"][k]) else float(tuning["tau"][k])
+            bump.p, bump.i, bump.d = float(tuning["p"][k]), float(tuning["i"][k]), float(tuning["d"][k])
+            if tuning["cohen"][k]:
+                bump.kc_cohen = float(tuning["kc_cohen"][k])
+                bump.p_cohen = round(bump.kc_cohen, 3)
+                bump.i_cohen, bump.d_cohen = float(tuning["i_cohen"][k]), float(tuning["d_cohen"][k])
+            if tuning["limits"][k]:
+                bump.dominance = str(tuning["dominance"][k])
+                bump.min_lambda, bump.max_lambda = float(tuning["min_lambda"][k]), float(tuning["max_lambda"][k])
+            bump.tuning_fingerprint = prints[k]
+            bump.updated_at = now()
+            changed.append(bump)
+        return changed
+
+    def refresh_aggregate(self, bumps):
+        """
+        Sets the loop tuning from the memoized values of the up-to-date bumps, using `tuning_method`
+        (unsaved); with no tunable bump the loop goes back to the defaults. Returns True if any value changed.
+        """
+        tuned = np.array([b.tuning_fingerprint is not None for b in bumps], dtype=bool)
+        loop = loop_tuning(self.pid_loop.pid_type, self.tuning_method, bump_arrays(bumps), tuned)
+        if loop is None:
+            loop = {"kp": 0.0, "ti": 1.0, "td": 0.0, "min_lambda": 1.0, "max_lambda": 100.0}
+
+        values = {
+            "proportional_gain": loop["kp"], "integral_time": loop["ti"], "derivative_time": loop["td"],
+            "min_lambda": loop["min_lambda"], "max_lambda": loop["max_lambda"],
+        }
+        moved = any(getattr(self, field) != value for field, value in values.items())
+        for field, value in values.items():
+            setattr(self, field, value)
+        return moved
+
+    def recalculate_lambda_tuning(self, full=False):
+        """
+        Recomputes the Lambda and Cohen-Coon tunings of the assigned bumps whose fingerprint changed (all of
+        them when `full`) in one vectorized pass (see `tuning.tune_bumps`), then refreshes the loop tuning
+        from the memoized bump values. Only what changed is written: one `bulk_update` and one save at most.
+        """
+        bumps = list(self.bump_tests.filter(trend_chart__pid_loop=self.pid_loop))
+        dirty, prints = self.dirty_bumps(bumps, full)
+        changed = self.apply_tuning(dirty, prints, tune_bumps(*self.tuning_inputs(dirty))) if dirty else []
+        moved = self.refresh_aggregate(bumps)
+        if changed or moved:
+            with transaction.atomic():
+                BumpTest.objects.bulk_update(changed, TUNING_FIELDS)
+                if moved:
+                    self.save(update_fields=CALCULATION_FIELDS)
+
+    def recalculate_tuning(self, full=False):
+        """Recalculates both tunings; the loop values follow the selected method."""
+        self.recalculate_lambda_tuning(full)
 
     def __str__(self):
         return f"PID Calc {self.id} ({self.tuning_method})"
\ No newline at end of file
@@ -0,0 +1,175 @@
+import os
+import struct
+import numpy as np
+from .trend_store import TrendSeries, COPY_ROWS, HEADER_SIZE, TIME_DTYPE, _padded
+
+
+# ✅ Aggregation pyramid layout (stored next to the chart's .trend file):
+#   64-byte header: magic, version, factor, base bucket, level count, source rows
+#   level table (bucket count per level), then per level the columns in LEVEL_COLUMNS order
+PYRAMID_MAGIC = b"PIDPYRMD"
+PYRAMID_VERSION = 1
+PYRAMID_HEADER_FORMAT = "<8sIIIIQ"
+PYRAMID_FACTOR = 4  # Each level aggregates 4 buckets of the level below
+PYRAMID_BASE = 16  # Raw samples per bucket on the finest level
+PYRAMID_MIN_BUCKETS = 256  # Stop once a level is this coarse
+
+SIGNAL_COLUMNS = ("min", "max", "mean", "tmin", "tmax")
+LEVEL_COLUMNS = ["time"] + [f"{signal}_{col}" for signal in ("pv", "cv") for col in SIGNAL_COLUMNS]
+
+
+def pyramid_path_for(data_path):
+    """Pyramid file that belongs to a columnar trend data file."""
+    return f"{os.path.splitext(data_path)[0]}.pyramid"
+
+
+def _reduce(level, size):
+    """
+    Aggregates consecutive groups of `size` buckets into one (the last group may be partial).
+    `level` holds time plus, per signal, min/max (±inf when empty), sum, count and tmin/tmax.
+    """
+    n = len(level["time"])
+    buckets = -(-n // size)
+    pad = buckets * size - n
+    base = np.arange(buckets) * size
+    out = {"time": level["time"][::size].copy()}
+
+    for signal in ("pv", "cv"):
+        lo = np.pad(level[f"{signal}_min"], (0, pad), constant_values=np.inf).reshape(buckets, size)
+        hi = np.pad(level[f"{signal}_max"], (0, pad), constant_values=-np.inf).reshape(buckets, size)
+        i_lo = np.minimum(base + lo.argmin(axis=1), n - 1)
+        i_hi = np.minimum(base + hi.argmax(axis=1), n - 1)
+        out[f"{signal}_min"] = level[f"{signal}_min"][i_lo]
+        out[f"{signal}_max"] = level[f"{signal}_max"][i_hi]
+        out[f"{signal}_tmin"] = level[f"{signal}_tmin"][i_lo]
+        out[f"{signal}_tmax"] = level[f"{signal}_tmax"][i_hi]
+        out[f"{signal}_sum"] = np.add.reduceat(level[f"{signal}_sum"], base)
+        out[f"{signal}_count"] = np.add.reduceat(level[f"{signal}_count"], base)
+    return out
+
+
+def _samples_as_level(time_ns, pv, cv):
+    """Represents raw samples as one-sample buckets so they can go through `_reduce`."""
+    level = {"time": np.asarray(time_ns, dtype=TIME_DTYPE)}
+    for signal, values in (("pv", pv), ("cv", cv)):
+        values = np.asarray(values, dtype=np.float64)
+        valid = ~np.isnan(values)
+        level[f"{signal}_min"] = np.where(valid, values, np.inf)
+        level[f"{signal}_max"] = np.where(valid, values, -np.inf)
+        level[f"{signal}_sum"] = np.where(valid, values, 0.0)
+        level[f"{signal}_count"] = valid.astype(np.int64)
+        level[f"{signal}_tmin"] = level["time"]
+        level[f"{signal}_tmax"] = level["time"]
+    return level
+
+
+def _concat(parts):
+    return {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+
+
+def build_pyramid(series, path, factor=PYRAMID_FACTOR, base=PYRAMID_BASE, min_buckets=PYRAMID_MIN_BUCKETS):
+    """
+    Builds the min/max/mean pyramid of a TrendSeries and writes it to `path`.
+    The finest level is built in chunks straight from the (memory-mapped) samples; each coarser
+    level aggregates `factor` buckets of the level below. Returns the number of levels written.
+    """
+    n = len(series)
+    levels = []
+    if n > base:
+        step = max(COPY_ROWS // base, 1) * base  # ✅ Chunk boundaries stay on bucket boundaries
+        level = _concat([
+            _reduce(_samples_as_level(series.time[i:i + step], series.pv[i:i + step], series.cv[i:i + step]), base)
+            for i in range(0, n, step)
+        ])
+        levels.append(level)
+        while len(level["time"]) > min_buckets:
+            level = _reduce(level, factor)
+            levels.append(level)
+
+    tmp_path = f"{path}.part"
+    with open(tmp_path, "wb") as out:
+        header = struct.pack(PYRAMID_HEADER_FORMAT, PYRAMID_MAGIC, PYRAMID_VERSION, factor, base, len(levels), n)
+        out.write(header.ljust(HEADER_SIZE, b"\0"))
+        table = np.array([len(level["time"]) for level in levels], dtype="<u8")
+        out.write(table.tobytes() + b"\0" * (_padded(table.nbytes) - table.nbytes))
+
+        for level in levels:
+            for signal in ("pv", "cv"):
+                counts = level[f"{signal}_count"]
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    level[f"{signal}_mean"] = np.where(counts > 0, level[f"{signal}_sum"] / counts, np.nan)
+                for col in ("min", "max"):
+                    level[f"{signal}_{col}"] = np.where(counts > 0, level[f"{signal}_{col}"], np.nan)
+            for name in LEVEL_COLUMNS:
+                dtype = TIME_DTYPE if name == "time" or name.endswith(("tmin", "tmax")) else np.dtype("<f8")
+                np.ascontiguousarray(level[name], dtype=dtype).tofile(out)
+    os.replace(tmp_path, path)
+    return len(levels)
+
+
+class TrendPyramid:
+    """Memory-mapped min/max/mean aggregation levels of one trend chart, finest level first."""
+
+    def __init__(self, levels, factor, base, rows):
+        self.levels = levels
+        self.factor = factor
+        self.base = base
+        self.rows = rows
+
+    @property
+    def nbytes(self):
+        return sum(column.nbytes for level in self.levels for column in level.values())
+
+    def query(self, start_ns, end_ns, max_points, agg="minmax"):
+        """
+        Returns a TrendSeries for [start_ns, end_ns] from the finest level that fits in `max_points`.
+        "minmax" emits each bucket's extremes in the order they occurred (2 points per bucket),
+        "mean" emits one averaged point per bucket. Returns None if the pyramid has no levels.
+        """
+        if not self.levels:
+            return None
+
+        per_bucket = 2 if agg == "minmax" else 1
+        for level in self.levels:
+            i0 = max(int(np.searchsorted(level["time"], start_ns, side="right")) - 1, 0)
+            i1 = int(np.searchsorted(level["time"], end_ns, side="right"))
+            if (i1 - i0) * per_bucket <= max_points:
+                break
+
+        rows = {name: np.asarray(column[i0:i1]) for name, column in level.items()}
+        if agg != "minmax":
+            return TrendSeries(rows["time"], rows["pv_mean"], rows["cv_mean"])
+
+        # ✅ Two time slots per bucket ordered by when the PV extremes occurred; CV extremes are
+        #    placed in the same slots in their own order (a sub-bucket, i.e. sub-pixel, shift)
+        def ordered(signal):
+            first = rows[f"{signal}_tmin"] <= rows[f"{signal}_tmax"]
+            a = np.where(first, rows[f"{signal}_min"], rows[f"{signal}_max"])
+            b = np.where(first, rows[f"{signal}_max"], rows[f"{signal}_min"])
+            return np.column_stack([a, b]).ravel()
+
+        t_lo = np.minimum(rows["pv_tmin"], rows["pv_tmax"])
+        t_hi = np.maximum(rows["pv_tmin"], rows["pv_tmax"])
+        return TrendSeries(np.column_stack([t_lo, t_hi]).ravel(), ordered("pv"), ordered("cv"))
+
+
+def read_pyramid(path):
+    """Memory-maps a pyramid file written by `build_pyramid`."""
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+
+    magic, version, factor, base, count, rows = struct.unpack_from(PYRAMID_HEADER_FORMAT, header)
+    if magic != PYRAMID_MAGIC or version != PYRAMID_VERSION:
+        raise ValueError(f"Not a trend pyramid file: {path}")
+
+    table = np.fromfile(path, dtype="<u8", count=count, offset=HEADER_SIZE)
+    offset = HEADER_SIZE + _padded(table.nbytes)
+    levels = []
+    for buckets in table.tolist():
+        level = {}
+        for name in LEVEL_COLUMNS:
+            dtype = TIME_DTYPE if name == "time" or name.endswith(("tmin", "tmax")) else np.dtype("<f8")
+            level[name] = np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(buckets,))
+            offset += buckets * dtype.itemsize
+        levels.append(level)
+    return TrendPyramid(levels, factor, base, rows)
@@ -0,0 +1,156 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from django.conf import settings
+from .simulate import simulate, HORIZON_FACTOR
+from .tuning import lambda_tuning, INTEGRATING_TYPES
+
+
+# ✅ Robustness map: Lambda tunings of the nominal model simulated on perturbed processes.
+#   Perturbation factor x in [-1, 1] scales kc by (1 + gain_uncertainty·x) and Td by
+#   (1 + deadtime_uncertainty·x), so x = 1 is the worst case (more gain and more deadtime).
+LAMBDA_STEPS = 50
+PERTURBATION_STEPS = 50
+GAIN_UNCERTAINTY = 0.5
+DEADTIME_UNCERTAINTY = 0.5
+
+
+def perturbation_factors(steps, gain_uncertainty, deadtime_uncertainty):
+    """(kc multipliers, Td multipliers) along the perturbation axis."""
+    x = np.linspace(-1.0, 1.0, steps)
+    return 1 + gain_uncertainty * x, np.maximum(1 + deadtime_uncertainty * x, 0.0)
+
+
+def _bump_map(pid_type, kc, td, lag, lambdas, gain_factors, deadtime_factors, filter_time):
+    """
+    Stability and overshoot (lambdas × perturbations) of one bump's process. Tuning invalid for a lambda:
+    unstable, overshoot NaN. Runs in a worker process; touches no database.
+    """
+    p, i, d = lambda_tuning(pid_type, kc, td, lag, lambdas)
+    kc_p, td_p = kc * gain_factors, td * deadtime_factors
+
+    # ✅ One horizon per lambda row, long enough for the slowest perturbed loop of that row
+    slowest = td_p.max() + np.fmax(np.nan_to_num(lag), np.fmax(np.nan_to_num(i), lambdas))
+    result = simulate(kc_p[None, :], td_p[None, :], lag, pid_type in INTEGRATING_TYPES,
+                      p[:, None], i[:, None], d[:, None], filter_time,
+                      horizon=(HORIZON_FACTOR * np.maximum(slowest, 1.0))[:, None])
+
+    tuned = np.isfinite(p)[:, None]
+    stable = tuned & np.isfinite(result["settling_time"])
+    return stable, np.where(tuned, result["overshoot"], np.nan)
+
+
+def _stable_range(lambdas, stable_rows):
+    """Lowest and highest lambda of the longest run of lambdas stable everywhere, or None."""
+    best, start = None, None
+    for k, ok in enumerate(np.r_[stable_rows, False]):
+        if ok and start is None:
+            start = k
+        elif not ok and start is not None:
+            if best is None or k - start > best[1] - best[0] + 1:
+                best = (start, k - 1)
+            start = None
+    return None if best is None else (float(lambdas[best[0]]), float(lambdas[best[1]]))
+
+
+def robustness_map(pid_type, kc, td, lag, lambdas, perturbation_steps=PERTURBATION_STEPS,
+                   gain_uncertainty=GAIN_UNCERTAINTY, deadtime_uncertainty=DEADTIME_UNCERTAINTY,
+                   filter_time=0.0, workers=None):
+    """
+    Simulates setpoint steps over the lambda × perturbation grid for every bump process (kc, Td, lag arrays),
+    spread over a process pool, and caches the result by a hash of the inputs.
+    Returns {"lambdas", "gain_factors", "deadtime_factors", "stable_fraction" (share of bumps stable),
+    "overshoot" (worst over bumps, %), "stable_range" ((min, max) lambda stable everywhere, or None),
+    "cached"}.
+    """
+    kc, td, lag = (np.asarray(v, dtype=float) for v in (kc, td, lag))
+    lambdas = np.asarray(lambdas, dtype=float)
+    gain_factors, deadtime_factors = perturbation_factors(perturbation_steps, gain_uncertainty,
+                                                          deadtime_uncertainty)
+
+    key = hashlib.sha256()
+    for part in (pid_type.encode(), kc, td, lag, lambdas, gain_factors, deadtime_factors,
+                 np.float64(filter_time)):
+        key.update(part if isinstance(part, bytes) else np.ascontiguousarray(part).tobytes())
+    key = key.hexdigest()
+    cached = robustness_cache.get(key)
+    if cached is not None:
+        return {**cached, "cached": True}
+
+    # ✅ One task per bump and lambda chunk, so even a single bump keeps every worker busy
+    workers = workers or getattr(settings, "TUNING_ROBUSTNESS_WORKERS", None) or os.cpu_count() or 1
+    chunks = np.array_split(lambdas, max(1, min(len(lambdas), -(-workers // max(len(kc), 1)))))
+    tasks = [(pid_type, kc[k], td[k], lag[k], chunk, gain_factors, deadtime_factors, filter_time)
+             for k in range(len(kc)) for chunk in chunks]
+    workers = min(workers, len(tasks) or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            maps = list(pool.map(_bump_map, *zip(*tasks)))
+    else:
+        maps = [_bump_map(*task) for task in tasks]
+
+    shape = (len(lambdas), perturbation_steps)
+    if maps:
+        per_bump = [maps[k:k + len(chunks)] for k in range(0, len(maps), len(chunks))]
+        stable = np.stack([np.concatenate([m[0] for m in bump]) for bump in per_bump])
+        overshoot = np.stack([np.concatenate([m[1] for m in bump]) for bump in per_bump])
+        stable_fraction = stable.mean(axis=0)
+        worst = np.fmax.reduce(overshoot, axis=0)  # ✅ NaN only where no bump could be tuned
+        stable_range = _stable_range(lambdas, stable.all(axis=(0, 2)))
+    else:
+        stable_fraction, worst, stable_range = np.zeros(shape), np.full(shape, np.nan), None
+
+    result = {
+        "lambdas": lambdas,
+        "gain_factors": gain_factors,
+        "deadtime_factors": deadtime_factors,
+        "stable_fraction": stable_fraction,
+        "overshoot": worst,
+        "stable_range": stable_range,
+    }
+    robustness_cache.put(key, result)
+    return {**result, "cached": False}
+
+
+class ResultCache:
+    """Process-wide LRU of robustness maps keyed by input hash, bounded to `max_entries`."""
+
+    def __init__(self, max_entries=None):
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_entries(self):
+        if self._max_entries is None:
+            return getattr(settings, "TUNING_ROBUSTNESS_CACHE_ENTRIES", 64)
+        return self._max_entries
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+robustness_cache = ResultCache()
@@ -1,10 +1,33 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import PIDLoop, BumpTest
+from django.utils.timezone import now
+from .models import PIDLoop, BumpTest, TrendChart, T_NOTES
+from .trend_store import trend_cache
 
 @receiver(post_save, sender=PIDLoop)
-def update_bump_tests_on_pid_type_change(sender, instance, **kwargs):
-    """Update all related BumpTests when PIDLoop type changes."""
-    for bump_test in BumpTest.objects.filter(trend_chart__pid_loop=instance):
-        bump_test.update_t_notes()
-        bump_test.save()
+def update_bump_tests_on_pid_type_change(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Rewrites the T-notes of the loop's BumpTests when its `pid_type` actually changed. The notes depend on
+    the type alone, so one UPDATE covers every bump however many there are; renames cost no query.
+    """
+    if update_fields is not None and "pid_type" not in update_fields:
+        return  # ✅ The stored type did not change
+    if not created and instance.pid_type_changed():
+        t1, t2, t3, t4 = T_NOTES.get(instance.pid_type, (None,) * 4)
+        BumpTest.objects.filter(trend_chart__pid_loop=instance).update(
+            T1_note=t1, T2_note=t2, T3_note=t3, T4_note=t4, updated_at=now())  # ✅ UPDATE skips auto_now
+    instance._loaded_pid_type = instance.pid_type
+
+
+@receiver(post_save, sender=TrendChart)
+@receiver(post_delete, sender=TrendChart)
+def invalidate_trend_cache(sender, instance, **kwargs):
+    """Drop a chart's cached series and pyramid when it is re-uploaded or deleted."""
+    trend_cache.invalidate(instance.id)
+    trend_cache.invalidate(("pyramid", instance.id))
+
+
+@receiver(post_delete, sender=TrendChart)
+def release_trend_files(sender, instance, **kwargs):
+    """Delete a chart's files once no other chart shares them."""
+    instance.release_files()
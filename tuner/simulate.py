@@ -0,0 +1,136 @@
+import numpy as np
+
+
+# ✅ Closed-loop step-response simulator (pure NumPy). Everything runs in percent of span around the
+#   operating point; every argument broadcasts over a batch, and the time loop advances the whole batch
+#   at once, so thousands of candidate loops cost one pass of `steps` vector updates.
+SIM_STEPS = 600            # Samples per simulation
+HORIZON_FACTOR = 8.0       # Default horizon: HORIZON_FACTOR × the slowest (deadtime + max(Ti, lag))
+SETTLE_FRACTION = 0.02     # Settled once the PV stays within 2% of the upset size
+SETPOINT_STEP = 10.0       # Default setpoint step, % of PV span
+LOAD_STEP = 10.0           # Default load disturbance, % of output span (added at the process input)
+OUTPUT_BIAS = 50.0         # Default operating output, % of output span
+
+METRICS = ("overshoot", "settling_time", "iae", "valve_travel", "peak_deviation")
+
+
+def _batch(*values):
+    return [np.asarray(v, dtype=float) for v in np.broadcast_arrays(*[np.asarray(v, dtype=float) for v in values])]
+
+
+def process_lag(pid_type, tau):
+    """The lag simulated for a loop type: tau for 1st Order and Integrating with Lag, none (NaN) for Integrating."""
+    return np.full(np.shape(tau), np.nan) if pid_type == "Integrating" else np.asarray(tau, dtype=float)
+
+
+def default_horizon(td, tau, ti):
+    """Simulation horizon (s) long enough for the slowest loop of the batch to settle."""
+    td, tau, ti = _batch(td, tau, ti)
+    slowest = np.nan_to_num(td) + np.fmax(np.nan_to_num(tau), np.nan_to_num(ti))
+    return float(HORIZON_FACTOR * max(np.max(slowest, initial=0.0), 1.0))
+
+
+def simulate(kc, td, tau, integrating, kp, ti, td_d=0.0, filter_time=0.0, setpoint_step=SETPOINT_STEP,
+             load_step=0.0, output_bias=OUTPUT_BIAS, horizon=None, steps=SIM_STEPS, trajectories=False):
+    """
+    Simulates a batch of PID loops from steady state, all in % of span: the process is FOPDT
+    (kc·e^(-Td·s)/(tau·s + 1)) or integrating (kc·e^(-Td·s)/(s·(tau·s + 1)), tau may be NaN for none),
+    the controller a velocity-form ISA PID with derivative on the PV, both acting on the PV filtered by
+    `filter_time`; the output is clamped to 0–100% (out_min/out_max), which also stops integral windup.
+    The controller acts against the process gain sign. At t = 0 the setpoint steps by `setpoint_step`
+    and a `load_step` is added to the process input. Returns the `step_metrics` arrays (and time/pv/out
+    trajectories as deviations when `trajectories`). `horizon` (s) defaults to `default_horizon`.
+    """
+    kc, td, tau, integrating, kp, ti, td_d, filter_time, sp, load, bias = _batch(
+        kc, td, tau, integrating, kp, ti, td_d, filter_time, setpoint_step, load_step, output_bias)
+    shape = kc.shape
+    kc, td, tau, integrating, kp, ti, td_d, filter_time, sp, load, bias = (
+        v.ravel() for v in (kc, td, tau, integrating, kp, ti, td_d, filter_time, sp, load, bias))
+    n = len(kc)
+
+    # ✅ One horizon for the batch, or one per loop (broadcast like the other arguments)
+    dt = np.asarray(default_horizon(td, tau, ti) if horizon is None else horizon, dtype=float) / steps
+    if dt.ndim:
+        dt = np.broadcast_to(dt, shape).ravel()
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        lag = np.where(tau > 0, np.exp(-dt / tau), 0.0)
+        pv_filter = np.where(filter_time > 0, np.exp(-dt / filter_time), 0.0)
+        gain = np.abs(kp) * np.where(kc < 0, -1.0, 1.0)
+        reset = np.where(ti > 0, dt / ti, 0.0)
+        rate = np.nan_to_num(td_d) / dt
+    integrating = integrating.astype(bool)
+    delay = np.clip(np.rint(np.nan_to_num(td) / dt).astype(int), 0, steps - 1)
+    low, high = -bias, 100.0 - bias
+
+    rows = np.arange(n)
+    out = np.zeros((n, steps + 1))          # ✅ out[:, k + 1] is the controller output at sample k
+    pv = np.zeros((n, steps))
+    state = np.zeros(n)                      # Lag state (process input after the first-order lag)
+    level = np.zeros(n)                      # PV deviation
+    filtered = np.zeros(n)
+    previous_error = np.zeros(n)
+    f1 = np.zeros(n)
+    f2 = np.zeros(n)
+    u = np.zeros(n)
+
+    for k in range(steps):
+        pv[:, k] = level
+        filtered = pv_filter * filtered + (1 - pv_filter) * level
+        error = sp - filtered
+        if k == 0:
+            previous_error = error - sp      # ✅ The setpoint step itself gives the proportional kick
+            f1 = f2 = filtered
+        du = gain * ((error - previous_error) + reset * error - rate * (filtered - 2 * f1 + f2))
+        u = np.clip(u + np.nan_to_num(du), low, high)
+        out[:, k + 1] = u
+        previous_error, f2, f1 = error, f1, filtered
+
+        # ✅ Process input: the output `delay` samples ago plus the load, through the lag
+        delayed = out[rows, np.maximum(k + 1 - delay, 0)] + load
+        state = lag * state + (1 - lag) * delayed
+        level = np.where(integrating, level + kc * dt * state, kc * state)
+
+    result = step_metrics(pv, out[:, 1:], sp, dt)
+    result = {key: value.reshape(shape) for key, value in result.items()}
+    if trajectories:
+        time = np.arange(steps) * dt if not dt.ndim else (dt[:, None] * np.arange(steps)).reshape(shape + (steps,))
+        result.update(time=time, pv=pv.reshape(shape + (steps,)),
+                      out=out[:, 1:].reshape(shape + (steps,)))
+    return result
+
+
+def step_metrics(pv, out, setpoint, dt):
+    """
+    Overshoot (% of the upset), settling time (s, NaN if never settled), IAE (%·s), valve travel (%) and
+    peak deviation (%) of (batch, samples) responses sampled every `dt` (scalar or per response).
+    The upset is the setpoint step, or the peak deviation when the setpoint did not move (load
+    responses); overshoot is the excursion past the setpoint against the setpoint step (load
+    responses: against the peak deviation).
+    """
+    setpoint = np.asarray(setpoint, dtype=float)[:, None]
+    dt = np.asarray(dt, dtype=float)
+    error = setpoint - pv
+    peak_index = np.abs(error).argmax(axis=1)
+    peak_error = error[np.arange(len(error)), peak_index]
+    peak = np.abs(peak_error)
+    upset = np.where(setpoint[:, 0] != 0, np.abs(setpoint[:, 0]), peak)
+    direction = np.where(setpoint[:, 0] != 0, np.sign(setpoint[:, 0]), np.where(peak_error < 0, -1.0, 1.0))[:, None]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        overshoot = np.where(upset > 0, np.maximum(0.0, (-error * direction).max(axis=1)) / upset * 100, 0.0)
+
+    outside = np.abs(error) > SETTLE_FRACTION * upset[:, None]
+    samples = pv.shape[1]
+    last_outside = samples - 1 - outside[:, ::-1].argmax(axis=1)
+    settle = np.where(outside.any(axis=1), (last_outside + 1) * dt, 0.0)
+    settle = np.where(outside[:, -1], np.nan, settle)
+
+    travel = np.abs(np.diff(out, axis=1, prepend=0.0)).sum(axis=1)
+    return {
+        "overshoot": overshoot,
+        "settling_time": settle,
+        "iae": np.abs(error).sum(axis=1) * dt,
+        "valve_travel": travel,
+        "peak_deviation": peak,
+    }
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+from .trend_store import to_ns
+
+
+# ✅ Defaults for CV step detection; step sizes are fractions of the loop's output span (out_max - out_min)
+MIN_STEP_FRACTION = 0.02
+NOISE_FRACTION = 0.002
+MERGE_SECONDS = 5.0
+MAX_RAMP_SECONDS = 30.0
+PRE_SECONDS = 60.0
+MIN_WINDOW_SECONDS = 60.0
+MAX_WINDOW_SECONDS = 3600.0
+
+NS = 1_000_000_000
+
+
+def detect_cv_steps(series, out_min=0.0, out_max=100.0, min_step_fraction=MIN_STEP_FRACTION,
+                    noise_fraction=NOISE_FRACTION, merge_seconds=MERGE_SECONDS, max_ramp_seconds=MAX_RAMP_SECONDS,
+                    pre_seconds=PRE_SECONDS, min_window_seconds=MIN_WINDOW_SECONDS,
+                    max_window_seconds=MAX_WINDOW_SECONDS):
+    """
+    Proposes bump windows for a whole TrendSeries from manual CV steps, in a few vectorized passes.
+    CV moves larger than `noise_fraction` of the output span are grouped into moves (samples less than
+    `merge_seconds` apart). A move is a step when it changes the CV by at least `min_step_fraction` of the
+    span within `max_ramp_seconds` and the CV then holds still for `min_window_seconds`.
+    Each window starts `pre_seconds` before the step (never before the previous move) and ends at the
+    next move, capped at `max_window_seconds` after the step. Returns one dict per window, in time order.
+    """
+    n = len(series)
+    if n < 3:
+        return []
+
+    span = abs(float(out_max) - float(out_min)) or 100.0
+    time = np.asarray(series.time, dtype=np.int64)
+    cv = np.asarray(series.cv, dtype=np.float64)
+    pv = np.asarray(series.pv, dtype=np.float64)
+
+    # ✅ Sample-to-sample CV moves above the noise band; move k is between samples k and k+1
+    moving = np.flatnonzero(np.abs(np.diff(cv)) > noise_fraction * span)
+    if not len(moving):
+        return []
+
+    # ✅ Consecutive moves close in time form one operator action (ramped or stair-stepped writes)
+    new_group = np.diff(time[moving]) > merge_seconds * NS
+    first = moving[np.r_[True, new_group]]
+    last = moving[np.r_[new_group, True]]
+
+    step_ns = time[first + 1]
+    settled_ns = time[last + 1]
+    delta_cv = cv[last + 1] - cv[first]
+
+    # ✅ Windows are bounded by the neighbouring moves, whether or not those are steps themselves
+    previous_end = np.r_[time[0], settled_ns[:-1]]
+    next_start = np.r_[time[first[1:]], time[-1]]
+    start_ns = np.maximum(previous_end, step_ns - int(pre_seconds * NS))
+    end_ns = np.minimum(next_start, settled_ns + int(max_window_seconds * NS))
+
+    accepted = (
+        (np.abs(delta_cv) >= min_step_fraction * span)
+        & (settled_ns - step_ns <= max_ramp_seconds * NS)
+        & (end_ns - settled_ns >= min_window_seconds * NS)
+        & (start_ns < time[first])
+        & np.isfinite(delta_cv)
+    )
+    if not accepted.any():
+        return []
+
+    start_ns, end_ns, step_ns = start_ns[accepted], end_ns[accepted], step_ns[accepted]
+    start_idx = np.searchsorted(time, start_ns, side="left")
+    end_idx = np.searchsorted(time, end_ns, side="right") - 1
+
+    return [
+        {
+            "start_time": pd.Timestamp(int(start), tz="UTC"),
+            "end_time": pd.Timestamp(int(end), tz="UTC"),
+            "step_time": pd.Timestamp(int(step), tz="UTC"),
+            "delta_cv": float(cv[j] - cv[i]),
+            "delta_pv": float(pv[j] - pv[i]),
+            "step_fraction": float(abs(cv[j] - cv[i]) / span),
+        }
+        for start, end, step, i, j in zip(start_ns, end_ns, step_ns, start_idx, end_idx)
+    ]
+
+
+def window_deltas(series, windows):
+    """ΔCV and ΔPV (last minus first sample) of each (start, end) window, as two float arrays."""
+    if not len(series) or not windows:
+        return np.zeros(len(windows)), np.zeros(len(windows))
+
+    time = np.asarray(series.time, dtype=np.int64)
+    starts = np.array([to_ns(start) for start, _end in windows], dtype=np.int64)
+    ends = np.array([to_ns(end) for _start, end in windows], dtype=np.int64)
+    first = np.clip(np.searchsorted(time, starts, side="left"), 0, len(time) - 1)
+    last = np.clip(np.searchsorted(time, ends, side="right") - 1, 0, len(time) - 1)
+    cv = np.asarray(series.cv, dtype=np.float64)
+    pv = np.asarray(series.pv, dtype=np.float64)
+    return cv[last] - cv[first], pv[last] - pv[first]
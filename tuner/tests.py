@@ -1,3 +1,491 @@
-from django.test import TestCase
+import io
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils.timezone import now
+from .downsample import downsample_series, lttb_indices, minmax_indices
+from .identify import fit_process_model
+from .ingest import ingest_trend_file
+from .markers import compute_markers
+from .jobs import process_pending_jobs, requeue_interrupted_jobs
+from .models import PIDLoop, TrendChart, BumpTest, PIDCalculation, IngestionJob
+from .simulate import simulate
+from .steps import detect_cv_steps
+from .trend_store import TrendSeries, TrendSeriesWriter, read_trend_series
+from .tuning import lambda_tuning, cohen_coon_tuning
 
-# Create your tests here.
+START_NS = 1_740_000_000_000_000_000  # 2025-02-19 21:20 UTC
+
+
+def step_series(integrating=False, lag=0.0, seconds=1000, step=100, deadtime=10.0, tau=50.0, noise=0.01):
+    """1 s samples of a 50 → 60 % CV step at `step` s and the PV of a known process (gain 1, or 0.005/s)."""
+    t = np.arange(float(seconds))
+    cv = np.where(t >= step, 60.0, 50.0)
+    x = np.clip(t - step - deadtime, 0, None)
+    if integrating:
+        ramp = x - lag * (1 - np.exp(-x / lag)) if lag else x
+        pv = 30 + 0.02 * t + 0.05 * ramp  # ✅ Drifting before the step
+    else:
+        pv = 40 + 10 * (1 - np.exp(-x / tau))
+    pv = pv + np.random.default_rng(1).normal(0, noise, len(t))
+    return TrendSeries((t * 1e9).astype(np.int64) + START_NS, pv, cv)
+
+
+def trend_csv(rows=100, start="2025-03-03 14:00", time_format="%m/%d/%Y %I:%M:%S %p"):
+    """A historian export with a Time/PV/CV header, one row per second from `start` (read as local time)."""
+    times = pd.date_range(start, periods=rows, freq="1s")
+    text = times.strftime(time_format) if time_format else times.strftime("%Y-%m-%dT%H:%M:%S") + "-06:00"
+    frame = pd.DataFrame({"Time": text, "TIC.PV": np.linspace(40, 50, rows), "TIC.CV": 50.0})
+    return frame.to_csv(index=False).encode()
+
+
+class PIDLoopSaveTests(TestCase):
+    """Saving a PIDLoop must not cost queries per bump test."""
+
+    def setUp(self):
+        self.loop = PIDLoop.objects.create(name="FIC-101")
+        chart = TrendChart.objects.create(pid_loop=self.loop)
+        start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        BumpTest.objects.bulk_create([
+            BumpTest(trend_chart=chart, start_time=start + timedelta(minutes=k), end_time=start + timedelta(minutes=k + 1),
+                     T1_note="Initial Start", T2_note="PV Changed", T3_note="PV 63%", T4_note="PV Settled")
+            for k in range(200)
+        ])
+        self.loop = PIDLoop.objects.get(id=self.loop.id)
+
+    def test_rename_does_not_touch_bump_tests(self):
+        self.loop.name = "FIC-102"
+        with self.assertNumQueries(1):
+            self.loop.save()
+
+    def test_pid_type_change_updates_notes_in_one_query(self):
+        BumpTest.objects.update(updated_at=datetime(2024, 1, 1, tzinfo=timezone.utc))
+        saved = datetime.now(timezone.utc) - timedelta(seconds=1)
+        self.loop.pid_type = "Integrating"
+        with self.assertNumQueries(2):
+            self.loop.save()
+        notes = set(BumpTest.objects.values_list("T1_note", "T2_note", "T3_note", "T4_note"))
+        self.assertEqual(notes, {("Slope 1 Start", "Slope 1 Changed", "Slope 2 Start", "Slope 2 End")})
+        self.assertFalse(BumpTest.objects.filter(updated_at__lt=saved).exists())
+
+        # ✅ Saving again with the same type is a plain save
+        with self.assertNumQueries(1):
+            self.loop.save()
+
+    def test_save_with_other_update_fields_skips_notes(self):
+        self.loop.pid_type = "Integrating"
+        with self.assertNumQueries(1):
+            self.loop.save(update_fields=["name"])
+        self.assertEqual(BumpTest.objects.filter(T1_note="Initial Start").count(), 200)
+
+
+class LoopListQueryTests(TestCase):
+    """The loop and identity trend lists cost a constant number of queries, however many loops and bumps."""
+
+    def _add_loops(self, count):
+        start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        for k in range(count):
+            loop = PIDLoop.objects.create(name=f"LIC-{k:03d}")
+            chart = TrendChart.objects.create(pid_loop=loop)
+            BumpTest.objects.bulk_create([
+                BumpTest(trend_chart=chart, start_time=start, end_time=start + timedelta(minutes=1)) for _ in range(3)
+            ])
+
+    def test_constant_queries(self):
+        for url, queries in (("/tuner/pid-loops/", 2), ("/tuner/identity-trend/", 4)):
+            self._add_loops(2)
+            with self.assertNumQueries(queries):
+                self.client.get(url)
+            self._add_loops(10)
+            with self.assertNumQueries(queries):
+                response = self.client.get(url)
+            self.assertContains(response, "LIC-001")
+
+    def test_search_and_type_filter(self):
+        self._add_loops(3)
+        PIDLoop.objects.filter(name="LIC-002").update(pid_type="Integrating")
+        response = self.client.get("/tuner/pid-loops/", {"q": "lic-00", "pid_type": "Integrating"})
+        self.assertEqual([loop.name for loop in response.context["loops"]], ["LIC-002"])
+
+    def test_post_addresses_one_loop(self):
+        self._add_loops(2)
+        loop = PIDLoop.objects.get(name="LIC-001")
+        response = self.client.post("/tuner/pid-loops/?page=1", {"save": loop.id, f"name_{loop.id}": "LIC-101"})
+        self.assertRedirects(response, "/tuner/pid-loops/?page=1", fetch_redirect_response=False)
+        self.assertTrue(PIDLoop.objects.filter(name="LIC-101").exists())
+
+        self.client.post("/tuner/pid-loops/", {"delete": loop.id})
+        self.assertFalse(PIDLoop.objects.filter(id=loop.id).exists())
+
+
+class TuningTests(TestCase):
+    """Loop tuning recalculated from the assigned bump tests."""
+
+    def _calculation(self, count, pid_type="1st Order"):
+        loop = PIDLoop.objects.create(name=f"TIC-{pid_type}", pid_type=pid_type)
+        chart = TrendChart.objects.create(pid_loop=loop)
+        start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        bumps = []
+        for k in range(count):
+            def at(seconds):
+                return start + timedelta(seconds=seconds + 1000 * k)
+            bumps.append(BumpTest(trend_chart=chart, start_time=at(0), end_time=at(500), T1=at(5), TCV=at(10),
+                                  T2=at(20 + k % 5), T3=at(70 + k % 7), T4=at(200), delta_cv=10.0,
+                                  delta_pv=5.0 + k % 3))
+        BumpTest.objects.bulk_create(bumps)
+        calculation = PIDCalculation.objects.get(pid_loop=loop)
+        calculation.bump_tests.add(*BumpTest.objects.filter(trend_chart=chart))
+        return PIDCalculation.objects.get(id=calculation.id)
+
+    def test_unassigning_the_last_bump_resets_the_tuning(self):
+        calculation = self._calculation(1)
+        calculation.recalculate_tuning()
+        calculation.refresh_from_db()
+        self.assertGreater(calculation.proportional_gain, 0)
+
+        bump = calculation.bump_tests.get()
+        response = self.client.post(f"/tuner/update-bump-tests/{calculation.id}/",
+                                    json.dumps({"bump_id": bump.id, "assigned": False}),
+                                    content_type="application/json")
+        self.assertEqual(response.json()["assigned_bumps"], [])
+        calculation.refresh_from_db()
+        self.assertEqual((calculation.proportional_gain, calculation.integral_time, calculation.derivative_time,
+                          calculation.min_lambda, calculation.max_lambda), (0.0, 1.0, 0.0, 1.0, 100.0))
+
+    def test_lambda_and_cohen_coon_match_the_per_bump_formulas(self):
+        for pid_type in ("1st Order", "Integrating"):
+            calculation = self._calculation(8, pid_type)
+            calculation.recalculate_tuning()
+            lam = calculation.lambda_value
+            for bump in BumpTest.objects.filter(trend_chart__pid_loop=calculation.pid_loop):
+                td = (bump.T2 - bump.TCV).total_seconds()
+                if pid_type == "1st Order":
+                    tau = (bump.T3 - bump.T2).total_seconds()
+                    kc = (bump.delta_pv / 100) / (bump.delta_cv / 100)
+                    self.assertAlmostEqual(bump.p, round(tau / (kc * (lam + td)), 3))
+                    self.assertEqual(bump.i, round(tau, 1))
+                    self.assertEqual(bump.d, round((td * tau) / (td + lam), 2))
+
+                    r = td / tau
+                    self.assertAlmostEqual(bump.kc_cohen, (tau / (kc * td)) * (4 / 3 + td / (4 * tau)))
+                    self.assertEqual(bump.i_cohen, round(td * (32 + 6 * r) / (13 + 8 * r), 1))
+                    self.assertEqual(bump.d_cohen, round(4 * td / (11 + 2 * r), 2))
+
+                    reference = BumpTest(Td=td, tau=tau, max_lambda=100.0)
+                    reference.update_dominance_and_lambda()
+                    self.assertEqual((bump.dominance, bump.min_lambda, bump.max_lambda),
+                                     (reference.dominance, reference.min_lambda, reference.max_lambda))
+                else:
+                    kc = (bump.T4 - bump.T3).total_seconds() / ((bump.T2 - bump.T1).total_seconds() * bump.delta_cv)
+                    i = round(2 * lam + td, 1)
+                    self.assertEqual(bump.i, i)
+                    self.assertAlmostEqual(bump.p, round(i / (abs(kc) * (lam + td) ** 2), 3))
+                    self.assertEqual(bump.d, 0)
+
+    def test_vectorized_tuning_broadcasts_a_lambda_axis(self):
+        kc, td, tau = np.array([0.5, 2.0]), np.array([10.0, 0.0]), np.array([50.0, 20.0])
+        lambdas = np.array([5.0, 40.0])
+        p, i, d = lambda_tuning("1st Order", kc, td, tau, lambdas[:, None])
+        self.assertEqual(p.shape, (2, 2))
+        self.assertAlmostEqual(p[1, 0], round(50 / (0.5 * (40 + 10)), 3))
+
+        # ✅ Td = 0 has no Cohen-Coon tuning; invalid inputs give NaN, never an exception
+        gain, _ti, _td = cohen_coon_tuning(kc, td, tau)
+        self.assertTrue(np.isfinite(gain[0]) and np.isnan(gain[1]))
+        self.assertTrue(np.isnan(lambda_tuning("1st Order", 0.0, 10.0, 50.0, 10.0)[0]))
+
+    def test_recalculation_skips_up_to_date_bumps(self):
+        calculation = self._calculation(5)
+        calculation.recalculate_tuning()
+        calculation = PIDCalculation.objects.select_related("pid_loop").get(id=calculation.id)
+        with self.assertNumQueries(1):  # ✅ Nothing changed: read the bumps, write nothing
+            calculation.recalculate_tuning()
+
+    def test_retune_loops_dry_run_then_write(self):
+        calculation = self._calculation(4)
+        before = (calculation.proportional_gain, calculation.integral_time)
+
+        out = io.StringIO()
+        call_command("retune_loops", workers=1, dry_run=True, stdout=out)
+        self.assertIn("Computed 1 loop(s) and 4 bump test(s)", out.getvalue())
+        calculation.refresh_from_db()
+        self.assertEqual((calculation.proportional_gain, calculation.integral_time), before)
+        self.assertFalse(BumpTest.objects.exclude(tuning_fingerprint=None).exists())
+
+        out = io.StringIO()
+        call_command("retune_loops", workers=1, stdout=out)
+        self.assertIn("Retuned 1 loop(s) and 4 bump test(s)", out.getvalue())
+        calculation.refresh_from_db()
+        self.assertNotEqual((calculation.proportional_gain, calculation.integral_time), before)
+        self.assertFalse(BumpTest.objects.filter(tuning_fingerprint=None).exists())
+
+        # ✅ A second run finds nothing to retune
+        out = io.StringIO()
+        call_command("retune_loops", workers=1, stdout=out)
+        self.assertIn("Retuned 1 loop(s) and 0 bump test(s)", out.getvalue())
+
+
+class TrendStoreTests(SimpleTestCase):
+    """Columnar trend files and the in-window scans on TrendSeries."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_chunked_write_read_round_trip(self):
+        path = os.path.join(self.directory, "chart.trend")
+        time_ns = START_NS + np.arange(10, dtype=np.int64) * 1_000_000_000
+        pv, cv = np.linspace(0, 1, 10) / 3, np.full(10, 42.5)
+
+        writer = TrendSeriesWriter(path)
+        writer.append(time_ns[5:], pv[5:], cv[5:])  # ✅ Out-of-order chunks are sorted on close
+        writer.append(time_ns[:5], pv[:5], cv[:5])
+        self.assertEqual(writer.close(), 10)
+
+        series = read_trend_series(path)
+        np.testing.assert_array_equal(series.time, time_ns)
+        np.testing.assert_array_equal(series.pv, pv)
+        self.assertEqual(series.pv.dtype, np.float64)  # ✅ Not representable in float32: kept lossless
+        self.assertEqual(series.cv.dtype, np.float32)
+        np.testing.assert_array_equal(series.cv, cv)
+        self.assertEqual(os.listdir(self.directory), ["chart.trend"])
+
+    @override_settings(TREND_INGEST_CHUNK_ROWS=7)
+    def test_newest_first_export_is_merged_in_bounded_blocks(self):
+        source = os.path.join(self.directory, "export.csv")
+        frame = pd.read_csv(io.BytesIO(trend_csv(rows=60)))
+        frame.iloc[::-1].to_csv(source, index=False)
+        path = os.path.join(self.directory, "chart.trend")
+
+        with mock.patch("tuner.trend_store.COPY_ROWS", 5):
+            stats = ingest_trend_file(source, path)
+
+        series = read_trend_series(path)
+        self.assertEqual((stats["rows_written"], stats["chunks"]), (60, 9))
+        self.assertTrue(np.all(np.diff(series.time) == 1_000_000_000))
+        np.testing.assert_allclose(series.pv, np.linspace(40, 50, 60))
+        self.assertFalse([name for name in os.listdir(self.directory) if name.endswith(".part")])
+
+    def test_overlapping_runs_merge_like_a_stable_sort(self):
+        path = os.path.join(self.directory, "chart.trend")
+        chunks = [np.array([5, 1, 3, 3]), np.array([2, 3, 9]), np.array([3, 0, 4, 8, 3])]
+        time_ns = START_NS + np.concatenate(chunks)
+        pv = np.arange(len(time_ns), dtype=float)
+
+        writer = TrendSeriesWriter(path)
+        with mock.patch("tuner.trend_store.COPY_ROWS", 4):
+            for rows in np.split(np.arange(len(time_ns)), np.cumsum([len(c) for c in chunks])[:-1]):
+                writer.append(time_ns[rows], pv[rows], pv[rows])
+            writer.close()
+
+        order = np.argsort(time_ns, kind="stable")
+        series = read_trend_series(path)
+        np.testing.assert_array_equal(series.time, time_ns[order])
+        np.testing.assert_array_equal(series.pv, pv[order])
+
+    def test_crossing_time_interpolates_between_samples(self):
+        series = TrendSeries(START_NS + np.arange(5, dtype=np.int64) * 1_000_000_000,
+                             np.array([0.0, 10.0, 20.0, 30.0, 40.0]), np.array([50.0, 50.0, 60.0, 60.0, 60.0]))
+        self.assertEqual(series.crossing_time("pv", 25.0), START_NS + 2_500_000_000)
+        self.assertEqual(series.crossing_time("pv", 0.0), START_NS)
+        self.assertIsNone(series.crossing_time("pv", 99.0))
+        self.assertEqual(series.final_value_time("cv"), START_NS + 2_000_000_000)
+
+        falling = TrendSeries(series.time, series.pv[::-1].copy(), series.cv)
+        self.assertEqual(falling.crossing_time("pv", 5.0), START_NS + 3_500_000_000)
+
+
+class DownsampleTests(SimpleTestCase):
+    """Server-side reduction keeps the endpoints, the extremes and the bump markers."""
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.x = np.arange(10_000, dtype=np.float64)
+        self.y = np.cumsum(rng.normal(size=len(self.x)))
+
+    def test_lttb_keeps_endpoints(self):
+        idx = lttb_indices(self.x, self.y, 200)
+        self.assertEqual(len(idx), 200)
+        self.assertEqual((idx[0], idx[-1]), (0, len(self.x) - 1))
+        self.assertTrue(np.all(np.diff(idx) > 0))
+
+    def test_minmax_keeps_extremes(self):
+        idx = minmax_indices(self.y, 200)
+        self.assertIn(int(self.y.argmin()), idx)
+        self.assertIn(int(self.y.argmax()), idx)
+        self.assertLessEqual(len(idx), 200)
+
+    def test_downsampled_series_keeps_endpoints_and_markers(self):
+        time_ns = START_NS + self.x.astype(np.int64) * 1_000_000_000
+        series = TrendSeries(time_ns, self.y, self.y)
+        marker = pd.Timestamp(int(time_ns[4321]), tz="UTC")
+        for method in ("lttb", "minmax"):
+            reduced = downsample_series(series, 300, keep_times=[marker], method=method)
+            self.assertLess(len(reduced), 700)
+            self.assertEqual((reduced.time[0], reduced.time[-1]), (time_ns[0], time_ns[-1]))
+            self.assertIn(time_ns[4321], reduced.time)
+
+
+class DetectionTests(SimpleTestCase):
+    """Bump windows from CV steps and T-markers from the bump window."""
+
+    def test_cv_step_gives_one_window(self):
+        series = step_series()
+        windows = detect_cv_steps(series)
+        self.assertEqual(len(windows), 1)
+        self.assertEqual(windows[0]["step_time"].value, series.time[100])
+        self.assertLess(windows[0]["start_time"].value, series.time[100])
+        self.assertAlmostEqual(windows[0]["delta_cv"], 10.0)
+
+    def test_noise_is_not_a_step(self):
+        series = step_series()
+        flat = TrendSeries(series.time, series.pv, 50.0 + np.random.default_rng(2).normal(0, 0.05, len(series)))
+        self.assertEqual(detect_cv_steps(flat), [])
+
+    def test_first_order_markers(self):
+        series = step_series()
+        seconds = {key: None if value is None else (value - START_NS) / 1e9
+                   for key, value in compute_markers(series, "1st Order").items()}
+        self.assertAlmostEqual(seconds["TCV"], 100, delta=1)
+        self.assertAlmostEqual(seconds["T2"], 111, delta=2)
+        self.assertAlmostEqual(seconds["T3"], 160, delta=2)  # ✅ 63.2 % of ΔPV: deadtime end + tau
+
+
+class FitTests(SimpleTestCase):
+    """Whole-window model identification recovers known processes."""
+
+    def test_fopdt(self):
+        fit = fit_process_model(step_series(), "FOPDT")
+        self.assertAlmostEqual(fit["gain"], 1.0, delta=0.02)
+        self.assertAlmostEqual(fit["deadtime"], 10.0, delta=1.0)
+        self.assertAlmostEqual(fit["tau"], 50.0, delta=2.0)
+        self.assertGreater(fit["confidence"], 0.95)
+
+    def test_ipdt(self):
+        fit = fit_process_model(step_series(integrating=True), "IPDT")
+        self.assertAlmostEqual(fit["gain"], 0.005, delta=0.0002)
+        self.assertAlmostEqual(fit["deadtime"], 10.0, delta=1.0)
+        self.assertAlmostEqual(fit["drift"], 0.02, delta=0.001)
+        self.assertIsNone(fit["tau"])
+
+    def test_ipdt_with_lag(self):
+        fit = fit_process_model(step_series(integrating=True, lag=20.0), "IPDT with Lag")
+        self.assertAlmostEqual(fit["gain"], 0.005, delta=0.0002)
+        self.assertAlmostEqual(fit["tau"], 20.0, delta=2.0)
+
+    def test_no_cv_step(self):
+        series = step_series()
+        self.assertIsNone(fit_process_model(TrendSeries(series.time, series.pv, np.full(len(series), 50.0))))
+
+
+class SimulateTests(SimpleTestCase):
+    """Closed-loop responses of candidate tunings on a FOPDT process (gain 1, Td 10 s, tau 50 s)."""
+
+    def test_slower_lambda_is_stable_with_less_overshoot(self):
+        p, i, d = lambda_tuning("1st Order", 1.0, 10.0, 50.0, np.array([30.0, 100.0]))
+        result = simulate(1.0, 10.0, 50.0, False, p, i, d)
+        self.assertTrue(np.all(np.isfinite(result["settling_time"])))
+        self.assertLess(result["overshoot"][1], 1.0)
+        self.assertLessEqual(result["overshoot"][1], result["overshoot"][0])
+        self.assertLess(result["settling_time"][1], 8 * (10 + 100))
+
+    def test_aggressive_tuning_never_settles(self):
+        result = simulate(1.0, 10.0, 50.0, False, 20.0, 5.0, 0.0)
+        self.assertGreater(result["overshoot"], 20.0)
+        self.assertTrue(np.isnan(result["settling_time"]))
+
+    def test_output_is_clamped(self):
+        result = simulate(1.0, 10.0, 50.0, False, 20.0, 5.0, 0.0, trajectories=True)
+        self.assertLessEqual(result["out"].max(), 50.0 + 1e-9)  # ✅ 0–100 % around a 50 % bias
+        self.assertGreaterEqual(result["out"].min(), -50.0 - 1e-9)
+
+
+@override_settings(TREND_INGEST_RUN_IN_PROCESS=False)
+class IngestionJobTests(TestCase):
+    """Queued uploads: success, failures, duplicates and timezones."""
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        self.enterContext(override_settings(MEDIA_ROOT=media))
+        self.loop = PIDLoop.objects.create(name="TIC-1")
+
+    def _upload(self, data, user_timezone="UTC", **fields):
+        response = self.client.post("/tuner/upload-trend-chart/", {
+            "pid_loop": self.loop.id, "user_timezone": user_timezone, "csv_file": SimpleUploadedFile("t.csv", data),
+            **fields})
+        process_pending_jobs()
+        return IngestionJob.objects.get(id=response.context["job"].id)
+
+    def _first_sample(self, job):
+        return pd.Timestamp(int(job.trend_chart.load_series().time[0]), tz="UTC")
+
+    def test_upload_is_ingested(self):
+        job = self._upload(trend_csv(100))
+        self.assertEqual((job.status, job.rows_written), ("done", 100))
+        self.assertEqual(len(job.trend_chart.load_series()), 100)
+        self.assertEqual(self._first_sample(job), pd.Timestamp("2025-03-03 14:00", tz="UTC"))
+
+    def test_bad_file_fails_the_job(self):
+        job = self._upload(b"a,b\n1,2\n")
+        self.assertEqual(job.status, "failed")
+        self.assertIn("Time", job.error)
+        self.assertFalse(TrendChart.objects.exists())
+        self.assertFalse(os.path.exists(job.source_file.path))
+
+    def test_failure_after_ingest_fails_the_job(self):
+        with mock.patch("tuner.jobs.TrendChart.objects.create", side_effect=RuntimeError("disk full")):
+            job = self._upload(trend_csv(100))
+        self.assertEqual((job.status, job.error), ("failed", "disk full"))
+        self.assertEqual(os.listdir(os.path.join(settings.MEDIA_ROOT, "trend_charts")), [])
+
+    def test_failure_after_wide_ingest_removes_every_data_file(self):
+        PIDLoop.objects.create(name="FIC-2")
+        data = trend_csv(100).replace(b"TIC.PV,TIC.CV", b"TIC-1.PV,TIC-1.CV,FIC-2.PV,FIC-2.CV")
+        data = b"\n".join(line + b",1.0,2.0" if index else line for index, line in enumerate(data.splitlines()))
+        with mock.patch("tuner.jobs.TrendChart.objects.bulk_create", side_effect=RuntimeError("disk full")):
+            job = self._upload(data, wide_file=True)
+        self.assertEqual((job.status, job.error), ("failed", "disk full"))
+        self.assertEqual(os.listdir(os.path.join(settings.MEDIA_ROOT, "trend_charts")), [])
+
+    def test_requeue_only_touches_stale_jobs(self):
+        started = {"crashed": now() - timedelta(hours=2), "live": now() - timedelta(minutes=5)}
+        for name, started_at in started.items():
+            IngestionJob.objects.create(pid_loop=self.loop, source_file=f"uploads/{name}.csv", original_name=name,
+                                        status="running", phase="ingesting", started_at=started_at, worker=name)
+        self.assertEqual(requeue_interrupted_jobs(timedelta(hours=1)), 1)
+        self.assertEqual(dict(IngestionJob.objects.values_list("original_name", "status")),
+                         {"crashed": "queued", "live": "running"})
+
+    def test_identical_upload_shares_data(self):
+        first = self._upload(trend_csv(100))
+        second = self._upload(trend_csv(100))
+        self.assertEqual(second.phase, "deduplicated")
+        self.assertEqual(second.trend_chart.data_file.name, first.trend_chart.data_file.name)
+
+    def test_identical_upload_in_another_timezone_is_reingested(self):
+        utc = self._upload(trend_csv(100))
+        chicago = self._upload(trend_csv(100), "America/Chicago")
+        self.assertEqual(chicago.phase, "done")
+        self.assertEqual(self._first_sample(utc), pd.Timestamp("2025-03-03 14:00", tz="UTC"))
+        self.assertEqual(self._first_sample(chicago), pd.Timestamp("2025-03-03 20:00", tz="UTC"))
+        self.assertEqual(self._upload(trend_csv(100), "America/Chicago").phase, "deduplicated")
+
+    def test_learned_profile_keeps_the_upload_timezone(self):
+        self._upload(trend_csv(100))
+        job = self._upload(trend_csv(101), "America/Chicago")
+        self.assertIsNotNone(job.import_profile_id)
+        self.assertEqual(self._first_sample(job), pd.Timestamp("2025-03-03 20:00", tz="UTC"))
+
+    def test_timestamps_with_offsets_ignore_the_upload_timezone(self):
+        job = self._upload(trend_csv(100, time_format=None), "Europe/Berlin")
+        self.assertEqual(self._first_sample(job), pd.Timestamp("2025-03-03 20:00", tz="UTC"))
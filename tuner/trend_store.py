@@ -0,0 +1,444 @@
+import hashlib
+import os
+import shutil
+import struct
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+
+# ✅ Columnar trend file layout:
+#   64-byte header: magic, version, row count, PV dtype, CV dtype
+#   int64 epoch-ns Time column, then PV column, then CV column (each padded to 8 bytes)
+TREND_MAGIC = b"PIDTREND"
+TREND_VERSION = 1
+HEADER_FORMAT = "<8sIIQ4s4s"
+HEADER_SIZE = 64
+TIME_DTYPE = np.dtype("<i8")
+COPY_ROWS = 1_000_000
+
+# ✅ Wire format for the trend data API (`format=binary`): 16-byte header, then Float64 Time + PV + CV
+WIRE_MAGIC = b"PTRD"
+WIRE_HEADER_FORMAT = "<4sIBB6x"
+
+
+def store_upload(chunks, path):
+    """Writes an upload's chunks to `path` and returns their SHA-256, hashed while streaming."""
+    digest = hashlib.sha256()
+    with open(path, "wb") as f:
+        for chunk in chunks:
+            digest.update(chunk)
+            f.write(chunk)
+    return digest.hexdigest()
+
+
+def to_ns(value):
+    """Converts a datetime/Timestamp/ISO string to UTC epoch nanoseconds (naive values are taken as UTC)."""
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")
+    return ts.value
+
+
+def from_ns(value):
+    """Converts UTC epoch nanoseconds back to a UTC-aware Timestamp (None passes through)."""
+    return None if value is None else pd.Timestamp(int(value), tz="UTC")
+
+
+def _padded(nbytes):
+    return (nbytes + 7) // 8 * 8
+
+
+class TrendSeries:
+    """Sorted Time/PV/CV arrays for one trend chart (usually memory-mapped from its data file)."""
+
+    def __init__(self, time_ns, pv, cv):
+        self.time = time_ns
+        self.pv = pv
+        self.cv = cv
+
+    def __len__(self):
+        return len(self.time)
+
+    @property
+    def nbytes(self):
+        return self.time.nbytes + self.pv.nbytes + self.cv.nbytes
+
+    def window(self, start, end):
+        """Returns the samples with start <= Time <= end; only the matching pages are touched."""
+        i0 = int(np.searchsorted(self.time, to_ns(start), side="left"))
+        i1 = int(np.searchsorted(self.time, to_ns(end), side="right"))
+        return TrendSeries(self.time[i0:i1], self.pv[i0:i1], self.cv[i0:i1])
+
+    def crossing_time(self, column, level):
+        """
+        Epoch-ns time at which `column` ("pv"/"cv") first reaches `level`, or None.
+        A single linear scan over this (already windowed) series; the time is interpolated
+        between the two samples that bracket the crossing.
+        """
+        values = np.asarray(getattr(self, column), dtype=np.float64) - level
+        if not len(values) or np.isnan(values[0]):
+            return None
+        if values[0] == 0:
+            return int(self.time[0])
+
+        reached = values >= 0 if values[0] < 0 else values <= 0
+        i = int(np.argmax(reached))
+        if not reached[i]:
+            return None
+
+        t0, t1 = int(self.time[i - 1]), int(self.time[i])
+        if np.isnan(values[i - 1]):
+            return t1
+        fraction = values[i - 1] / (values[i - 1] - values[i])
+        return t0 + int(round(fraction * (t1 - t0)))
+
+    def response_time(self, column="pv", fraction=0.632):
+        """Time at which `column` first covers `fraction` of its start-to-end change (63.2% → T3)."""
+        if not len(self):
+            return None
+        values = getattr(self, column)
+        start, end = float(values[0]), float(values[-1])
+        return self.crossing_time(column, start + fraction * (end - start))
+
+    def final_value_time(self, column="cv"):
+        """Time at which `column` first reaches its final value (TCV for the CV column)."""
+        if not len(self):
+            return None
+        return self.crossing_time(column, float(getattr(self, column)[-1]))
+
+    def to_frame(self):
+        """Returns a DataFrame with a UTC-aware Time column and float64 PV/CV."""
+        return pd.DataFrame({
+            "Time": pd.to_datetime(np.asarray(self.time), utc=True),
+            "PV": np.asarray(self.pv, dtype=np.float64),
+            "CV": np.asarray(self.cv, dtype=np.float64),
+        })
+
+    def to_columns(self):
+        """Columnar JSON payload: parallel arrays of epoch-ms Time and PV/CV (NaN → None)."""
+        def values(column):
+            column = np.asarray(column, dtype=np.float64)
+            if np.isnan(column).any():
+                return np.where(np.isnan(column), None, column).tolist()
+            return column.tolist()
+
+        return {"time": (np.asarray(self.time) // 1_000_000).tolist(), "pv": values(self.pv), "cv": values(self.cv)}
+
+    def to_wire_bytes(self):
+        """
+        Binary payload for typed-array decoding in the browser: a 16-byte header
+        (magic, row count, PV/CV byte widths) followed by Float64 epoch-ms Time, then PV and CV
+        as Float32 or Float64 (matching storage), each column padded to 8 bytes.
+        """
+        time_ms = np.asarray(self.time, dtype="<f8") / 1e6
+        pv = np.ascontiguousarray(self.pv, dtype=np.asarray(self.pv).dtype.newbyteorder("<"))
+        cv = np.ascontiguousarray(self.cv, dtype=np.asarray(self.cv).dtype.newbyteorder("<"))
+        header = struct.pack(WIRE_HEADER_FORMAT, WIRE_MAGIC, len(self), pv.itemsize, cv.itemsize)
+        return b"".join([
+            header,
+            time_ms.tobytes(),
+            pv.tobytes(), b"\0" * (_padded(pv.nbytes) - pv.nbytes),
+            cv.tobytes(), b"\0" * (_padded(cv.nbytes) - cv.nbytes),
+        ])
+
+    @classmethod
+    def from_frame(cls, df):
+        """Builds a sorted, forward-filled series from a Time/PV/CV DataFrame."""
+        df = df[["Time", "PV", "CV"]].copy()
+        df["Time"] = pd.to_datetime(df["Time"], utc=True, errors="coerce")
+        df.dropna(subset=["Time"], inplace=True)
+        df = df.sort_values(by="Time", kind="stable")
+        pv = pd.to_numeric(df["PV"], errors="coerce").ffill()
+        cv = pd.to_numeric(df["CV"], errors="coerce").ffill()
+        return cls(df["Time"].astype("int64").to_numpy(), pv.to_numpy(np.float64), cv.to_numpy(np.float64))
+
+
+def read_trend_series(path):
+    """Memory-maps a columnar trend file as a TrendSeries."""
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+
+    magic, version, _, rows, pv_code, cv_code = struct.unpack_from(HEADER_FORMAT, header)
+    if magic != TREND_MAGIC or version != TREND_VERSION:
+        raise ValueError(f"Not a trend data file: {path}")
+
+    pv_dtype = np.dtype(pv_code.rstrip(b"\0").decode())
+    cv_dtype = np.dtype(cv_code.rstrip(b"\0").decode())
+    if rows == 0:
+        return TrendSeries(np.empty(0, TIME_DTYPE), np.empty(0, pv_dtype), np.empty(0, cv_dtype))
+
+    pv_offset = HEADER_SIZE + _padded(rows * TIME_DTYPE.itemsize)
+    cv_offset = pv_offset + _padded(rows * pv_dtype.itemsize)
+    return TrendSeries(
+        np.memmap(path, dtype=TIME_DTYPE, mode="r", offset=HEADER_SIZE, shape=(rows,)),
+        np.memmap(path, dtype=pv_dtype, mode="r", offset=pv_offset, shape=(rows,)),
+        np.memmap(path, dtype=cv_dtype, mode="r", offset=cv_offset, shape=(rows,)),
+    )
+
+
+def read_legacy_csv(path):
+    """Reads a cleaned Time/PV/CV CSV (pre-columnar charts) into an in-memory TrendSeries."""
+    return TrendSeries.from_frame(pd.read_csv(path))
+
+
+def _precedes(bounds, a, b):
+    """True if run `a` can be written whole before run `b` (ties keep input order)."""
+    last, first = bounds[a][1], bounds[b][0]
+    return last < first or (last == first and a[0] < b[0])
+
+
+class TrendSeriesWriter:
+    """
+    Writes a columnar trend file from chunks of unknown total length.
+    Each chunk is sorted and spooled to per-column temp files as its own run; `close()` assembles
+    the file, merging out-of-order runs `COPY_ROWS` rows at a time so memory stays chunk-bounded.
+    PV/CV are stored as float32 when that is lossless.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.rows = 0
+        self._sorted = True
+        self._last_time = None
+        self._runs = []
+        self._f32 = {"pv": True, "cv": True}
+        self._parts = {name: f"{path}.{name}.part" for name in ("time", "pv", "cv")}
+        self._files = {name: open(part, "wb") for name, part in self._parts.items()}
+
+    def append(self, time_ns, pv, cv):
+        time_ns = np.ascontiguousarray(time_ns, dtype=TIME_DTYPE)
+        if not len(time_ns):
+            return
+
+        order = None
+        if not np.all(np.diff(time_ns) >= 0):
+            order = np.argsort(time_ns, kind="stable")
+            time_ns = time_ns[order]
+        if self._last_time is not None and time_ns[0] < self._last_time:
+            self._sorted = False
+        self._last_time = time_ns[-1]
+
+        for name, values in (("pv", pv), ("cv", cv)):
+            values = np.ascontiguousarray(values, dtype="<f8")
+            if order is not None:
+                values = values[order]
+            if self._f32[name]:
+                self._f32[name] = np.array_equal(values.astype("<f4").astype("<f8"), values, equal_nan=True)
+            values.tofile(self._files[name])
+        time_ns.tofile(self._files["time"])
+        self._runs.append((self.rows, self.rows + len(time_ns)))
+        self.rows += len(time_ns)
+
+    def close(self):
+        """Assembles the final file and returns the number of rows written."""
+        for f in self._files.values():
+            f.close()
+
+        dtypes = {name: np.dtype("<f4" if self._f32[name] else "<f8") for name in ("pv", "cv")}
+        tmp_path = f"{self.path}.part"
+        try:
+            with open(tmp_path, "wb") as out:
+                header = struct.pack(HEADER_FORMAT, TREND_MAGIC, TREND_VERSION, 0, self.rows,
+                                     dtypes["pv"].str.encode(), dtypes["cv"].str.encode())
+                out.write(header.ljust(HEADER_SIZE, b"\0"))
+
+                if self._sorted:
+                    self._copy_column(out, "time", TIME_DTYPE)
+                    self._copy_column(out, "pv", dtypes["pv"])
+                    self._copy_column(out, "cv", dtypes["cv"])
+                else:
+                    # ✅ Out-of-order exports: merge the sorted runs so readers can binary-search
+                    self._merge_runs(out, dtypes)
+            os.replace(tmp_path, self.path)
+        finally:
+            self._cleanup()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return self.rows
+
+    def _merge_runs(self, out, dtypes):
+        """Writes the runs in time order, one block of at most `COPY_ROWS` rows at a time."""
+        dtypes = {"time": TIME_DTYPE, **dtypes}
+        offsets = {"time": HEADER_SIZE}
+        offsets["pv"] = offsets["time"] + _padded(self.rows * TIME_DTYPE.itemsize)
+        offsets["cv"] = offsets["pv"] + _padded(self.rows * dtypes["pv"].itemsize)
+        end = offsets["cv"] + _padded(self.rows * dtypes["cv"].itemsize)
+        written = 0
+
+        def emit(block):
+            nonlocal written
+            for name, values in block.items():
+                out.seek(offsets[name] + written * dtypes[name].itemsize)
+                values.astype(dtypes[name]).tofile(out)
+            written += len(block["time"])
+
+        # ✅ Runs that don't overlap (e.g. newest-first exports) are just copied in time order
+        bounds = {run: (self._read(run[0], run[0] + 1)["time"][0], self._read(run[1] - 1, run[1])["time"][0])
+                  for run in self._runs}
+        runs = sorted(self._runs, key=lambda run: (bounds[run][0], run[0]))
+        if all(_precedes(bounds, a, b) for a, b in zip(runs, runs[1:])):
+            for start, stop in runs:
+                for block in range(start, stop, COPY_ROWS):
+                    emit(self._read(block, min(block + COPY_ROWS, stop)))
+        else:
+            self._merge_overlapping(emit)
+        out.truncate(end)
+
+    def _merge_overlapping(self, emit):
+        """
+        K-way merge of overlapping runs: each run buffers a window of `COPY_ROWS // len(runs)` rows;
+        every block emits all buffered rows up to the smallest window end of a run that has more rows.
+        Equal times keep their input order, as a stable sort of the whole column would.
+        """
+        window = max(1, COPY_ROWS // len(self._runs))
+        cursors = [start for start, _ in self._runs]
+        stops = [stop for _, stop in self._runs]
+        buffers = [None] * len(self._runs)
+
+        while True:
+            live = [i for i in range(len(cursors)) if cursors[i] < stops[i]]
+            if not live:
+                break
+            for i in live:
+                if buffers[i] is None or not len(buffers[i]["time"]):
+                    buffers[i] = self._read(cursors[i], min(cursors[i] + window, stops[i]))
+
+            limiting = [i for i in live if cursors[i] + len(buffers[i]["time"]) < stops[i]]
+            limit = min(limiting, key=lambda i: (buffers[i]["time"][-1], i)) if limiting else None
+            taken = {}
+            for i in live:
+                if limit is None:
+                    taken[i] = len(buffers[i]["time"])
+                else:
+                    side = "right" if i <= limit else "left"
+                    taken[i] = int(np.searchsorted(buffers[i]["time"], buffers[limit]["time"][-1], side=side))
+
+            block = {name: np.concatenate([buffers[i][name][:n] for i, n in taken.items()])
+                     for name in ("time", "pv", "cv")}
+            order = np.argsort(block["time"], kind="stable")
+            emit({name: values[order] for name, values in block.items()})
+            for i, n in taken.items():
+                cursors[i] += n
+                buffers[i] = {name: values[n:] for name, values in buffers[i].items()}
+
+    def _read(self, start, stop):
+        """Reads rows `start:stop` of the spooled columns."""
+        block = {}
+        for name in ("time", "pv", "cv"):
+            dtype = TIME_DTYPE if name == "time" else np.dtype("<f8")
+            block[name] = np.fromfile(self._parts[name], dtype=dtype, count=stop - start,
+                                      offset=start * dtype.itemsize)
+        return block
+
+    def abort(self):
+        for f in self._files.values():
+            f.close()
+        self._cleanup()
+
+    def _copy_column(self, out, name, dtype):
+        if dtype == TIME_DTYPE or dtype == np.dtype("<f8"):
+            with open(self._parts[name], "rb") as src:
+                shutil.copyfileobj(src, out)
+        else:
+            with open(self._parts[name], "rb") as src:
+                while True:
+                    values = np.fromfile(src, dtype="<f8", count=COPY_ROWS)
+                    if not len(values):
+                        break
+                    values.astype(dtype).tofile(out)
+        out.write(b"\0" * (_padded(self.rows * dtype.itemsize) - self.rows * dtype.itemsize))
+
+    def _cleanup(self):
+        for part in self._parts.values():
+            if os.path.exists(part):
+                os.remove(part)
+
+
+def write_trend_series(path, series):
+    """Writes an in-memory TrendSeries to a columnar trend file."""
+    writer = TrendSeriesWriter(path)
+    writer.append(series.time, series.pv, series.cv)
+    return writer.close()
+
+
+class TrendCache:
+    """
+    Process-wide LRU cache of loaded TrendSeries, keyed by chart id and validated by file mtime/size.
+    Entries are evicted least-recently-used first once `max_bytes` is exceeded.
+    """
+
+    def __init__(self, max_bytes=None):
+        self._max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def max_bytes(self):
+        if self._max_bytes is None:
+            return getattr(settings, "TREND_CACHE_MAX_BYTES", 256 * 1024 * 1024)
+        return self._max_bytes
+
+    def get(self, chart_id, path, loader):
+        """Returns the cached series for `chart_id`, calling `loader(path)` on a miss or stale file."""
+        stat = os.stat(path)
+        stamp = (path, stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(chart_id)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(chart_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        series = loader(path)
+
+        with self._lock:
+            self._discard(chart_id)
+            if series.nbytes <= self.max_bytes:
+                self._entries[chart_id] = (stamp, series)
+                self.bytes += series.nbytes
+                while self.bytes > self.max_bytes:
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self.bytes -= evicted.nbytes
+                    self.evictions += 1
+        return series
+
+    def invalidate(self, chart_id):
+        with self._lock:
+            if self._discard(chart_id):
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _discard(self, chart_id):
+        entry = self._entries.pop(chart_id, None)
+        if entry is not None:
+            self.bytes -= entry[1].nbytes
+        return entry is not None
+
+
+trend_cache = TrendCache()
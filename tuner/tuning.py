@@ -0,0 +1,199 @@
+import hashlib
+import numpy as np
+
+
+# ✅ Vectorized tuning engine: every function takes NumPy arrays (one entry per bump test) and
+#   broadcasts, so a lambda axis can be added for sweeps. Invalid inputs give NaN, never an exception.
+INTEGRATING_TYPES = ("Integrating", "Integrating with Lag")
+FIT_MODELS = {
+    "1st Order": ("FOPDT",),
+    "Integrating": ("IPDT", "IPDT with Lag"),
+    "Integrating with Lag": ("IPDT", "IPDT with Lag"),
+}
+
+MARKER_COLUMNS = ("T1", "T2", "T3", "T4", "TCV")
+VALUE_COLUMNS = ("kc", "Td", "tau", "delta_pv", "delta_cv", "min_lambda", "max_lambda",
+                 "p", "i", "d", "kc_cohen", "i_cohen", "d_cohen")
+
+# ✅ Inputs of a bump's tuning besides the loop and lambda; bump TUNING_VERSION when the formulas change
+FINGERPRINT_FIELDS = ("T1", "T2", "T3", "T4", "TCV", "delta_pv", "delta_cv", "fit_model", "fitted_at")
+TUNING_VERSION = 1
+
+
+def bump_arrays(bumps):
+    """Marker times (epoch seconds) and stored parameters of bump tests as float arrays (NaN for None)."""
+    arrays = {
+        key: np.array([getattr(b, key).timestamp() if getattr(b, key) else np.nan for b in bumps], dtype=float)
+        for key in MARKER_COLUMNS
+    }
+    arrays.update({
+        key: np.array([np.nan if getattr(b, key) is None else getattr(b, key) for b in bumps], dtype=float)
+        for key in VALUE_COLUMNS
+    })
+    arrays["fit_model"] = np.array([b.fit_model or "" for b in bumps], dtype=object)
+    return arrays
+
+
+def process_parameters(pid_type, arrays, pv_span, out_span):
+    """
+    Process gain, deadtime and time constant per bump: the fitted model where one exists for the loop
+    type, otherwise the marker formulas (1st Order: Td = T2 - TCV, tau = T3 - T2, normalized ΔPV/ΔCV gain;
+    integrating: kc = (T4 - T3) / ((T2 - T1)·ΔCV), Td = T2 - TCV). Returns (kc, Td, tau) arrays.
+    """
+    fitted = np.isin(arrays["fit_model"], FIT_MODELS.get(pid_type, ()))
+    delta_cv = np.where(arrays["delta_cv"] == 0, np.nan, arrays["delta_cv"])
+
+    if pid_type in INTEGRATING_TYPES:
+        kc = (arrays["T4"] - arrays["T3"]) / ((arrays["T2"] - arrays["T1"]) * delta_cv)
+        td = arrays["T2"] - arrays["TCV"]
+        tau = arrays["tau"]
+    else:
+        kc = (arrays["delta_pv"] / (pv_span or np.nan)) / (delta_cv / (out_span or np.nan))
+        td = arrays["T2"] - arrays["TCV"]
+        tau = arrays["T3"] - arrays["T2"]
+
+    return (np.where(fitted, arrays["kc"], kc),
+            np.where(fitted, arrays["Td"], td),
+            np.where(fitted, arrays["tau"], tau))
+
+
+def lambda_tuning(pid_type, kc, td, tau, lambda_value):
+    """
+    Lambda tuning (P gain, integral time, derivative time) rounded like the stored values.
+    1st Order: P = tau / (kc·(λ + Td)), I = tau, D = Td·tau / (Td + λ).
+    Integrating: I = 2λ + Td, P = I / (|kc|·(λ + Td)²), D = 0.
+    """
+    kc, td, tau, lambda_value = (np.asarray(v, dtype=float) for v in (kc, td, tau, lambda_value))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if pid_type in INTEGRATING_TYPES:
+            i = 2 * lambda_value + td
+            p = i / (np.abs(kc) * (lambda_value + td) ** 2)
+            d = np.zeros_like(p)
+        else:
+            p = tau / (kc * (lambda_value + td))
+            i = tau + 0 * p
+            d = (td * tau) / (td + lambda_value)
+
+    valid = np.isfinite(p) & np.isfinite(i) & np.isfinite(d)
+    return (np.where(valid, np.round(p, 3), np.nan), np.where(valid, np.round(i, 1), np.nan),
+            np.where(valid, np.round(d, 2), np.nan))
+
+
+def cohen_coon_tuning(kc, td, tau):
+    """
+    Cohen-Coon PID tuning for self-regulating (first order plus deadtime) processes:
+    Kc = (tau / (kc·Td))·(4/3 + Td / (4·tau)), Ti = Td·(32 + 6r) / (13 + 8r), Td' = 4·Td / (11 + 2r), r = Td / tau.
+    Returns (controller gain, integral time, derivative time); NaN where Td or tau is not positive.
+    """
+    kc, td, tau = (np.asarray(v, dtype=float) for v in (kc, td, tau))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = np.where((td > 0) & (tau > 0), td / tau, np.nan)
+        gain = (1 / (kc * r)) * (4 / 3 + r / 4)
+        ti = td * (32 + 6 * r) / (13 + 8 * r)
+        td_d = 4 * td / (11 + 2 * r)
+
+    valid = np.isfinite(gain) & np.isfinite(ti) & np.isfinite(td_d)
+    return (np.where(valid, gain, np.nan), np.where(valid, np.round(ti, 1), np.nan),
+            np.where(valid, np.round(td_d, 2), np.nan))
+
+
+def dominance_and_limits(td, tau, max_lambda):
+    """
+    Vectorized `BumpTest.update_dominance_and_lambda`: returns (dominance, min_lambda, max_lambda, valid)
+    with tau/Td ≤ 2 dead time dominant, ≥ 4 lag time dominant; General keeps its max_lambda unless Td is 0.
+    """
+    valid = np.isfinite(td) & np.isfinite(tau) & (tau > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(td == 0, 3.0, tau / td)  # ✅ Td = 0 is treated as General
+
+    dominance = np.where(ratio <= 2, "Dead Time Dominant", np.where(ratio >= 4, "Lag Time Dominant", "General"))
+    min_lambda = np.select(
+        [td == 0, dominance == "Dead Time Dominant", dominance == "Lag Time Dominant"],
+        [0.8 * tau, 2 * td, 0.8 * tau],
+        np.maximum(2 * td, 0.8 * tau),
+    )
+    max_lambda = np.where((td == 0) | (dominance != "General"), 4 * tau, max_lambda)
+    return dominance, min_lambda, max_lambda, valid
+
+
+def aggregate_tuning(p, i, d):
+    """
+    Loop tuning as the mean over bumps (last axis) of the bumps that produced a tuning, rounded like
+    `PIDCalculation`: returns {"kp", "ti", "td", "count"}, NaN where no bump could be tuned.
+    """
+    valid = np.isfinite(p)
+    count = valid.sum(axis=-1)
+    weight = np.where(valid, 1.0, 0.0) / np.where(count, count, np.nan)[..., None]
+    return {
+        "kp": np.round((np.where(valid, p, 0.0) * weight).sum(axis=-1), 3),
+        "ti": np.round((np.where(valid, i, 0.0) * weight).sum(axis=-1), 1),
+        "td": np.round((np.where(valid, d, 0.0) * weight).sum(axis=-1), 2),
+        "count": count,
+    }
+
+
+def tune_bumps(pid_type, arrays, pv_span, out_span, lambda_value):
+    """
+    Per-bump tuning from `bump_arrays`: process parameters, Lambda and Cohen-Coon tunings, dominance
+    and lambda limits, and the `tuned`/`cohen` masks. Pure NumPy in and out, so it can run in worker
+    processes.
+    """
+    kc, td, tau = process_parameters(pid_type, arrays, pv_span, out_span)
+    p, i, d = lambda_tuning(pid_type, kc, td, tau, lambda_value)
+    if pid_type in INTEGRATING_TYPES:
+        kc_cohen = i_cohen = d_cohen = np.full(len(p), np.nan)  # ✅ Cohen-Coon needs a self-regulating process
+    else:
+        kc_cohen, i_cohen, d_cohen = cohen_coon_tuning(kc, td, tau)
+    dominance, min_lambda, max_lambda, limits = dominance_and_limits(td, tau, arrays["max_lambda"])
+    return {
+        "kc": kc, "td": td, "tau": tau, "p": p, "i": i, "d": d,
+        "kc_cohen": kc_cohen, "i_cohen": i_cohen, "d_cohen": d_cohen,
+        "dominance": dominance, "min_lambda": min_lambda, "max_lambda": max_lambda, "limits": limits,
+        "tuned": np.isfinite(p), "cohen": np.isfinite(kc_cohen),
+    }
+
+
+def tune_chunk(inputs):
+    """`tune_bumps` over a chunk of loops (argument tuples); the unit of work of fleet retuning workers."""
+    return [tune_bumps(*args) for args in inputs]
+
+
+def loop_tuning(pid_type, tuning_method, arrays, tuned):
+    """
+    Loop tuning from the stored per-bump values (`bump_arrays`) of the bumps in the `tuned` mask: the
+    mean Lambda (or Cohen-Coon) P/I/D and the tightest lambda limits, as {"kp", "ti", "td", "min_lambda",
+    "max_lambda"}; None when no bump qualifies.
+    """
+    if tuning_method == "cohen_coon":
+        cohen = np.isfinite(arrays["kc_cohen"]) & (arrays["Td"] > 0) & (arrays["tau"] > 0)
+        selected = tuned & cohen & (pid_type not in INTEGRATING_TYPES)
+        gains, integrals, derivatives = arrays["kc_cohen"], arrays["i_cohen"], arrays["d_cohen"]
+    else:
+        selected = tuned & np.isfinite(arrays["p"])
+        gains, integrals, derivatives = arrays["p"], arrays["i"], arrays["d"]
+    if not selected.any():
+        return None
+
+    aggregate = aggregate_tuning(gains[selected], integrals[selected], derivatives[selected])
+    return {
+        "kp": float(aggregate["kp"]), "ti": float(aggregate["ti"]), "td": float(aggregate["td"]),
+        "min_lambda": round(float(arrays["min_lambda"][selected].max()), 1),
+        "max_lambda": round(float(arrays["max_lambda"][selected].min()), 1),
+    }
+
+
+def bump_fingerprints(bumps, pid_loop, lambda_value):
+    """
+    Fingerprint of every input of a bump's tuning: its markers, deltas and fitted model, the loop's
+    type and limits, the lambda and TUNING_VERSION. A bump whose stored fingerprint matches is up to date.
+    """
+    shared = (TUNING_VERSION, pid_loop.pid_type, pid_loop.pv_min, pid_loop.pv_max, pid_loop.out_min,
+              pid_loop.out_max, float(lambda_value))
+    def value(b, key):
+        value = getattr(b, key)
+        return value.timestamp() if hasattr(value, "timestamp") else value  # ✅ Same instant, same print
+
+    return [
+        hashlib.sha1(repr(shared + tuple(value(b, key) for key in FINGERPRINT_FIELDS)).encode()).hexdigest()
+        for b in bumps
+    ]
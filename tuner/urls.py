@@ -1,8 +1,8 @@
 from django.urls import path
-from .views import upload_trend_chart, trend_chart_list, view_trend_chart, save_bump
-from .views import delete_bump, identity_trend, identity_trend_detail, update_t1_t2
-from .views import pid_calculation_list, pid_calculation_detail, recalculate_pid
-from .views import PIDLoopCreateView
+from .views import upload_trend_chart, bulk_upload_trend_charts, trend_chart_list, view_trend_chart, save_bump
+from .views import delete_bump, detect_bumps, mark_bumps, fit_bumps, identity_trend, identity_trend_detail, update_t1_t2
+from .views import pid_calculation_list, pid_calculation_detail, recalculate_pid, lambda_sweep, simulate_pid, robustness
+from .views import PIDLoopCreateView, trend_cache_stats, trend_chart_data, ingestion_job_status
 
 from .views import (
     pid_loop_list, pid_loop_detail, pid_loop_create)
@@ -16,9 +16,16 @@ urlpatterns = [
     path("pid-calculation/<int:loop_id>/", pid_calculation_detail, name="pid_calculation_detail"),
     path('pid-loop/new/', PIDLoopCreateView.as_view(), name='pid_loop_create'),
     path("upload-trend-chart/", upload_trend_chart, name="upload_trend_chart"),
+    path("upload-trend-charts/bulk/", bulk_upload_trend_charts, name="bulk_upload_trend_charts"),
     path("trend-charts/", trend_chart_list, name="trend_chart_list"),
     path("trend-chart/<int:chart_id>/", view_trend_chart, name="view_trend_chart"),
+    path("trend-chart/<int:chart_id>/data/", trend_chart_data, name="trend_chart_data"),
+    path("trend-cache/stats/", trend_cache_stats, name="trend_cache_stats"),
+    path("ingestion-job/<int:job_id>/", ingestion_job_status, name="ingestion_job_status"),
     path("save-bump/<int:chart_id>/", save_bump, name="save_bump"),
+    path("trend-chart/<int:chart_id>/detect-bumps/", detect_bumps, name="detect_bumps"),
+    path("trend-chart/<int:chart_id>/mark-bumps/", mark_bumps, name="mark_bumps"),
+    path("trend-chart/<int:chart_id>/fit-bumps/", fit_bumps, name="fit_bumps"),
     path("update-bump-tests/<int:pid_calculation_id>/", update_bump_tests, name="update_bump_tests"),
     path("delete-bump/", delete_bump, name="delete_bump"),
     path('identity-trend/', identity_trend, name='identity_trend_list'),
@@ -26,6 +33,9 @@ urlpatterns = [
     path("update_t1_t2/<int:bump_test_id>/", update_t1_t2, name="update_t1_t2"),
     path("pid-calculations/", pid_calculation_list, name="pid_calculation_list"),
     path("recalculate-pid/<int:loop_id>/", recalculate_pid, name="recalculate_pid"),
+    path("pid-calculation/<int:loop_id>/lambda-sweep/", lambda_sweep, name="lambda_sweep"),
+    path("pid-calculation/<int:loop_id>/simulate/", simulate_pid, name="simulate_pid"),
+    path("pid-calculation/<int:loop_id>/robustness/", robustness, name="robustness"),
 ]
 
 
@@ -1,41 +1,81 @@
 from dateutil import parser  # Ensure this is imported at the top
 import pandas as pd, uuid
-from .models import PIDLoop, PIDCalculation, LambdaVariable, BumpTest, TrendChart
-from .forms import TrendChartUploadForm, PIDLoopForm
-import json, os, pytz
+from .models import PIDLoop, PIDCalculation, LambdaVariable, BumpTest, TrendChart, IngestionJob
+from .forms import TrendChartUploadForm, BulkTrendUploadForm, PIDLoopForm
+from .jobs import enqueue_ingestion
+from .bulk import bulk_ingest_archive
+from .trend_store import trend_cache, from_ns, store_upload
+from .downsample import downsample_series, bump_keep_times, pyramid_window
+from .simulate import SIM_STEPS
+from .robustness import LAMBDA_STEPS, PERTURBATION_STEPS, GAIN_UNCERTAINTY, DEADTIME_UNCERTAINTY
+import json, logging, os, pytz
 from datetime import datetime, timedelta
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.timezone import is_aware, make_aware
 from django.utils.dateparse import parse_datetime
 from django.conf import settings
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 from django.views.generic import CreateView
+from django.core.paginator import Paginator
+from django.db.models import Q, F, Func, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+from urllib.parse import urlencode
 import numpy as np
 
-def pid_loop_list(request):
-    loops = PIDLoop.objects.all()
+logger = logging.getLogger(__name__)
+
+
+def _loop_page(request, queryset, per_page):
+    """
+    Filters loops by the `q` (name/description search) and `pid_type` query parameters and returns
+    (page, filters) for the `page` parameter; `filters` echoes the parameters for links and forms.
+    """
+    query = request.GET.get("q", "").strip()
+    pid_type = request.GET.get("pid_type", "")
+    if query:
+        queryset = queryset.filter(Q(name__icontains=query) | Q(description__icontains=query))
+    if pid_type in dict(PIDLoop.PID_TYPE_CHOICES):
+        queryset = queryset.filter(pid_type=pid_type)
+
+    page = Paginator(queryset.order_by("name", "id"), per_page).get_page(request.GET.get("page"))
+    filters = {"q": query, "pid_type": pid_type, "pid_type_choices": PIDLoop.PID_TYPE_CHOICES,
+               "querystring": urlencode({k: v for k, v in (("q", query), ("pid_type", pid_type)) if v})}
+    return page, filters
 
-    if request.method == "POST":
-        # Handle Delete Action
-        for loop in loops:
-            if f"delete_{loop.id}" in request.POST:
-                loop.delete()
-                return redirect("tuner:pid_loop_list")  # Redirect to refresh the list after deletion
 
-        # Handle Save (Edit) Action
-        for loop in loops:
-            if f"save_{loop.id}" in request.POST:
-                loop.name = request.POST.get(f"name_{loop.id}", loop.name)
-                loop.pid_type = request.POST.get(f"pid_type_{loop.id}", loop.pid_type)
-                loop.description = request.POST.get(f"description_{loop.id}", loop.description)
-                loop.save()
-                break  # Process only the edited row to prevent unintended saves
+def _count(queryset):
+    """Row count of a correlated queryset, as an annotation."""
+    return Coalesce(Subquery(queryset.order_by().values("pk").annotate(n=Func(F("pk"), function="COUNT"))
+                             .values("n")[:1]), 0)
 
-        return redirect("tuner:pid_loop_list")  # Redirect to refresh the page
 
-    return render(request, "tuner/pid_loop_list.html", {"loops": loops})
+def pid_loop_list(request):
+    if request.method == "POST":
+        # ✅ The pressed button carries the loop id, so only that row is loaded
+        loop_id = request.POST.get("delete") or request.POST.get("save")
+        loop = get_object_or_404(PIDLoop, id=loop_id) if str(loop_id or "").isdigit() else None
+        if loop is not None and "delete" in request.POST:
+            loop.delete()
+        elif loop is not None:
+            loop.name = request.POST.get(f"name_{loop.id}", loop.name)
+            pid_type = request.POST.get(f"pid_type_{loop.id}", loop.pid_type)
+            loop.pid_type = pid_type if pid_type in dict(PIDLoop.PID_TYPE_CHOICES) else loop.pid_type
+            loop.description = request.POST.get(f"description_{loop.id}", loop.description)
+            loop.save(update_fields=["name", "pid_type", "description"])
+
+        # ✅ Back to the same page, search and filter
+        query = request.GET.urlencode()
+        return redirect(reverse("tuner:pid_loop_list") + (f"?{query}" if query else ""))
+
+    # ✅ Counts as correlated subqueries, evaluated only for the rows of the page
+    loops = PIDLoop.objects.only("id", "name", "pid_type", "description").annotate(
+        trend_chart_count=_count(TrendChart.objects.filter(pid_loop=OuterRef("pk"))),
+        bump_test_count=_count(BumpTest.objects.filter(trend_chart__pid_loop=OuterRef("pk"))),
+    )
+    page, filters = _loop_page(request, loops, settings.TUNER_LOOPS_PER_PAGE)
+    return render(request, "tuner/pid_loop_list.html", {"loops": page, "page_obj": page, **filters})
 
 
 def pid_loop_detail(request, loop_id):
@@ -68,7 +108,7 @@ class PIDLoopCreateView(CreateView):
 
 
 def upload_trend_chart(request):
-    preview_data = None
+    """Saves the upload and queues it for background ingestion; the page then polls the job status."""
     user_timezone = request.POST.get("user_timezone", "UTC")
 
     if request.method == "POST":
@@ -84,83 +124,30 @@ def upload_trend_chart(request):
         # ✅ Generate unique filename
         unique_filename = f"{uuid.uuid4()}_{file.name}"
         file_path = os.path.join(settings.MEDIA_ROOT, "trend_charts", unique_filename)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
 
-        with open(file_path, "wb") as f:
-            for chunk in file.chunks():
-                f.write(chunk)
+        content_hash = store_upload(file.chunks(), file_path)  # ✅ Hashed while streaming to disk
 
         # ✅ Detect delimiter
         file_ext = os.path.splitext(file.name)[-1].lower()
         delimiter = "," if file_ext == ".csv" else "\t"
 
-        # ✅ Read CSV file
-        try:
-            df = pd.read_csv(file_path, delimiter=delimiter, dtype=str)
-            print(f"📂 Raw DataFrame Columns: {df.columns.tolist()}")
-            print(f"📂 Raw DataFrame Head:\n{df.head()}")
-        except Exception as e:
-            return JsonResponse({"error": f"Error reading file: {str(e)}"}, status=400)
-
-        # ✅ Ensure "Time" column exists
-        time_col = next((col for col in df.columns if "time" in col.lower()), None)
-        if not time_col:
-            return JsonResponse({"error": "Missing 'Time' column in CSV."}, status=400)
-
-        # ✅ Detect PV and CV columns dynamically
-        pv_col = next((col for col in df.columns if "pv" in col.lower()), None)
-        cv_col = next((col for col in df.columns if "cv" in col.lower()), None)
-        if not pv_col or not cv_col:
-            return JsonResponse({"error": "Missing PV/CV columns in CSV."}, status=400)
-
-        # ✅ Rename columns for consistency
-        df.rename(columns={time_col: "Time", pv_col: "PV", cv_col: "CV"}, inplace=True)
-
-        # ✅ Use dateutil.parser for flexible datetime parsing
-        df["Time"] = df["Time"].apply(lambda x: parser.parse(x) if pd.notna(x) else pd.NaT)
-
-        # 🚨 Check if no valid timestamps were found
-        if df["Time"].isna().all():
-            print("🚨 ERROR: No valid timestamps found after trying all formats!")
-            return JsonResponse({"error": "Processed CSV has no valid timestamps."}, status=400)
-
-        # ✅ Drop NaT timestamps
-        df.dropna(subset=["Time"], inplace=True)
-
-        # ✅ Convert Time to UTC
-        try:
-            user_tz = pytz.timezone(user_timezone)
-            df["Time"] = df["Time"].dt.tz_localize(user_tz).dt.tz_convert(pytz.utc)
-        except Exception as e:
-            return JsonResponse({"error": f"Invalid timezone conversion: {str(e)}"}, status=400)
-
-        # ✅ Convert PV and CV to numeric
-        df["PV"] = pd.to_numeric(df["PV"], errors="coerce")
-        df["CV"] = pd.to_numeric(df["CV"], errors="coerce")
-
-        # ✅ Forward-fill missing PV and CV values
-        df["PV"] = df["PV"].ffill()
-        df["CV"] = df["CV"].ffill()
-
-        # ✅ Print debugging info to confirm forward-fill
-        print(f"✅ Final Processed Data (First 5 Rows After Fill-Forward):\n{df.head()}")
-
-        # ✅ Save cleaned file before storing in the database
-        df.to_csv(file_path, index=False, encoding="utf-8")
-
-        # ✅ Save TrendChart instance
-        trend_chart = form.save(commit=False)
-        trend_chart.csv_file = os.path.join("trend_charts", unique_filename)  # 🛠️ Fix path issue
-        trend_chart.save()
-
-        # ✅ Extract preview data (first 20 rows)
-        preview_data = df.head(20).to_dict(orient="records")
-
-        print(f"✅ Processed file saved: {file.name}")
-        print(f"📊 Preview Data Sent to Template:\n {preview_data}")
+        # ✅ Parsing, timezone conversion and forward-fill run in the background; the chart appears when done
+        job = enqueue_ingestion(
+            pid_loop=form.cleaned_data["pid_loop"],
+            description=form.cleaned_data.get("description"),
+            source_name=os.path.join("trend_charts", unique_filename),
+            original_name=file.name,
+            delimiter=delimiter,
+            user_timezone=user_timezone,
+            content_hash=content_hash,
+            mode="wide" if form.cleaned_data.get("wide_file") else "single",
+        )
+        logger.info("Queued ingestion job %s for %s (%s)", job.id, file.name, job.status)
 
         return render(request, "tuner/upload_trend_chart.html", {
-            "form": form,
-            "preview_data": preview_data,
+            "form": TrendChartUploadForm(),
+            "job": job,
         })
 
     else:
@@ -169,6 +156,72 @@ def upload_trend_chart(request):
     return render(request, "tuner/upload_trend_chart.html", {"form": form})
 
 
+def ingestion_job_status(request, job_id):
+    """Progress of a background ingestion job: phase, rows processed and throughput."""
+    job = get_object_or_404(IngestionJob, id=job_id)
+    payload = {
+        "job_id": job.id,
+        "file": job.original_name,
+        "status": job.status,
+        "phase": job.phase,
+        "rows_processed": job.rows_processed,
+        "rows_written": job.rows_written,
+        "elapsed_seconds": round(job.elapsed_seconds(), 2),
+        "rows_per_second": job.rows_per_second(),
+        "error": job.error,
+        "trend_chart_id": job.trend_chart_id,
+        "import_profile": job.import_profile.name if job.import_profile_id else None,
+    }
+    if job.status == "done" and job.trend_chart_id:
+        payload["chart_url"] = reverse("tuner:view_trend_chart", args=[job.trend_chart_id])
+        payload["preview"] = job.preview
+    if job.mode == "wide":
+        # ✅ One entry per tag: its loop and chart, or why it was skipped
+        payload["charts"] = [
+            {**entry, "chart_url": reverse("tuner:view_trend_chart", args=[entry["trend_chart_id"]])
+             if entry["trend_chart_id"] else None}
+            for entry in job.report
+        ]
+    return JsonResponse(payload)
+
+
+def trend_cache_stats(request):
+    """Returns hit/miss/eviction counters of this process's trend cache (for sizing TREND_CACHE_MAX_BYTES)."""
+    return JsonResponse(trend_cache.stats())
+
+
+def bulk_upload_trend_charts(request):
+    """Bulk mode: an archive of exports plus manifest.csv, parsed in a process pool, charts created in one transaction."""
+    if request.method != "POST":
+        return render(request, "tuner/bulk_upload_trend_charts.html", {"form": BulkTrendUploadForm()})
+
+    form = BulkTrendUploadForm(request.POST, request.FILES)
+    if not form.is_valid():
+        return JsonResponse({"error": "Invalid form submission."}, status=400)
+
+    archive = form.cleaned_data["archive"]
+    archive_path = os.path.join(settings.MEDIA_ROOT, "trend_charts", f"{uuid.uuid4()}_{archive.name}")
+    os.makedirs(os.path.dirname(archive_path), exist_ok=True)
+    store_upload(archive.chunks(), archive_path)
+
+    try:
+        reports = bulk_ingest_archive(archive_path, user_timezone=request.POST.get("user_timezone", "UTC"))
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    finally:
+        os.remove(archive_path)  # ✅ Extracted files are kept; the archive itself is not
+
+    created = sum(1 for report in reports if report["trend_chart_id"])
+    logger.info("Bulk upload %s: %s/%s file(s) ingested", archive.name, created, len(reports))
+
+    return render(request, "tuner/bulk_upload_trend_charts.html", {
+        "form": BulkTrendUploadForm(),
+        "reports": reports,
+        "created": created,
+        "failed": len(reports) - created,
+    })
+
+
 def trend_chart_list(request):
     charts = TrendChart.objects.all()
     print("Charts Found:", charts)  # Debugging line
@@ -178,105 +231,95 @@ def trend_chart_list(request):
 def view_trend_chart(request, chart_id):
     """View a trend chart ensuring all timestamps are correctly parsed and display saved bump tests."""
 
-    from django.http import JsonResponse
-    import pandas as pd
-
     trend_chart = get_object_or_404(TrendChart, id=chart_id)
 
-    if not trend_chart.csv_file:
+    # ✅ Memory-mapped, already sorted and forward-filled series (no CSV re-parse)
+    series = trend_chart.load_series()
+    if series is None:
         return JsonResponse({"error": "File not found."})
 
-    # ✅ Read CSV file
-    df = pd.read_csv(trend_chart.csv_file.path)
-
-    print(f"🔍 Raw Data from CSV ({len(df)} rows):\n", df.head(10))
-
-    if "Time" not in df.columns:
-        return JsonResponse({"error": "Missing 'Time' column in trend file!"}, status=400)
-
-    # ✅ Known timestamp formats to check
-    known_formats = [
-        "%Y-%m-%d %H:%M:%S.%f%z",  # Format with microseconds and timezone
-        "%Y-%m-%d %H:%M:%S%z",  # Format without microseconds
-        "%Y-%m-%d %H:%M:%S",  # Standard format without timezone
-        "%m/%d/%Y %I:%M:%S %p",  # MM/DD/YYYY hh:mm:ss AM/PM
-    ]
-
-    def try_parsing_time(time_str):
-        """Attempts parsing using predefined formats."""
-        if pd.isna(time_str) or not isinstance(time_str, str):
-            return None
-
-        for fmt in known_formats:
-            try:
-                return datetime.strptime(time_str, fmt)
-            except ValueError:
-                continue
-
-        return pd.NaT  # Return NaT if parsing fails
-
-    # ✅ Apply explicit parsing instead of relying on Pandas auto-inference
-    df["Time"] = df["Time"].apply(try_parsing_time)
-
-    # 🚨 Debug: Count invalid timestamps (NaT)
-    invalid_times = df["Time"].isna().sum()
-    print(f"⚠️ Invalid Time Entries After Parsing: {invalid_times}")
-
-    # ✅ Drop NaT (invalid timestamps)
-    before_drop = len(df)
-    df.dropna(subset=["Time"], inplace=True)
-    after_drop = len(df)
-    print(f"✅ Rows before dropna: {before_drop}, after dropna: {after_drop}")
-
-    # ✅ Ensure "PV" and "CV" exist
-    if "PV" not in df.columns or "CV" not in df.columns:
-        return JsonResponse({"error": "Missing PV/CV columns!"})
-
-    # ✅ Convert PV and CV to float
-    df["PV"] = pd.to_numeric(df["PV"], errors="coerce")
-    df["CV"] = pd.to_numeric(df["CV"], errors="coerce")
-
-    # ✅ Forward fill missing values
-    df["PV"] = df["PV"].ffill()
-    df["CV"] = df["CV"].ffill()
-
-    # ✅ Ensure chronological order
-    df = df.sort_values(by="Time")
-
-    print(f"✅ After Processing: {len(df)} rows remaining.")
-
-    # ✅ Convert timestamps for frontend compatibility
-    # Ensure "Time" is a proper datetime column before using .dt
-    df["Time"] = pd.to_datetime(df["Time"], errors="coerce")
-
-    # Drop rows where Time could not be converted (if needed)
-    df.dropna(subset=["Time"], inplace=True)
-
-    # Now safely format the datetime column
-    df["Time"] = df["Time"].dt.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
-
-    # ✅ Convert to JSON format for rendering
-    # Convert DataFrame to JSON safely (replace NaN with None)
-    chart_data = df.where(pd.notna(df), None).to_dict(orient="records")
-
     # ✅ Fetch associated bump tests
     bump_tests = BumpTest.objects.filter(trend_chart=trend_chart)
     print(f"🔍 Found {len(bump_tests)} bump tests for trend chart {trend_chart.id}")
 
-    # 🚀 Final Debugging
-    print(f"📌 Final Data Sent to Frontend ({len(chart_data)} points):", chart_data[:10])
-
+    # ✅ Trend data is fetched by the page from `trend_chart_data`, so page size no longer scales with file length
     context = {
         "trend_chart": trend_chart,
         "trend_chart_id": chart_id,
         "pid_name": trend_chart.pid_loop.name,
-        "chart_data": json.dumps(chart_data, ensure_ascii=False, allow_nan=False),
+        "total_points": len(series),
         "bump_tests": bump_tests,  # ✅ Pass bump tests to template
     }
 
     return render(request, "tuner/view_trend_chart.html", context)
 
 
+def series_to_records(series):
+    """Converts a TrendSeries to JSON-safe Time/PV/CV records (UTC ISO strings, NaN → None)."""
+    df = series.to_frame()
+    df["Time"] = df["Time"].dt.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+    return df.astype(object).where(pd.notna(df), None).to_dict(orient="records")
+
+
+def trend_chart_data(request, chart_id):
+    """
+    Ranged trend data API: `start`/`end` (UTC ISO, optional) select a time window and `max_points`
+    caps the points per trace. Windows that fit are returned at full resolution; larger ones are
+    answered from the chart's aggregation pyramid (`agg=minmax` extremes or `agg=mean`).
+    """
+    trend_chart = get_object_or_404(TrendChart, id=chart_id)
+    series = trend_chart.load_series()
+    if series is None:
+        return JsonResponse({"error": "File not found."}, status=404)
+
+    try:
+        max_points = int(request.GET.get("max_points", settings.TREND_MAX_POINTS))
+        start = parse_datetime(request.GET.get("start", ""))
+        end = parse_datetime(request.GET.get("end", ""))
+    except ValueError as e:
+        return JsonResponse({"error": f"Invalid query parameter: {e}"}, status=400)
+    if (request.GET.get("start") and not start) or (request.GET.get("end") and not end):
+        return JsonResponse({"error": "Invalid start/end timestamp."}, status=400)
+    max_points = min(max(max_points, 10), settings.TREND_MAX_POINTS_LIMIT)
+
+    if len(series) and (start or end):
+        series = series.window(start or pd.Timestamp(series.time[0], tz="UTC"),
+                               end or pd.Timestamp(series.time[-1], tz="UTC"))
+
+    agg = request.GET.get("agg", "minmax")
+    if agg not in ("minmax", "mean"):
+        return JsonResponse({"error": "agg must be 'minmax' or 'mean'."}, status=400)
+
+    bump_tests = BumpTest.objects.filter(trend_chart=trend_chart)
+    keep_times = bump_keep_times(bump_tests)
+
+    # ✅ Large windows come from the precomputed pyramid (cost ~ max_points, not raw samples)
+    pyramid = trend_chart.load_pyramid() if len(series) > max_points else None
+    if pyramid is not None:
+        reduced = pyramid_window(pyramid, series, max_points, keep_times=keep_times, agg=agg)
+    else:
+        reduced = downsample_series(series, max_points, keep_times=keep_times)
+
+    # ✅ Compact encodings: typed binary buffer or parallel epoch-ms arrays ("records" kept for old clients)
+    wire_format = request.GET.get("format", "records")
+    if wire_format == "binary":
+        response = HttpResponse(reduced.to_wire_bytes(), content_type="application/octet-stream")
+        response["X-Total-Points"] = len(series)
+        response["X-Returned-Points"] = len(reduced)
+        return response
+
+    payload = {
+        "total_points": len(series),
+        "returned_points": len(reduced),
+        "full_resolution": len(reduced) == len(series),
+    }
+    if wire_format == "columnar":
+        payload["columns"] = reduced.to_columns()
+    else:
+        payload["data"] = series_to_records(reduced)
+    return JsonResponse(payload)
+
+
 @csrf_exempt
 def save_bump(request, chart_id):
     """Saves a bump test while ensuring correct UTC handling."""
@@ -318,6 +361,126 @@ def save_bump(request, chart_id):
         return JsonResponse({"error": str(e)}, status=500)
 
 
+# ✅ Query/JSON parameters of `detect_bumps` → keyword arguments of `steps.detect_cv_steps`
+STEP_OPTIONS = {
+    "min_step_pct": ("min_step_fraction", 0.01),
+    "noise_pct": ("noise_fraction", 0.01),
+    "merge_seconds": ("merge_seconds", 1),
+    "max_ramp_seconds": ("max_ramp_seconds", 1),
+    "pre_seconds": ("pre_seconds", 1),
+    "min_window_seconds": ("min_window_seconds", 1),
+    "max_window_seconds": ("max_window_seconds", 1),
+}
+
+
+def _step_options(params):
+    options = {}
+    for key, (option, scale) in STEP_OPTIONS.items():
+        if params.get(key) not in (None, ""):
+            value = float(params[key])
+            if not np.isfinite(value) or value < 0:
+                raise ValueError(f"{key} must be a non-negative number")
+            options[option] = value * scale
+    return options
+
+
+def _format_utc(value):
+    return value.astimezone(pytz.UTC).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+@csrf_exempt
+def detect_bumps(request, chart_id):
+    """
+    Automatic bump windows from the chart's CV steps.
+    GET lists the proposed windows; POST creates the posted `windows` ([{start, end}, ...]) or, without
+    them, every proposed window that does not overlap a saved bump test, in a single bulk insert.
+    """
+    trend_chart = get_object_or_404(TrendChart.objects.select_related("pid_loop"), id=chart_id)
+
+    try:
+        params = json.loads(request.body or "{}") if request.method == "POST" else request.GET
+        options = _step_options(params)
+    except (ValueError, TypeError, AttributeError) as e:
+        return JsonResponse({"error": f"Invalid parameter: {e}"}, status=400)
+
+    if request.method == "GET":
+        proposals = trend_chart.propose_bump_tests(**options)
+        return JsonResponse({"windows": [
+            {**window, **{key: _format_utc(window[key]) for key in ("start_time", "end_time", "step_time")}}
+            for window in proposals
+        ]})
+
+    if request.method != "POST":
+        return JsonResponse({"error": "Invalid request method"}, status=400)
+
+    if "windows" in params:
+        windows = []
+        for window in params["windows"]:
+            start, end = parse_datetime(str(window.get("start", ""))), parse_datetime(str(window.get("end", "")))
+            if not start or not end or start >= end:
+                return JsonResponse({"error": f"Invalid window: {window}"}, status=400)
+            windows.append((start if is_aware(start) else make_aware(start, pytz.UTC),
+                            end if is_aware(end) else make_aware(end, pytz.UTC)))
+    else:
+        windows = [(w["start_time"].to_pydatetime(), w["end_time"].to_pydatetime())
+                   for w in trend_chart.propose_bump_tests(**options) if not w["overlaps_existing"]]
+
+    created = trend_chart.create_bump_tests(windows)
+    logger.info("Created %s detected bump test(s) for trend chart %s", len(created), trend_chart.id)
+    return JsonResponse({"success": True, "created": len(created), "bump_ids": [bump.id for bump in created]})
+
+
+@csrf_exempt
+def mark_bumps(request, chart_id):
+    """
+    Computes T1–T4/TCV for the chart's bump tests (or the posted `bump_ids`) in one batch.
+    Markers already set are kept unless `overwrite` is true.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "Invalid request method"}, status=400)
+
+    trend_chart = get_object_or_404(TrendChart.objects.select_related("pid_loop"), id=chart_id)
+    try:
+        data = json.loads(request.body or "{}")
+        bump_ids = data.get("bump_ids")
+        overwrite = bool(data.get("overwrite", False))
+    except (json.JSONDecodeError, AttributeError):
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+
+    bump_tests = None
+    if bump_ids is not None:
+        bump_tests = BumpTest.objects.filter(trend_chart=trend_chart, id__in=bump_ids,
+                                             start_time__isnull=False, end_time__isnull=False)
+    updated = trend_chart.mark_bump_tests(bump_tests, overwrite=overwrite)
+    logger.info("Marked %s bump test(s) for trend chart %s", updated, trend_chart.id)
+    return JsonResponse({"success": True, "updated": updated})
+
+
+@csrf_exempt
+def fit_bumps(request, chart_id):
+    """Fits process models to the chart's bump tests (or the posted `bump_ids`) in one batch."""
+    if request.method != "POST":
+        return JsonResponse({"error": "Invalid request method"}, status=400)
+
+    trend_chart = get_object_or_404(TrendChart.objects.select_related("pid_loop"), id=chart_id)
+    try:
+        bump_ids = json.loads(request.body or "{}").get("bump_ids")
+    except (json.JSONDecodeError, AttributeError):
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+
+    bump_tests = BumpTest.objects.filter(trend_chart=trend_chart, start_time__isnull=False, end_time__isnull=False)
+    if bump_ids is not None:
+        bump_tests = bump_tests.filter(id__in=bump_ids)
+    bump_tests = list(bump_tests)
+    fitted = trend_chart.fit_bump_tests(bump_tests)
+    logger.info("Fitted %s of %s bump test(s) for trend chart %s", fitted, len(bump_tests), trend_chart.id)
+    return JsonResponse({"success": True, "fitted": fitted, "bump_tests": [
+        {"id": bump.id, "model": bump.fit_model, "gain": bump.fit_gain, "deadtime": bump.fit_deadtime,
+         "tau": bump.fit_tau, "residual": bump.fit_residual, "confidence": bump.fit_confidence}
+        for bump in bump_tests
+    ]})
+
+
 @csrf_exempt
 def update_bump_tests(request, pid_calculation_id):
     """Handles individual bump test selections for a given PID Calculation."""
@@ -338,9 +501,7 @@ def update_bump_tests(request, pid_calculation_id):
             else:
                 pid_calculation.bump_tests.remove(bump_test)  # ✅ Remove bump test
 
-            pid_calculation.save()
-            pid_calculation.recalculate_tuning()  # ✅ Trigger recalculation
-            pid_calculation.save()  # ✅ Save changes
+            pid_calculation.recalculate_tuning()  # ✅ Trigger recalculation (saves the calculation once)
 
             return JsonResponse({
                 "success": True,
@@ -377,32 +538,16 @@ def delete_bump(request):
 
 
 def identity_trend(request):
-    pid_loops = PIDLoop.objects.all()
-    pid_loop_data = []
+    """Loops of the page with their trend charts and complete bump tests, in a constant number of queries."""
+    bumps = BumpTest.objects.filter(start_time__isnull=False, end_time__isnull=False).only(
+        "id", "trend_chart_id", "start_time", "end_time").order_by("id")
+    charts = TrendChart.objects.only("id", "pid_loop_id", "description").order_by("id").prefetch_related(
+        Prefetch("bumptest_set", queryset=bumps, to_attr="bump_tests"))
+    loops = PIDLoop.objects.only("id", "name", "pid_type").prefetch_related(
+        Prefetch("trendchart_set", queryset=charts, to_attr="trend_charts"))
 
-    for loop in pid_loops:
-        trend_charts = TrendChart.objects.filter(pid_loop=loop)
-        trend_charts_data = []
-
-        for chart in trend_charts:
-            bumps = BumpTest.objects.filter(
-                trend_chart=chart,
-                start_time__isnull=False,
-                end_time__isnull=False
-            )
-
-            trend_charts_data.append({
-                "trend_chart": chart,
-                "bump_tests": bumps,
-            })
-
-        pid_loop_data.append({
-            "pid_loop": loop,
-            "trend_charts_data": trend_charts_data,
-        })
-
-    context = {"pid_loop_data": pid_loop_data}
-    return render(request, "tuner/identity_trend_list.html", context)
+    page, filters = _loop_page(request, loops, settings.TUNER_IDENTITY_LOOPS_PER_PAGE)
+    return render(request, "tuner/identity_trend_list.html", {"pid_loops": page, "page_obj": page, **filters})
 
 
 def format_marker_with_offset(time_value, offset_hours):
@@ -438,79 +583,39 @@ def identity_trend_detail(request, chart_id, bump_test_id):
             return (utc_time.astimezone(pytz.UTC) + timedelta(hours=timezone_offset)).isoformat()
         return None
 
-    if not trend_chart.csv_file:
+    # ✅ Memory-mapped, already sorted and forward-filled series (no CSV re-parse)
+    series = trend_chart.load_series()
+    if series is None:
         return JsonResponse({"error": "File not found."}, status=400)
 
-    df = pd.read_csv(trend_chart.csv_file.path)
-
-    print("📌 All Available Timestamps in Dataset Whe df just set:")
-    print(df["Time"].head(20))  # Print first 20 timestamps
-    print(df["Time"].tail(20))  # Print last 20 timestamps
-
-    if "Time" not in df.columns:
-        return JsonResponse({"error": "Missing 'Time' column in trend file!"}, status=400)
-
-    df["Time"] = pd.to_datetime(df["Time"], utc=True, errors="coerce")
-    df.dropna(subset=["Time"], inplace=True)
-    df = df.sort_values(by="Time")
-
-    print("📌 All Available Timestamps in Dataset after pd.to_dtattiem, dropna, and sort:")
-    print(df["Time"].head(20))  # Print first 20 timestamps
-    print(df["Time"].tail(20))  # Print last 20 timestamps
-
-    if "PV" not in df.columns or "CV" not in df.columns:
-        return JsonResponse({"error": "Missing PV/CV columns!"}, status=400)
-
-    df["PV"] = pd.to_numeric(df["PV"], errors="coerce")
-    df["CV"] = pd.to_numeric(df["CV"], errors="coerce")
-    df.ffill(inplace=True)
-
     bump_start = bump_test.start_time.astimezone(pytz.UTC).replace(microsecond=0)
     bump_end = bump_test.end_time.astimezone(pytz.UTC).replace(microsecond=0)
 
-    print("📌 Bump Start Time (UTC):", bump_start)
-    print("📌 Bump End Time (UTC):", bump_end)
-
-    print("📌 All Available Timestamps in Dataset:")
-    print(df["Time"].head(20))  # Print first 20 timestamps
-    print(df["Time"].tail(20))  # Print last 20 timestamps
-
-    # ✅ New Fix: If filtering results in an empty DataFrame, use full dataset
-    if bump_start and bump_end:
-        df_filtered = df[(df["Time"] >= bump_start) & (df["Time"] <= bump_end)]
-        if df_filtered.empty:
-            print("⚠️ No data found within bump range! Sending full dataset instead.")
-            df_filtered = df  # ✅ Fallback: Send entire dataset
-    else:
-        df_filtered = df  # ✅ Fallback: Send entire dataset if bump times are missing
-
-    df_filtered = df_filtered.copy()
-    df_filtered["Time"] = df_filtered["Time"].dt.strftime("%Y-%m-%dT%H:%M:%S.%fZ")  # ✅ Keep UTC format
+    logger.debug("Bump %s window (UTC): %s → %s", bump_test.id, bump_start, bump_end)
 
-    print("📌 First 5 Rows of CSV Data (Before Processing):")
-    print(df.head(5))  # Logs original data
+    # ✅ New Fix: If the bump window is empty, use full dataset
+    window = series.window(bump_start, bump_end)
+    if not len(window):
+        logger.debug("No data within bump %s range, sending the full dataset instead.", bump_test.id)
+        window = series  # ✅ Fallback: Send entire dataset
 
-    print("📌 First 5 Rows of Filtered Data (After Processing):")
-    print(df_filtered.head(5))  # Logs filtered data
+    # ✅ Downsample long bump windows but keep this bump's T-marker neighborhoods
+    window = downsample_series(window, settings.TREND_MAX_POINTS, keep_times=bump_keep_times([bump_test]))
 
     # Calculate delta_cv (change in CV)
-    if not df_filtered.empty:
-        start_cv = df_filtered.iloc[0]["CV"]
-        end_cv = df_filtered.iloc[-1]["CV"]
-        bump_test.delta_cv = end_cv - start_cv
+    if len(window):
+        bump_test.delta_cv = float(window.cv[-1] - window.cv[0])
 
         # Calculate delta_pv only if loop_type is "1st Order"
         if pid_loop.pid_type == "1st Order":
-            start_pv = df_filtered.iloc[0]["PV"]
-            end_pv = df_filtered.iloc[-1]["PV"]
-            bump_test.delta_pv = end_pv - start_pv
+            bump_test.delta_pv = float(window.pv[-1] - window.pv[0])
         else:
             bump_test.delta_pv = None  # Reset if not 1st Order
 
         bump_test.save()
 
-    chart_data = df_filtered.to_dict(orient="records")
-    chart_data_json = json.dumps(chart_data, ensure_ascii=False) if chart_data else "[]"
+    # ✅ Columnar payload (epoch-ms Time + PV/CV arrays) instead of one dict per row
+    chart_data_json = json.dumps(window.to_columns(), ensure_ascii=False)
 
     # ✅ Convert markers to UTC (Do NOT adjust for local time before sending)
     t_markers = {
@@ -536,8 +641,7 @@ def identity_trend_detail(request, chart_id, bump_test_id):
             "delta_pv": bump_test.delta_pv if pid_loop.pid_type == "1st Order" else None,
         })
 
-    print("📌 Final Chart Data Sent to Frontend (First 5 Rows):")
-    print(chart_data[:5])  # Logs first 5 rows
+    logger.debug("Bump %s chart: %s points sent to the frontend", bump_test.id, len(window))
 
     return render(request, "tuner/identity_trend_detail.html", {
         "trend_chart": trend_chart,
@@ -561,20 +665,18 @@ def update_t1_t2(request, bump_test_id):
     try:
         data = json.loads(request.body)
 
-        print(f"📌 Received data for Bump Test {bump_test_id}: {data}")
+        logger.debug("Received T-marker update for bump test %s: %s", bump_test_id, data)
 
         bump_test = get_object_or_404(BumpTest, id=bump_test_id)
         trend_chart = bump_test.trend_chart
         pid_loop = trend_chart.pid_loop
 
-        if not trend_chart.csv_file:
+        if not trend_chart.csv_file and not trend_chart.data_file:
             return JsonResponse({"error": "File not found."}, status=400)
 
         # ✅ Get the timezone offset from frontend (should be in hours)
         browser_timezone_offset = float(data.get("timezone_offset", 0))  # Convert to float in case it's a string
 
-        print(f"📌 Received Timezone Offset from Browser: {browser_timezone_offset} hours")
-
         # ✅ Helper function to convert local timestamps to UTC
         def convert_local_to_utc(dt_str):
             if not dt_str:
@@ -583,80 +685,57 @@ def update_t1_t2(request, bump_test_id):
                 local_dt = datetime.fromisoformat(dt_str.replace("Z", ""))  # Convert string to datetime
                 timezone_offset_seconds = browser_timezone_offset * 3600  # Convert hours to seconds
                 utc_dt = local_dt - timedelta(seconds=timezone_offset_seconds)  # Adjust to UTC
-                print(f"📌 MCC TimeZone Offset {browser_timezone_offset} hours")
-                print(f"📌 Adjusting {dt_str} (Local) → {utc_dt} (UTC), Offset Applied: {browser_timezone_offset} hours")
+                logger.debug("Adjusting %s (local) → %s (UTC), offset %s hours", dt_str, utc_dt, browser_timezone_offset)
                 return utc_dt.replace(tzinfo=pytz.UTC)
             except ValueError as e:
-                print(f"❌ Error parsing datetime: {dt_str} -> {e}")
+                logger.warning("Could not parse datetime %r: %s", dt_str, e)
                 return None
 
         # ✅ Only update the fields that exist in the request payload
         updated_fields = {}
 
-        print(f"📌 Received update for {bump_test_id}: {data}")
-
         # ✅ Always update T1, T2, T4, and TCV regardless of pid_type
         for key in ["T1", "T2", "T4", "TCV"]:
             if key in data and isinstance(data[key], str) and data[key]:
                 try:
-                    print(f"📌 Parsing {key}: {data[key]}")  # ✅ Debugging
                     # ✅ Use dateutil.parser.parse() to handle ISO format correctly
                     parsed_time = parser.parse(data[key])
-                    print(f"📌 Parsing Finished!!!")  # ✅ Debugging
 
                     # ✅ Ensure parsed_time is timezone-aware
                     if parsed_time.tzinfo is None:
                         parsed_time = parsed_time.replace(tzinfo=pytz.UTC)
 
                     parsed_time = parsed_time.astimezone(pytz.UTC)  # Ensure final timezone is UTC
-                    print(f"✅ Successfully parsed {key}: {parsed_time} (Type: {type(parsed_time)})")  # Debugging output
+                    logger.debug("Parsed %s: %s → %s", key, data[key], parsed_time)
                     setattr(bump_test, key, parsed_time)
-                    print(f"📌 setattr Finished!!!")  # ✅ Debugging
                     updated_fields[key] = parsed_time
-                    print(f"📌 updated fields key finished!!!")  # ✅ Debugging
                 except Exception as e:
-                    print(f"❌ Error parsing {key}: {data[key]} -> {e}")  # ✅ Log exact failure
+                    logger.warning("Could not parse %s %r: %s", key, data[key], e)
                     return JsonResponse({"success": False, "error": f"Invalid datetime format for {key}: {e}"},
                                         status=400)
 
-        # ✅ Read the trend chart data
-        file_path = trend_chart.csv_file.path
-        if not os.path.exists(file_path):
+        # ✅ Read the trend chart data (memory-mapped; only the bump window pages are touched)
+        series = trend_chart.load_series()
+        if series is None:
             return JsonResponse({"error": "Trend chart file not found."}, status=400)
 
-        df = pd.read_csv(file_path)
-        df["Time"] = pd.to_datetime(df["Time"], utc=True, errors="coerce")
-        df.dropna(subset=["Time"], inplace=True)
-        df = df.sort_values(by="Time")
-
         bump_start = bump_test.start_time.astimezone(pytz.UTC).replace(microsecond=0)
         bump_end = bump_test.end_time.astimezone(pytz.UTC).replace(microsecond=0)
-        df_filtered = df[(df["Time"] >= bump_start) & (df["Time"] <= bump_end)]
+        window = series.window(bump_start, bump_end)  # ✅ Binary search, no full-chart mask
 
         # ✅ Update TCV: Find the first time the final CV value appears
-        if not df_filtered.empty:
-            final_cv_value = df_filtered.iloc[-1]["CV"]
-            matching_rows = df_filtered[df_filtered["CV"] == final_cv_value]
-            if not matching_rows.empty:
-                bump_test.TCV = matching_rows.iloc[0]["Time"]
-                updated_fields["TCV"] = bump_test.TCV
+        tcv = from_ns(window.final_value_time("cv"))
+        if tcv is not None:
+            bump_test.TCV = tcv
+            updated_fields["TCV"] = tcv
 
         # New Code
         if pid_loop.pid_type == "1st Order":
-            # ✅ Use only data within bump start & end times
-            if not df_filtered.empty:
-                start_pv = df_filtered.iloc[0]["PV"]  # ✅ Use bump start PV
-                end_pv = df_filtered.iloc[-1]["PV"]  # ✅ Use bump end PV
-                delta_pv = end_pv - start_pv
-                target_pv = start_pv + 0.632 * delta_pv  # ✅ Find 63.2% response within bump window
-
-                # Find the closest timestamp where PV reaches `target_pv` inside bump range
-                closest_row = df_filtered.iloc[(df_filtered["PV"] - target_pv).abs().argsort()[:1]]
-
-                if not closest_row.empty:
-                    closest_time = closest_row["Time"].values[0]
-                    bump_test.T3 = closest_time  # ✅ Assign calculated T3
-                    updated_fields["T3"] = closest_time
+            # ✅ 63.2% PV response within the bump window, interpolated between samples
+            t3 = from_ns(window.response_time("pv", 0.632))
+            if t3 is not None:
+                bump_test.T3 = t3  # ✅ Assign calculated T3
+                updated_fields["T3"] = t3
         elif pid_loop.pid_type in ["Integrating", "Integrating with Lag"]:
             # ✅ Allow manual updates for T3
             if "T3" in data and isinstance(data["T3"], str) and data["T3"]:
@@ -680,7 +759,7 @@ def update_t1_t2(request, bump_test_id):
                 try:
                     updated_fields[key] = parser.parse(updated_fields[key])
                 except Exception as e:
-                    print(f"❌ Error parsing {key}: {updated_fields[key]} -> {e}")
+                    logger.warning("Could not parse %s %r: %s", key, updated_fields[key], e)
 
         # Convert pandas.Timestamp and numpy.datetime64 to Python datetime before saving
         for key in updated_fields:
@@ -692,10 +771,10 @@ def update_t1_t2(request, bump_test_id):
                 try:
                     updated_fields[key] = parser.parse(updated_fields[key])  # ✅ Convert to datetime, NOT string
                 except Exception as e:
-                    print(f"❌ Error parsing {key}: {updated_fields[key]} -> {e}")
+                    logger.warning("Could not parse %s %r: %s", key, updated_fields[key], e)
 
         # 🚨 DO NOT CONVERT TO STRING BEFORE SAVING!
-        print(f"📌 Final Updated Fields Before Save (Fixed): {updated_fields}")
+        logger.debug("Bump test %s fields before save: %s", bump_test_id, updated_fields)
 
         try:
             # ✅ Ensure `bump_test` gets datetime objects, NOT strings
@@ -703,10 +782,10 @@ def update_t1_t2(request, bump_test_id):
                 setattr(bump_test, key, value)
 
             bump_test.save()
-            print(f"✅ Bump Test {bump_test_id} Saved Successfully!")
+            logger.debug("Bump test %s saved.", bump_test_id)
 
         except Exception as e:
-            print(f"❌ Error during bump_test.save(): {e}")
+            logger.exception("Saving bump test %s failed", bump_test_id)
             return JsonResponse({"success": False, "error": f"Failed to save bump test: {e}"}, status=500)
 
         # ✅ Now, convert to strings ONLY for the JSON response
@@ -763,6 +842,133 @@ def pid_calculation_detail(request, loop_id):
     })
 
 
+SWEEP_STEPS = 101
+MAX_SWEEP_STEPS = 2001
+
+
+def _sweep_values(values):
+    """NumPy sweep results as JSON lists (NaN becomes None)."""
+    return np.where(np.isfinite(values), values, None).tolist()
+
+
+def lambda_sweep(request, loop_id):
+    """
+    Read-only Lambda sweep: the per-bump and aggregated Kp/Ti/Td for `steps` lambdas from `min_lambda` to
+    `max_lambda` (defaults: the calculation's own range) in one response. Nothing is saved; the slider
+    scrubs these values locally and only the chosen lambda is committed through `recalculate_pid`.
+    """
+    pid_calculation = get_object_or_404(PIDCalculation.objects.select_related("pid_loop"), pid_loop_id=loop_id)
+    try:
+        low = float(request.GET.get("min_lambda", pid_calculation.min_lambda))
+        high = float(request.GET.get("max_lambda", pid_calculation.max_lambda))
+        steps = int(request.GET.get("steps", SWEEP_STEPS))
+        if not (np.isfinite(low) and np.isfinite(high)) or low <= 0 or high < low:
+            raise ValueError("Lambda range must satisfy 0 < min_lambda <= max_lambda")
+        if not 1 <= steps <= MAX_SWEEP_STEPS:
+            raise ValueError(f"steps must be between 1 and {MAX_SWEEP_STEPS}")
+    except ValueError as e:
+        return JsonResponse({"success": False, "error": str(e)}, status=400)
+
+    sweep = pid_calculation.lambda_sweep(np.linspace(low, high, steps))
+    return JsonResponse({
+        "success": True,
+        "lambdas": sweep["lambdas"].round(4).tolist(),
+        "kp": _sweep_values(sweep["kp"]),
+        "ti": _sweep_values(sweep["ti"]),
+        "td": _sweep_values(sweep["td"]),
+        "bump_tests": [
+            {"id": bump.id, "p": _sweep_values(sweep["p"][:, k]), "i": _sweep_values(sweep["i"][:, k]),
+             "d": _sweep_values(sweep["d"][:, k])}
+            for k, bump in enumerate(sweep["bumps"])
+        ],
+    })
+
+
+SIMULATION_OPTIONS = ("kp", "ti", "td", "filter_time", "setpoint_step", "load_step")
+SIMULATION_POINTS = 200
+
+
+def simulate_pid(request, loop_id):
+    """
+    Read-only closed-loop simulation of a tuning (default: the saved one; override with kp/ti/td/filter_time)
+    on every assigned bump's identified process. Returns overshoot, settling time, IAE and valve travel of
+    the setpoint and load responses per bump, and the trajectories when `trajectories=1`.
+    """
+    pid_calculation = get_object_or_404(PIDCalculation.objects.select_related("pid_loop"), pid_loop_id=loop_id)
+    try:
+        options = {}
+        for key in SIMULATION_OPTIONS:
+            if request.GET.get(key) not in (None, ""):
+                options[key] = float(request.GET[key])
+                if not np.isfinite(options[key]):
+                    raise ValueError(f"{key} must be a finite number")
+    except ValueError as e:
+        return JsonResponse({"success": False, "error": str(e)}, status=400)
+
+    trajectories = request.GET.get("trajectories") == "1"
+    simulation = pid_calculation.simulate_tuning(trajectories=trajectories, **options)
+
+    keep = slice(None, None, max(1, SIM_STEPS // SIMULATION_POINTS))
+    bump_tests = []
+    for k, bump in enumerate(simulation["bumps"]):
+        entry = {"id": bump.id}
+        for row, scenario in enumerate(("setpoint", "load")):
+            entry[scenario] = {key: _sweep_values(values[k]) for key, values in simulation[scenario].items()}
+            if trajectories:
+                entry[scenario].update(pv=simulation["pv"][row, k, keep].round(4).tolist(),
+                                       out=simulation["out"][row, k, keep].round(4).tolist())
+        bump_tests.append(entry)
+
+    response = {"success": True, "bump_tests": bump_tests}
+    if trajectories:
+        response["time"] = simulation["time"][keep].round(3).tolist()
+    return JsonResponse(response)
+
+
+MAX_ROBUSTNESS_STEPS = 200
+
+
+def robustness(request, loop_id):
+    """
+    Read-only robustness map: Lambda tunings from `min_lambda` to `max_lambda` (`lambda_steps`) simulated
+    against ±`gain_uncertainty` on kc and ±`deadtime_uncertainty` on Td (`perturbation_steps`) for every
+    assigned bump. Returns the stable share of bumps and worst overshoot per grid cell, and the widest
+    lambda range stable everywhere. Maps are cached per input hash.
+    """
+    pid_calculation = get_object_or_404(PIDCalculation.objects.select_related("pid_loop"), pid_loop_id=loop_id)
+    try:
+        low = float(request.GET.get("min_lambda", pid_calculation.min_lambda))
+        high = float(request.GET.get("max_lambda", pid_calculation.max_lambda))
+        lambda_steps = int(request.GET.get("lambda_steps", LAMBDA_STEPS))
+        perturbation_steps = int(request.GET.get("perturbation_steps", PERTURBATION_STEPS))
+        gain_uncertainty = float(request.GET.get("gain_uncertainty", GAIN_UNCERTAINTY))
+        deadtime_uncertainty = float(request.GET.get("deadtime_uncertainty", DEADTIME_UNCERTAINTY))
+        if not (np.isfinite(low) and np.isfinite(high)) or low <= 0 or high < low:
+            raise ValueError("Lambda range must satisfy 0 < min_lambda <= max_lambda")
+        if not (1 <= lambda_steps <= MAX_ROBUSTNESS_STEPS and 1 <= perturbation_steps <= MAX_ROBUSTNESS_STEPS):
+            raise ValueError(f"Grid steps must be between 1 and {MAX_ROBUSTNESS_STEPS}")
+        if not (0 <= gain_uncertainty < 1 and 0 <= deadtime_uncertainty < 1):
+            raise ValueError("Uncertainties must be fractions between 0 and 1")
+    except ValueError as e:
+        return JsonResponse({"success": False, "error": str(e)}, status=400)
+
+    result = pid_calculation.robustness_map(low, high, lambda_steps, perturbation_steps=perturbation_steps,
+                                            gain_uncertainty=gain_uncertainty,
+                                            deadtime_uncertainty=deadtime_uncertainty)
+    stable_range = result["stable_range"]
+    return JsonResponse({
+        "success": True,
+        "cached": result["cached"],
+        "bump_tests": [bump.id for bump in result["bumps"]],
+        "lambdas": result["lambdas"].round(4).tolist(),
+        "gain_factors": result["gain_factors"].round(4).tolist(),
+        "deadtime_factors": result["deadtime_factors"].round(4).tolist(),
+        "stable_fraction": result["stable_fraction"].round(4).tolist(),
+        "overshoot": _sweep_values(result["overshoot"].round(2)),
+        "stable_range": {"min": stable_range[0], "max": stable_range[1]} if stable_range else None,
+    })
+
+
 @csrf_exempt
 def recalculate_pid(request, loop_id):
     """Handles recalculating PID tuning when lambda is updated."""
@@ -784,8 +990,8 @@ def recalculate_pid(request, loop_id):
 
             # ✅ Update Lambda Value and Recalculate
             pid_calculation.lambda_value = new_lambda
-            pid_calculation.recalculate_tuning()
-            pid_calculation.save()
+            pid_calculation.save(update_fields=["lambda_value"])
+            pid_calculation.recalculate_tuning()  # ✅ The new lambda dirties every bump's fingerprint
 
             # ✅ Get Updated BumpTest Data
             bump_tests_data = [